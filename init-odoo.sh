@@ -89,7 +89,9 @@ fi
 
 log "✓ TVBO initialization complete"
 log "Starting Odoo server on port 8069..."
+# ODOO_ARGS: extra server options (e.g. --workers=4), word-split on purpose
+# shellcheck disable=SC2086
 exec odoo -d "$DB_NAME" \
   --db_host="$DB_HOST" --db_user="$DB_USER" --db_password="$DB_PASSWORD" \
   --db-filter="^${DB_NAME}$" \
-  --log-level=info
+  --log-level=info ${ODOO_ARGS:-}
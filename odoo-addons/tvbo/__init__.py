@@ -1,2 +1,42 @@
 from . import models
 from . import controllers
+
+
+def post_load():
+    """Preload the ontology in processes that serve HTTP, and only in those.
+
+    With tvbo in ``--load`` the hook runs before the server is created, so
+    the preload is chained to the start of the HTTP server: each HTTP
+    worker in prefork mode, the HTTP thread of the threaded server (not
+    with ``--stop-after-init``). ``odoo shell``, cron workers and the
+    gevent server never start either. When the registry is instead loaded
+    lazily by a running server, it preloads only if a request is being
+    served.
+    """
+    from odoo.http import request
+    from odoo.service import server
+    from odoo.tools import config
+
+    from .controllers.kg_api import preload_ontology
+
+    if server.server is None:
+        if config['workers']:
+            start = server.WorkerHTTP.start
+
+            def start_and_preload(self):
+                start(self)
+                preload_ontology()
+
+            server.WorkerHTTP.start = start_and_preload
+        else:
+            start = server.ThreadedServer.start
+
+            def start_and_preload(self, stop=False):
+                result = start(self, stop=stop)
+                if not stop:
+                    preload_ontology()
+                return result
+
+            server.ThreadedServer.start = start_and_preload
+    elif request:
+        preload_ontology()
@@ -33,12 +33,14 @@
         "data/database_coupling_functions.xml",
         "data/database_experiments.xml",
         "data/website_config.xml",
+        "data/ir_cron.xml",
         "views/website_templates.xml",
         "views/configurator_templates.xml",
         "views/database_views.xml",
         "views/menus.xml",
         "views/literature_views.xml",
     ],
+    "post_load": "post_load",
     "installable": True,
     "application": True,
     "auto_install": False,
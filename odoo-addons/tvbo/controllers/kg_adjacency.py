@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+CSR adjacency index over ontology links.
+
+Links are stored once in ``links``; for every node, the indices of its
+incident links (as source or target) are laid out contiguously in
+``incident`` between ``offsets[row]`` and ``offsets[row + 1]``. Looking up
+the neighbourhood of many nodes is then a slice per node instead of a
+quadstore walk.
+"""
+from array import array
+
+
+def link_key(link):
+    """Identity of a link, used to deduplicate."""
+    return link.get('source'), link.get('target'), link.get('type')
+
+
+class AdjacencyIndex:
+    """Read-only CSR index of ontology links keyed by storid.
+
+    ``nodes`` are the storids whose relationships were all collected into
+    ``links``; membership tests against them, not just linked storids.
+    """
+
+    def __init__(self, links, nodes=()):
+        unique = {}
+        for link in links:
+            unique.setdefault(link_key(link), link)
+        self.links = tuple(unique.values())
+
+        # A self-loop is incident to its node once
+        ends = [{link.get('source'), link.get('target')} for link in self.links]
+        degree = {}
+        for link_ends in ends:
+            for end in link_ends:
+                degree[end] = degree.get(end, 0) + 1
+
+        self.nodes = frozenset(nodes).union(degree)
+        self.rows = {storid: row for row, storid in enumerate(degree)}
+        self.storids = tuple(degree)
+        self.offsets = array('l', [0])
+        for storid in self.storids:
+            self.offsets.append(self.offsets[-1] + degree[storid])
+
+        fill = array('l', self.offsets[:-1])
+        self.incident = array('l', bytes(self.offsets[-1] * self.offsets.itemsize))
+        for i, link_ends in enumerate(ends):
+            for end in link_ends:
+                row = self.rows[end]
+                self.incident[fill[row]] = i
+                fill[row] += 1
+
+    def __contains__(self, storid):
+        return storid in self.nodes
+
+    def degree(self, storid):
+        row = self.rows.get(storid)
+        return 0 if row is None else self.offsets[row + 1] - self.offsets[row]
+
+    def incident_links(self, storid):
+        """Links having ``storid`` as source or target."""
+        row = self.rows.get(storid)
+        if row is None:
+            return []
+        return [self.links[i] for i in self.incident[self.offsets[row]:self.offsets[row + 1]]]
@@ -3,57 +3,289 @@
 Knowledge Graph API - Clean MVP implementation.
 No fallbacks. Fails fast when something unexpected happens.
 """
+import hmac
+import itertools
 import json
 import logging
 import os
+import threading
+import time
 
 from odoo import http
 from odoo.http import Response, request
+from odoo.tools import config, str2bool
 
-from tvbo.datamodel.tvbopydantic import Coupling as PydanticCoupling
-from tvbo.datamodel.tvbopydantic import Dynamics as PydanticDynamics
-from tvbo.datamodel.tvbopydantic import Integrator as PydanticIntegrator
-from tvbo.datamodel.tvbopydantic import Network as PydanticNetwork
-from tvbo.datamodel.tvbopydantic import SimulationExperiment as PydanticSimulationExperiment
-from tvbo.datamodel.tvbopydantic import SimulationStudy as PydanticSimulationStudy
+import tvbo
 from tvbo.api.direct_ontology_api import get_direct_ontology_api
 
+from ..models import kg_related
+from . import kg_assets, kg_filter, kg_http, kg_metrics, kg_snapshot, kg_sparql
+from .kg_adjacency import AdjacencyIndex, link_key
+from .kg_cache import LRUCache
+from .kg_closure import ClosureIndex
+from .kg_graph import KGGraph, encode_columnar
+from .kg_queries import NAMED_QUERIES
+from .kg_search import SEARCHABLE_FIELDS, KGSearchIndex
+from .kg_serializers import DETAILS, EMBEDDED_FIELDS, KG_MODELS, SERIALIZERS
+from .kg_suggest import TOP_K, SuggestIndex
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 _logger = logging.getLogger(__name__)
 
-# Singleton ontology API
+# Singleton ontology API, created under _ontology_lock
 _ontology_api = None
+_ontology_lock = threading.Lock()
+# Load time and quadstore of the singleton, for /tvbo/api/kg/health
+_ontology_load = {}
+# Bumped whenever the ontology is (re)loaded; part of ontology-derived cache keys
+_ontology_version = 0
+# NAMED_QUERIES parsed against the loaded ontology
+_named_queries = {}
+
+# Ontology enrichment per (type, name, iri, ontology version). Values are the
+# keys enrich_database_item adds or changes, merged back into each item.
+_enrichment_cache = LRUCache('enrichment', maxsize=8192)
+
+# Free-text ontology search results per (normalized query, limit, ontology version)
+_ontology_search_cache = LRUCache('ontology_search', maxsize=1024)
+
+# Concept types listed in /kg/data, and their catalogue as (ontology version, nodes)
+_CONCEPT_TYPES = ('Model', 'NeuralMassModel', 'Coupling', 'IntegrationMethod',
+                  'StateVariable', 'Parameter', 'BrainRegion', 'Parcellation',
+                  'Tractogram', 'Monitor', 'Noise')
+_concept_catalogue = None
+_catalogue_lock = threading.Lock()
+
+# Ontology adjacency as (ontology version, AdjacencyIndex), built in the
+# background on each ontology load, plus the fallback for storids outside the
+# class hierarchy (or all of them until the index is built)
+_adjacency = None
+_relationships_cache = LRUCache('relationships', maxsize=4096)
+
+# Class hierarchy and its is_a closure, as (ontology version, value)
+_hierarchy = None
+_closure = None
+_hierarchy_lock = threading.Lock()
+
+# SPARQL result pages per (normalized query or query name + bindings, offset,
+# limit, ontology version).
+# Time budget and page size cap are ir.config_parameter overridable.
+_sparql_cache = LRUCache('sparql', maxsize=256, ttl=300)
+_SPARQL_TIMEOUT = 10.0
+_SPARQL_MAX_LIMIT = 1000
+
+# Types searchable with /tvbo/api/kg/fulltext (see models/kg_fulltext.py)
+_FULLTEXT_TYPES = {
+    'dynamics': 'tvbo.dynamics',
+    'study': 'tvbo.simulation_study',
+    'literature': 'tvbo.literature_reference',
+}
+
+# Result cap of /tvbo/api/kg/ontology/search (each limit is cached separately)
+_ONTOLOGY_SEARCH_MAX_LIMIT = 1000
+
+# Page size cap of /tvbo/api/kg/filter
+_FILTER_MAX_LIMIT = 200
+
+# Max (type, id) pairs per /tvbo/api/kg/batch request
+_BATCH_MAX_ITEMS = 500
+
+# Largest delta served by /tvbo/api/kg/changes; beyond it clients resync
+_CHANGES_MAX_ITEMS = 5000
+
+# Bounds of /tvbo/api/kg/subgraph
+_SUBGRAPH_MAX_HOPS = 5
+_SUBGRAPH_MAX_NODES = 5000
+
+# Datamodel class schemas as (tvbo version, schemas, encoded body)
+_class_schemas = None
+_class_schemas_lock = threading.Lock()
+
+
+def _load_ontology_api():
+    """Shared read-only quadstore unless disabled with ``tvbo_shared_ontology = False``."""
+    if not str2bool(config.get('tvbo_shared_ontology', True)):
+        return get_direct_ontology_api()
+    from . import kg_quadstore
+    return kg_quadstore.open_ontology_api(os.path.join(config['data_dir'], 'tvbo'))
 
-# Thumbnail directory (static files in the addon)
-_THUMB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'src', 'img', 'thumbnails')
-_THUMB_URL = '/tvbo/static/src/img/thumbnails'
 
-# Report directory (pre-rendered markdown)
-_REPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'src', 'reports')
-_REPORT_URL = '/tvbo/static/src/reports'
+def get_ontology_api():
+    """Get the ontology API singleton, loading it once per process. Fails if unavailable."""
+    global _ontology_api, _ontology_version, _named_queries, _ontology_load
+    if _ontology_api is None:
+        with _ontology_lock:
+            if _ontology_api is None:
+                start = time.perf_counter()
+                api = _load_ontology_api()
+                _named_queries = kg_sparql.prepare_queries(api.world, NAMED_QUERIES)
+                _ontology_version += 1
+                _ontology_load = {
+                    "load_seconds": round(time.perf_counter() - start, 3),
+                    "loaded_at": time.time(),
+                    "quadstore": getattr(api, 'path', None),
+                }
+                _logger.info(f"Loaded ontology in {_ontology_load['load_seconds']}s (pid {os.getpid()})")
+                _ontology_api = api
+                threading.Thread(target=_build_adjacency_index, args=(api, _ontology_version),
+                                 name='tvbo-adjacency', daemon=True).start()
+    return _ontology_api
 
 
-def _thumbnail_url(category: str, name: str) -> str | None:
-    """Return the URL for a thumbnail if it exists on disk."""
-    png = os.path.join(_THUMB_DIR, category, f'{name}.png')
-    if os.path.isfile(png):
-        return f'{_THUMB_URL}/{category}/{name}.png'
-    return None
+def preload_ontology():
+    """Load the ontology in a background thread, so no request has to wait for it."""
+    def load():
+        try:
+            get_ontology_api()
+        except Exception:
+            _logger.exception("Ontology preload failed")
+    threading.Thread(target=load, name='tvbo-ontology-preload', daemon=True).start()
+
+
+def _resident_memory():
+    """Resident set size of this process in bytes, split into anonymous and file-backed pages (Linux only)."""
+    keys = {'VmRSS': 'rss_bytes', 'RssAnon': 'rss_anon_bytes', 'RssFile': 'rss_file_bytes'}
+    memory = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in keys:
+                    memory[keys[name]] = int(value.split()[0]) * 1024
+    except OSError:
+        pass
+    return memory
+
+
+def _file_size(path):
+    """Size of the file at ``path`` in bytes; None if there is none or it cannot be read."""
+    if not path:
+        return None
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
 
 
-def _report_url(category: str, name: str) -> str | None:
-    """Return the URL for a pre-rendered report if it exists on disk."""
-    md = os.path.join(_REPORT_DIR, category, f'{name}.md')
-    if os.path.isfile(md):
-        return f'{_REPORT_URL}/{category}/{name}.md'
-    return None
+def enrich_item(item, kg_type):
+    """``enrich_database_item`` memoized on the item's identity in the ontology."""
+    api = get_ontology_api()
+    key = (kg_type, item.get('name'), item.get('iri'), _ontology_version)
+    delta = _enrichment_cache.get(key)
+    if delta is None:
+        enriched = api.enrich_database_item(dict(item), kg_type)
+        delta = {k: v for k, v in enriched.items() if k not in item or item[k] != v}
+        _enrichment_cache.put(key, delta)
+    item.update(delta)
+    return item
 
 
-def get_ontology_api():
-    """Get DirectOntologyAPI singleton. Fails if unavailable."""
-    global _ontology_api
-    if _ontology_api is None:
-        _ontology_api = get_direct_ontology_api()
-    return _ontology_api
+def search_ontology(query, limit=50):
+    """``api.search`` memoized per normalized query and ontology version."""
+    api = get_ontology_api()
+    key = (' '.join(query.lower().split()), limit, _ontology_version)
+    results = _ontology_search_cache.get(key)
+    if results is None:
+        results = tuple(api.search(query, limit=limit))
+        _ontology_search_cache.put(key, results)
+    return results
+
+
+def get_concept_catalogue():
+    """Ordered, deduplicated concepts of the fixed KG concept types.
+
+    Computed once per ontology load; the returned tuple is shared and must
+    not be mutated.
+    """
+    global _concept_catalogue
+    get_ontology_api()
+    with _catalogue_lock:
+        if _concept_catalogue is None or _concept_catalogue[0] != _ontology_version:
+            results = []
+            seen = set()
+            for concept in _CONCEPT_TYPES:
+                for node in search_ontology(concept):
+                    storid = node.get('storid')
+                    if storid and storid not in seen:
+                        seen.add(storid)
+                        results.append(node)
+            _concept_catalogue = (_ontology_version, tuple(results))
+        return _concept_catalogue[1]
+
+
+def get_class_hierarchy():
+    """``api.get_class_hierarchy()``, computed once per ontology load. Must not be mutated."""
+    global _hierarchy
+    api = get_ontology_api()
+    with _hierarchy_lock:
+        if _hierarchy is None or _hierarchy[0] != _ontology_version:
+            _hierarchy = (_ontology_version, api.get_class_hierarchy())
+        return _hierarchy[1]
+
+
+def get_closure_index():
+    """Transitive closure of the is_a hierarchy, built once per ontology load."""
+    global _closure
+    hierarchy = get_class_hierarchy()
+    with _hierarchy_lock:
+        if _closure is None or _closure[0] != _ontology_version:
+            start = time.perf_counter()
+            _closure = (_ontology_version, ClosureIndex(hierarchy))
+            _logger.info(f"Built ontology closure index: {len(_closure[1].nodes)} nodes "
+                         f"in {time.perf_counter() - start:.2f}s")
+        return _closure[1]
+
+
+def _build_adjacency_index(api, version):
+    """Build the adjacency index of all class relationships of ontology ``version``.
+
+    Started by ``get_ontology_api`` on each load; requests never wait for it.
+    """
+    global _adjacency
+    try:
+        start = time.perf_counter()
+        nodes = [n['storid'] for n in get_class_hierarchy().get('nodes', []) if n.get('storid')]
+        links = []
+        for storid in nodes:
+            links.extend(api.get_relationships(storid).get('links', []))
+        _adjacency = (version, AdjacencyIndex(links, nodes))
+        _logger.info(f"Built ontology adjacency index: {len(nodes)} nodes, "
+                     f"{len(_adjacency[1].links)} links in {time.perf_counter() - start:.2f}s")
+    except Exception:
+        _logger.exception("Building the ontology adjacency index failed")
+
+
+def get_adjacency_index():
+    """Adjacency index of the loaded ontology, or None while it is being built."""
+    get_ontology_api()
+    adjacency = _adjacency
+    return adjacency[1] if adjacency is not None and adjacency[0] == _ontology_version else None
+
+
+def get_relationships_many(storids):
+    """Map each storid to its incident links.
+
+    Answered from the adjacency index; storids outside it (e.g. individuals),
+    or all of them until it is built, fall back to ``api.get_relationships``,
+    memoized per ontology version.
+    """
+    index = get_adjacency_index()
+    result = {}
+    for storid in storids:
+        if index is not None and storid in index:
+            result[storid] = index.incident_links(storid)
+            continue
+        key = (storid, _ontology_version)
+        links = _relationships_cache.get(key)
+        if links is None:
+            links = tuple(get_ontology_api().get_relationships(storid).get('links', []))
+            _relationships_cache.put(key, links)
+        result[storid] = list(links)
+    return result
 
 
 def json_response(data, status=200):
@@ -66,6 +298,67 @@ def json_response(data, status=200):
     )
 
 
+def _non_negative_int(value, name):
+    """Query param ``value`` as an int >= 0; ValueError naming ``name`` otherwise."""
+    value = str(value)
+    if not (value.isascii() and value.isdigit()):
+        raise ValueError(f"'{name}' must be a non-negative integer")
+    return int(value)
+
+
+def _node_key(value):
+    """Graph node key of a query param: an ontology storid (int) or a db_<type>_<id> key."""
+    return int(value) if value.isascii() and value.isdigit() else value
+
+
+def _ontology_id():
+    """Identity of the loaded ontology: its quadstore (keyed by the owl file), else the load count."""
+    get_ontology_api()
+    return _ontology_load.get('quadstore') or _ontology_version
+
+
+def _kg_validator(env, *args, **kw):
+    """Validator of routes built from the catalogue, its assets and the ontology."""
+    return kg_http.catalogue_validator(env, kg_assets.get_manifest().version, _ontology_id())
+
+
+def _related_validator(env, *args, kg_type=None, **kw):
+    """Validator of related items: the catalogue, and the build the stored neighbours come from."""
+    return kg_http.catalogue_validator(
+        env, kg_assets.get_manifest().version, _ontology_id(), env['tvbo.kg_related'].sudo().get_version(kg_type))
+
+
+def _ontology_validator(env, *args, **kw):
+    """Validator of routes built from the ontology alone."""
+    return kg_http.validator('ontology', _ontology_id())
+
+
+def _static_validator(env, *args, **kw):
+    """Validator of routes that only depend on the code (datamodel schemas)."""
+    return kg_http.validator('static')
+
+
+def _schema_cache_control(kw):
+    """Schemas are immutable under ``?v=<tvbo version>``, else revalidated hourly."""
+    return kg_http.versioned_cache_control(kw, tvbo_version(), 'public, max-age=3600')
+
+
+def ndjson_response(items, next_cursor=None):
+    """Stream ``items`` as newline-delimited JSON, encoding one item at a time.
+
+    ``items`` is consumed after the request cursor is closed, so it must not
+    touch the ORM.
+    """
+    headers = {'Access-Control-Allow-Origin': '*', 'Access-Control-Expose-Headers': 'X-Next-Cursor'}
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    return Response(
+        (json.dumps(item) + '\n' for item in items),
+        content_type='application/x-ndjson',
+        headers=headers,
+    )
+
+
 def _field_label(field_name):
     """Convert field_name to a human-readable label."""
     return field_name.replace('_', ' ').title()
@@ -115,18 +408,123 @@ def _introspect_field(field_name, field_info):
     return None
 
 
+def tvbo_version():
+    """Version of the installed tvbo package; the datamodel schemas only change with it."""
+    return tvbo.__version__
+
+
+def _cached_class_schemas():
+    """(schemas, encoded JSON body), introspected once per tvbo version."""
+    global _class_schemas
+    version = tvbo_version()
+    if _class_schemas is None or _class_schemas[0] != version:
+        with _class_schemas_lock:
+            if _class_schemas is None or _class_schemas[0] != version:
+                schemas = _introspect_class_schemas()
+                _class_schemas = (version, schemas, json.dumps(schemas).encode())
+    return _class_schemas[1], _class_schemas[2]
+
+
+def get_class_schemas():
+    """Schemas of the datamodel classes represented in the KG (shared, do not mutate)."""
+    return _cached_class_schemas()[0]
+
+
+def _introspect_class_schemas():
+    """Schemas for all datamodel classes represented in the KG.
+
+    Introspects Pydantic models (generated from tvbo_datamodel.yaml) to return
+    class names, descriptions, and filterable properties with types.
+    """
+    from tvbo.datamodel import tvbopydantic as dm
+
+    # Map KG type values to Pydantic classes — the only hardcoded part.
+    # Everything else is introspected from the schema.
+    type_class_map = {
+        'dynamics': dm.Dynamics,
+        'network': dm.Network,
+        'integrator': dm.Integrator,
+        'experiment': dm.SimulationExperiment,
+        'study': dm.SimulationStudy,
+        'coupling': dm.Coupling,
+    }
+
+    result = {}
+    for type_key, cls in type_class_map.items():
+        properties = {}
+        for field_name, field_info in cls.model_fields.items():
+            if field_name == 'linkml_meta':
+                continue
+            prop = _introspect_field(field_name, field_info)
+            if prop:
+                properties[field_name] = prop
+
+        # Use the class name as the label (not LinkML aliases, which may be deprecated)
+        class_label = cls.__name__
+
+        result[type_key] = {
+            'class_name': cls.__name__,
+            'label': class_label,
+            'description': (cls.__doc__ or '').strip(),
+            'properties': properties,
+        }
+    return result
+
+
 class KnowledgeGraphAPI(http.Controller):
     """Knowledge Graph API endpoints. Clean MVP."""
 
+    # ===================
+    # Health
+    # ===================
+
+    @http.route('/tvbo/api/kg/health', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    def health(self, **kw):
+        """Ontology load state, load time and resident memory of this worker."""
+        return json_response({
+            "pid": os.getpid(),
+            "ontology": {
+                "loaded": _ontology_api is not None,
+                "version": _ontology_version,
+                **_ontology_load,
+                "quadstore_bytes": _file_size(_ontology_load.get('quadstore')),
+            },
+            "memory": _resident_memory(),
+        })
+
+    @http.route('/tvbo/api/metrics', type='http', auth='public', methods=['GET'], csrf=False)
+    def metrics(self, **kw):
+        """Per-route request metrics of all workers, in Prometheus text format.
+
+        If the ``tvbo.metrics_token`` system parameter is set, requests must
+        send it as ``Authorization: Bearer <token>``; otherwise only internal
+        users get the metrics.
+        """
+        token = request.env['ir.config_parameter'].sudo().get_param('tvbo.metrics_token')
+        if token:
+            authorization = request.httprequest.headers.get('Authorization', '').encode()
+            allowed = hmac.compare_digest(authorization, f'Bearer {token}'.encode())
+        else:
+            allowed = request.env.user._is_internal()
+        if not allowed:
+            return Response('Unauthorized\n', status=401, content_type='text/plain')
+        return Response(
+            kg_metrics.render(kg_metrics.collect()),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
+
     # ===================
     # Schema
     # ===================
 
     @http.route('/tvbo/api/kg/schema', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_static_validator, _schema_cache_control)
     def get_schema(self, **kw):
         """Get browser schema configuration."""
         return json_response({
-            "searchableFields": ["name", "label", "title", "description", "abstract", "doi", "method", "definition", "symbol"],
+            "searchableFields": SEARCHABLE_FIELDS,
             "facets": [
                 {"field": "type", "label": "Class", "type": "string"},
             ],
@@ -134,286 +532,325 @@ class KnowledgeGraphAPI(http.Controller):
         })
 
     @http.route('/tvbo/api/kg/schema/classes', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_static_validator, _schema_cache_control)
     def get_class_schemas(self, **kw):
-        """Get schemas for all datamodel classes represented in the KG.
-
-        Introspects Pydantic models (generated from tvbo_datamodel.yaml) to return
-        class names, descriptions, and filterable properties with types.
-        """
-        from tvbo.datamodel import tvbopydantic as dm
-        from typing import get_origin, get_args, Union
-        from enum import Enum
-
-        # Map KG type values to Pydantic classes — the only hardcoded part.
-        # Everything else is introspected from the schema.
-        type_class_map = {
-            'dynamics': dm.Dynamics,
-            'network': dm.Network,
-            'integrator': dm.Integrator,
-            'experiment': dm.SimulationExperiment,
-            'study': dm.SimulationStudy,
-            'coupling': dm.Coupling,
-        }
-
-        result = {}
-        for type_key, cls in type_class_map.items():
-            properties = {}
-            for field_name, field_info in cls.model_fields.items():
-                if field_name == 'linkml_meta':
-                    continue
-                prop = _introspect_field(field_name, field_info)
-                if prop:
-                    properties[field_name] = prop
-
-            # Use the class name as the label (not LinkML aliases, which may be deprecated)
-            class_label = cls.__name__
-
-            result[type_key] = {
-                'class_name': cls.__name__,
-                'label': class_label,
-                'description': (cls.__doc__ or '').strip(),
-                'properties': properties,
-            }
-
-        return json_response(result)
+        """Get schemas for all datamodel classes represented in the KG."""
+        return Response(_cached_class_schemas()[1], content_type='application/json',
+                        headers={'Access-Control-Allow-Origin': '*'})
 
     # ===================
     # Main data endpoint
     # ===================
 
     @http.route('/tvbo/api/kg/data', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
     def get_all_data(self, **kw):
-        """Get all knowledge graph data."""
+        """Get all knowledge graph data.
+
+        Served from the materialized snapshot and revalidated against the
+        catalogue version; the catalogue is only re-serialized after a
+        tvbo.* record changed.
+
+        The full response carries the catalogue version in X-KG-Version, to
+        be passed as ``since`` to /tvbo/api/kg/changes.
+
+        Optional query params:
+          - limit: page size; returns {"items", "next_cursor", "total"}
+          - cursor: opaque cursor from a previous page's next_cursor
+          - format: 'ndjson' streams one item per line, type by type
+        """
         import traceback
+        # Cursor = "<catalogue version>.<offset>"; offsets are only
+        # meaningful within the snapshot they were issued for.
+        cursor = kw.get('cursor', '')
+        cursor_version, _, offset = cursor.partition('.')
+        try:
+            limit = _non_negative_int(kw.get('limit') or 0, 'limit')
+            offset = _non_negative_int(offset, 'cursor') if cursor else 0
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
         try:
             include_ontology = kw.get('include_ontology', 'true').lower() != 'false'
             ontology_query = kw.get('ontology_query', '')
+            ndjson = kw.get('format', 'json') == 'ndjson'
 
-            data = []
-            _logger.info("Fetching dynamics...")
-            data.extend(self._get_dynamics())
-            _logger.info(f"Got {len(data)} dynamics")
-            _logger.info("Fetching networks...")
-            data.extend(self._get_networks())
-            _logger.info(f"Total items: {len(data)}")
-            _logger.info("Fetching integrators...")
-            data.extend(self._get_integrators())
-            _logger.info(f"Total items: {len(data)}")
-            _logger.info("Fetching experiments...")
-            data.extend(self._get_experiments())
-            _logger.info(f"Total items: {len(data)}")
-            _logger.info("Fetching studies...")
-            data.extend(self._get_studies())
-            _logger.info(f"Total items: {len(data)}")
-            _logger.info("Fetching couplings...")
-            data.extend(self._get_couplings())
-            _logger.info(f"Total items: {len(data)}")
+            snapshot = self._snapshot()
 
-            if include_ontology:
-                _logger.info("Fetching ontology concepts...")
-                data.extend(self._get_ontology_concepts(ontology_query))
-                _logger.info(f"Total items with ontology: {len(data)}")
+            if not (ontology_query or limit or cursor or ndjson):
+                return Response(snapshot.body(include_ontology), content_type='application/json', headers={
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Expose-Headers': 'X-KG-Version',
+                    'X-KG-Version': str(snapshot.version),
+                })
 
-            return json_response(data)
+            sources = [snapshot.items]
+            if include_ontology:
+                sources.append(snapshot.concepts)
+            if ontology_query:
+                sources.append(self._search_ontology_concepts(ontology_query, exclude=snapshot.concept_storids))
+            total = sum(len(s) for s in sources)
+
+            if cursor and cursor_version != str(snapshot.version):
+                return json_response({"error": "Cursor expired: catalogue changed, restart without cursor"}, 409)
+            end = min(offset + limit, total) if limit else total
+            next_cursor = f'{snapshot.version}.{end}' if end < total else None
+            page = itertools.islice(itertools.chain(*sources), offset, end)
+
+            if ndjson:
+                return ndjson_response(page, next_cursor)
+            if not (limit or cursor):
+                return json_response(list(page))
+            return json_response({"items": list(page), "next_cursor": next_cursor, "total": total})
         except Exception as e:
             _logger.error(f"Error in get_all_data: {e}")
             _logger.error(traceback.format_exc())
             return json_response({"error": str(e), "traceback": traceback.format_exc()}, 500)
 
+    @http.route('/tvbo/api/kg/changes', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
+    def get_changes(self, **kw):
+        """Catalogue changes after version ``since``.
+
+        Returns {"since", "version", "resync", "updated", "deleted"}:
+        ``updated`` lists the created or changed items as in /kg/data,
+        ``deleted`` the removed ones as {"type", "id"}. Items whose embedded
+        records (EMBEDDED_FIELDS, e.g. a coupling's equations) changed count
+        as changed. Applying them to a copy taken at ``since`` brings it to
+        ``version`` (items may repeat across calls; apply them as upserts).
+        When ``resync`` is true, ``since`` is too old or unknown, an
+        embedded record was deleted, or the delta is too large: refetch
+        /tvbo/api/kg/data instead.
+        """
+        try:
+            since = int(kw['since'])
+        except (KeyError, ValueError):
+            return json_response({"error": "'since' must be a catalogue version"}, 400)
+
+        version, updated, deleted = request.env['tvbo.kg_catalogue'].sudo().get_changes(
+            since, list(KG_MODELS.values()),
+            {KG_MODELS[kg_type]: fields for kg_type, fields in EMBEDDED_FIELDS.items()},
+        )
+        changed = sum(len(ids) for ids in (updated or {}).values()) + sum(len(ids) for ids in (deleted or {}).values())
+        if updated is None or changed > _CHANGES_MAX_ITEMS:
+            return json_response({"since": since, "version": version, "resync": True})
+
+        items, removed = [], []
+        for kg_type, model in KG_MODELS.items():
+            records = request.env[model].sudo().browse(updated.get(model, [])).exists()
+            items.extend(self._serialize(kg_type, records))
+            removed.extend({"type": kg_type, "id": record_id} for record_id in sorted(deleted.get(model, ())))
+        return json_response({"since": since, "version": version, "resync": False, "updated": items, "deleted": removed})
+
+    def _get_database_items(self):
+        """Serialize every database item exposed in the KG."""
+        data = []
+        for kg_type in KG_MODELS:
+            data.extend(self._get_items(kg_type))
+        return data
+
+    def _snapshot(self):
+        return kg_snapshot.get_snapshot(request.env, self._get_database_items, get_concept_catalogue())
+
     # ===================
-    # Database serializers
+    # Search endpoint
     # ===================
 
-    def _get_dynamics(self):
-        records = request.env['tvbo.dynamics'].sudo().search([])
-        return [self._serialize_dynamics(r) for r in records]
-
-    def _serialize_dynamics(self, record):
-        result = PydanticDynamics(
-            name=record.name or 'Unknown',
-            label=record.label or None,
-            description=record.description or None,
-            source=record.source or None,
-            iri=record.iri or None,
-        ).model_dump(exclude_none=True)
-
-        result.update({
-            'id': record.id,
-            'type': 'dynamics',
-            'title': record.name or record.label or '',
-            'system_type': record.system_type.technical_name if record.system_type else '',
-        })
-
-        thumb = _thumbnail_url('models', record.name or '')
-        if thumb:
-            result['thumbnail'] = thumb
+    @http.route('/tvbo/api/kg/search', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
+    def search(self, **kw):
+        """Ranked full-text search with facet counts.
 
-        report = _report_url('models', record.name or '')
-        if report:
-            result['report_url'] = report
-
-        return get_ontology_api().enrich_database_item(result, 'dynamics')
+        Query params:
+          - q: free text; every term must match a word or word prefix
+          - limit, offset: paging (default 50, 0)
+          - type, <property>: facet filters, repeatable (OR within a field)
+        """
+        query = kw.get('q', '')
+        try:
+            limit = _non_negative_int(kw.get('limit', 50), 'limit')
+            offset = _non_negative_int(kw.get('offset', 0), 'offset')
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
+
+        schemas = get_class_schemas()
+        facet_fields = {t: list(s['properties']) for t, s in schemas.items()}
+        filterable = {'type'}.union(*facet_fields.values())
+        args = request.httprequest.args
+        filters = {f: set(args.getlist(f)) for f in args if f in filterable}
+
+        index = self._snapshot().derived('search', KGSearchIndex)
+        result = index.search(query, filters, facet_fields, limit=limit, offset=offset)
+        result['query'] = query
+        return json_response(result)
 
-    def _get_networks(self):
-        records = request.env['tvbo.network'].sudo().search([])
-        return [self._serialize_network(r) for r in records]
+    @http.route('/tvbo/api/kg/fulltext/<string:kg_type>', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
+    def fulltext_search(self, kg_type, **kw):
+        """Ranked full-text or fuzzy search, run in PostgreSQL.
+
+        kg_type: dynamics, study or literature.
+        Query params:
+          - q: query; web-search syntax ("quoted phrases", -exclusion, or) in fulltext mode
+          - mode: 'fulltext' (default, names/titles and descriptions/abstracts)
+            or 'fuzzy' (trigram similarity on name/label/title)
+          - limit, offset: paging (default 20, 0; limit at most 200)
+        """
+        model_name = _FULLTEXT_TYPES.get(kg_type)
+        if not model_name:
+            return json_response({"error": f"Unknown type: {kg_type}"}, 404)
+        query = kw.get('q', '').strip()
+        if not query:
+            return json_response({"error": "Missing 'q' parameter"}, 400)
+        mode = kw.get('mode', 'fulltext')
 
-    def _serialize_network(self, record):
-        result = PydanticNetwork(
-            label=record.label or None,
-            description=record.description or None,
-            number_of_nodes=record.number_of_nodes or record.number_of_regions or 1,
-        ).model_dump(exclude_none=True)
+        env = request.env
+        try:
+            limit = min(_non_negative_int(kw.get('limit', 20), 'limit'), 200)
+            offset = _non_negative_int(kw.get('offset', 0), 'offset')
+            total, ranked = env['tvbo.kg_fulltext'].sudo().search_ranked(model_name, query, mode, limit, offset)
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
+
+        records = env[model_name].sudo().browse([record_id for record_id, _ in ranked])
+        if kg_type == 'literature':
+            items = records.read(['title', 'doi', 'year', 'journal', 'authors', 'url', 'pubmed_url'], load=None)
+            for item in items:
+                item['type'] = 'literature'
+        else:
+            items = self._serialize(kg_type, records)
+        for item, (_, rank) in zip(items, ranked):
+            item['score'] = round(rank, 4)
 
-        result.update({
-            'id': record.id,
-            'type': 'network',
-            'name': record.label or f'Network {record.id}',
-            'title': record.label or f'Network {record.id}',
+        return json_response({
+            "query": query,
+            "mode": mode,
+            "results": items,
+            "total": total,
+            "limit": limit,
+            "offset": offset,
         })
 
-        # Try thumbnail by label
-        thumb = _thumbnail_url('networks', record.label or '')
-        if thumb:
-            result['thumbnail'] = thumb
-
-        return get_ontology_api().enrich_database_item(result, 'network')
-
-    def _get_integrators(self):
-        records = request.env['tvbo.integrator'].sudo().search([])
-        return [self._serialize_integrator(r) for r in records]
-
-    def _serialize_integrator(self, record):
-        result = PydanticIntegrator(
-            method=record.method or None,
-            step_size=record.step_size or 0.01220703125,
-            duration=record.duration or 1000.0,
-            time_scale=record.time_scale or 'ms',
-        ).model_dump(exclude_none=True)
-
-        result.update({
-            'id': record.id,
-            'type': 'integrator',
-            'name': record.method or f'Integrator {record.id}',
-            'title': record.method or f'Integrator {record.id}',
-            'description': f"Method: {record.method}, Step: {record.step_size}, Duration: {record.duration}",
-        })
+    @http.route('/tvbo/api/kg/filter/<string:kg_type>', type='http', auth='public', methods=['GET', 'POST'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
+    def filter_items(self, kg_type, **kw):
+        """Items of one type matching a property filter, run in PostgreSQL.
+
+        The filter (syntax in kg_filter) is JSON, given as `filter=` (GET)
+        or as a body `{"filter": {...}}` (POST). Properties are those of
+        /tvbo/api/kg/schema/classes for the type. Example, continuous-time
+        dynamics with more than 4 state variables:
+            {"system_type": "continuous", "state_variables": {"count": {"gt": 4}}}
+        Query params:
+          - order: property to sort by, optionally followed by ' desc' (default: id)
+          - limit, offset: paging (default 50, 0; limit at most 200)
+        """
+        model_name = KG_MODELS.get(kg_type)
+        if not model_name:
+            return json_response({"error": f"Unknown type: {kg_type}"}, 404)
+        try:
+            if request.httprequest.method == 'POST':
+                spec = json.loads(request.httprequest.data or b'{}').get('filter')
+            else:
+                spec = json.loads(kw['filter']) if kw.get('filter') else None
+            limit = min(_non_negative_int(kw.get('limit', 50), 'limit'), _FILTER_MAX_LIMIT)
+            offset = _non_negative_int(kw.get('offset', 0), 'offset')
+        except (AttributeError, ValueError, RecursionError) as e:
+            return json_response({"error": f"Invalid request: {e}"}, 400)
+
+        model = request.env[model_name].sudo()
+        schema = get_class_schemas()[kg_type]
+        try:
+            domain = kg_filter.FilterCompiler(model, schema).compile(spec) if spec is not None else []
+            order = kg_filter.compile_order(model, schema, kw.get('order'))
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
 
-        report = _report_url('integrators', record.method or '')
-        if report:
-            result['report_url'] = report
-
-        return get_ontology_api().enrich_database_item(result, 'integrator')
-
-    def _get_experiments(self):
-        records = request.env['tvbo.simulation_experiment'].sudo().search([])
-        return [self._serialize_experiment(r) for r in records]
-
-    def _serialize_experiment(self, record):
-        result = PydanticSimulationExperiment(
-            id=str(record.id),
-            label=record.label or None,
-            description=record.description or None,
-        ).model_dump(exclude_none=True)
-
-        result.update({
-            'id': record.id,
-            'type': 'experiment',
-            'name': record.label or f'Experiment {record.id}',
-            'title': record.label or f'Experiment {record.id}',
-            'abstract': record.description or '',
+        total = model.search_count(domain)
+        records = model.search(domain, order=order, limit=limit, offset=offset)
+        return json_response({
+            "type": kg_type,
+            "filter": spec,
+            "results": self._serialize(kg_type, records),
+            "total": total,
+            "limit": limit,
+            "offset": offset,
         })
 
-        return get_ontology_api().enrich_database_item(result, 'experiment')
-
-    def _get_studies(self):
-        records = request.env['tvbo.simulation_study'].sudo().search([])
-        return [self._serialize_study(r) for r in records]
-
-    def _serialize_study(self, record):
-        result = PydanticSimulationStudy(
-            label=record.label or None,
-            description=record.description or None,
-            doi=record.doi or None,
-            title=record.title or None,
-        ).model_dump(exclude_none=True)
-
-        result.update({
-            'id': record.id,
-            'type': 'study',
-            'name': record.title or record.label or f'Study {record.id}',
-            'title': record.title or record.label or f'Study {record.id}',
-            'abstract': record.description or '',
-            'year': str(record.year) if record.year else '',
-            'doi': record.doi or '',
-        })
+    @http.route('/tvbo/api/kg/suggest', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
+    def suggest(self, **kw):
+        """Typeahead over names, labels, symbols and methods of KG items and ontology entities.
 
-        return get_ontology_api().enrich_database_item(result, 'study')
-
-    def _get_couplings(self):
-        records = request.env['tvbo.coupling'].sudo().search([])
-        return [self._serialize_coupling(r) for r in records]
-
-    def _serialize_coupling(self, record):
-        result = PydanticCoupling(
-            name=record.name or 'Linear',
-            label=record.label or None,
-            delayed=record.delayed,
-            sparse=record.sparse,
-        ).model_dump(exclude_none=True)
-
-        # Build equation display from pre/post expressions
-        eq_parts = []
-        if record.pre_expression and record.pre_expression.righthandside:
-            eq_parts.append(f'pre(x_j) = {record.pre_expression.righthandside}')
-        if record.post_expression and record.post_expression.righthandside:
-            eq_parts.append(f'post(gx) = {record.post_expression.righthandside}')
-
-        result.update({
-            'id': record.id,
-            'type': 'coupling',
-            'title': record.name or record.label or f'Coupling {record.id}',
-            'description': record.coupling_function.definition if record.coupling_function else '',
-            'equation': ' ;  '.join(eq_parts) if eq_parts else '',
-        })
+        Query params:
+          - q: prefix of any word in the value
+          - limit: number of suggestions (default 10, at most 20)
+        """
+        query = kw.get('q', '').strip()
+        try:
+            limit = min(_non_negative_int(kw.get('limit', 10), 'limit'), TOP_K)
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
+        if not query:
+            return json_response({"query": query, "suggestions": []})
+
+        index = self._snapshot().derived('suggest', lambda snapshot, previous: SuggestIndex(
+            itertools.chain(snapshot.documents(), ((n['storid'], n) for n in get_class_hierarchy().get('nodes', []))),
+            previous,
+        ))
+        suggestions = []
+        for text, key, item in index.suggest(query, limit):
+            suggestion = {"text": text, "key": key, "type": item.get('type')}
+            if isinstance(key, str):
+                suggestion['id'] = item['id']
+            else:
+                suggestion['storid'] = key
+            suggestions.append(suggestion)
+        return json_response({"query": query, "suggestions": suggestions})
+
+    # ===================
+    # Database serializers
+    # ===================
 
-        thumb = _thumbnail_url('coupling_functions', record.name or '')
-        if thumb:
-            result['thumbnail'] = thumb
+    def _serialize(self, kg_type, records):
+        """Bulk-serialize ``records`` and enrich each item with ontology links."""
+        return [enrich_item(item, kg_type) for item in SERIALIZERS[kg_type](records)]
 
-        report = _report_url('coupling_functions', record.name or '')
-        if report:
-            result['report_url'] = report
+    def _details(self, kg_type, records):
+        """Serialized ``records`` with their detail fields, in bulk."""
+        items = self._serialize(kg_type, records)
+        DETAILS[kg_type](records, items)
+        return items
 
-        return get_ontology_api().enrich_database_item(result, 'coupling')
+    def _get_items(self, kg_type):
+        records = request.env[KG_MODELS[kg_type]].sudo().search([])
+        return self._serialize(kg_type, records)
 
     # ===================
     # Ontology concepts
     # ===================
 
-    def _get_ontology_concepts(self, query=''):
-        api = get_ontology_api()
-        concept_types = ['Model', 'NeuralMassModel', 'Coupling', 'IntegrationMethod',
-                         'StateVariable', 'Parameter', 'BrainRegion', 'Parcellation',
-                         'Tractogram', 'Monitor', 'Noise']
+    def _search_ontology_concepts(self, query, exclude=()):
+        """Free-text ontology lookup, skipping storids already in ``exclude``.
 
+        Comma-separated terms are answered together and merged in order.
+        """
         results = []
-        seen = set()
-
-        for concept in concept_types:
-            for node in api.search(concept, limit=50):
-                storid = node.get('storid')
-                if storid and storid not in seen:
-                    seen.add(storid)
-                    results.append(node)
-
-        if query:
-            for node in api.search(query, limit=50):
+        seen = set(exclude)
+        for term in query.split(','):
+            if not term.strip():
+                continue
+            for node in search_ontology(term):
                 storid = node.get('storid')
                 if storid and storid not in seen:
                     seen.add(storid)
                     results.append(node)
-
         return results
 
     # ===================
@@ -421,118 +858,196 @@ class KnowledgeGraphAPI(http.Controller):
     # ===================
 
     @http.route('/tvbo/api/kg/dynamics/<int:record_id>', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
     def get_dynamics_detail(self, record_id, **kw):
-        record = request.env['tvbo.dynamics'].sudo().browse(record_id)
+        record = request.env[KG_MODELS['dynamics']].sudo().browse(record_id)
         if not record.exists():
             return json_response({"error": "Not found"}, 404)
 
-        data = self._serialize_dynamics(record)
-        data['parameters'] = [{
-            "name": p.name, "label": p.label, "symbol": p.symbol or '',
-            "value": p.value, "description": p.description or ''
-        } for p in record.parameters]
-        data['state_variables'] = [{
-            "name": sv.name, "label": sv.label, "symbol": sv.symbol or '',
-            "description": sv.description or '',
-            "equation": {"label": sv.equation.label, "definition": sv.equation.definition} if sv.equation else None
-        } for sv in record.state_variables]
-
-        return json_response(data)
+        return json_response(self._details('dynamics', record)[0])
 
     @http.route('/tvbo/api/kg/network/<int:record_id>', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
     def get_network_detail(self, record_id, **kw):
-        record = request.env['tvbo.network'].sudo().browse(record_id)
+        record = request.env[KG_MODELS['network']].sudo().browse(record_id)
         if not record.exists():
             return json_response({"error": "Not found"}, 404)
 
-        data = self._serialize_network(record)
-        if record.parcellation:
-            data['parcellation'] = {"label": record.parcellation.label, "data_source": record.parcellation.data_source}
-
-        return json_response(data)
+        return json_response(self._details('network', record)[0])
 
     @http.route('/tvbo/api/kg/integrator/<int:record_id>', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
     def get_integrator_detail(self, record_id, **kw):
-        record = request.env['tvbo.integrator'].sudo().browse(record_id)
+        record = request.env[KG_MODELS['integrator']].sudo().browse(record_id)
         if not record.exists():
             return json_response({"error": "Not found"}, 404)
 
-        data = self._serialize_integrator(record)
-        data['parameters'] = [{
-            "name": p.name, "label": p.label, "symbol": p.symbol or '',
-            "value": p.value, "description": p.description or ''
-        } for p in record.parameters]
-
-        return json_response(data)
+        return json_response(self._details('integrator', record)[0])
 
     @http.route('/tvbo/api/kg/coupling/<int:record_id>', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
     def get_coupling_detail(self, record_id, **kw):
-        record = request.env['tvbo.coupling'].sudo().browse(record_id)
+        record = request.env[KG_MODELS['coupling']].sudo().browse(record_id)
         if not record.exists():
             return json_response({"error": "Not found"}, 404)
 
-        data = self._serialize_coupling(record)
-        if record.coupling_function:
-            data['coupling_function'] = {"label": record.coupling_function.label, "definition": record.coupling_function.definition}
-        data['parameters'] = [{
-            "name": p.name, "label": p.label, "symbol": p.symbol or '',
-            "value": p.value, "description": p.description or ''
-        } for p in record.parameters]
-
-        return json_response(data)
+        return json_response(self._details('coupling', record)[0])
 
     @http.route('/tvbo/api/kg/experiment/<int:record_id>', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
     def get_experiment_detail(self, record_id, **kw):
-        record = request.env['tvbo.simulation_experiment'].sudo().browse(record_id)
+        record = request.env[KG_MODELS['experiment']].sudo().browse(record_id)
         if not record.exists():
             return json_response({"error": "Not found"}, 404)
 
-        data = self._serialize_experiment(record)
-        if record.dynamics:
-            data['dynamics'] = {"id": record.dynamics.id, "name": record.dynamics.name}
-        if record.integration:
-            data['integration'] = {"id": record.integration.id, "method": record.integration.method}
-        if record.connectivity:
-            data['connectivity'] = {"id": record.connectivity.id, "label": record.connectivity.label}
-
-        return json_response(data)
+        return json_response(self._details('experiment', record)[0])
 
     @http.route('/tvbo/api/kg/study/<int:record_id>', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
     def get_study_detail(self, record_id, **kw):
-        record = request.env['tvbo.simulation_study'].sudo().browse(record_id)
+        record = request.env[KG_MODELS['study']].sudo().browse(record_id)
         if not record.exists():
             return json_response({"error": "Not found"}, 404)
 
-        return json_response(self._serialize_study(record))
+        return json_response(self._details('study', record)[0])
+
+    @http.route('/tvbo/api/kg/batch', type='http', auth='public', methods=['GET', 'POST'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
+    def get_batch(self, **kw):
+        """Details of many records in one response.
+
+        Items are given as `items=dynamics:1,network:2` (GET) or as a JSON
+        body `{"items": [["dynamics", 1], ["network", 2]]}` (POST). Each
+        type's records are fetched and serialized in bulk; the response lists
+        the details in request order, with null for records that do not exist.
+        """
+        try:
+            if request.httprequest.method == 'POST':
+                pairs = json.loads(request.httprequest.data or b'{}').get('items', [])
+            else:
+                pairs = [item.split(':', 1) for item in kw.get('items', '').split(',') if item]
+            pairs = [(kg_type, int(record_id)) for kg_type, record_id in pairs]
+            if not all(isinstance(kg_type, str) for kg_type, _ in pairs):
+                raise TypeError("types must be strings")
+        except (AttributeError, TypeError, ValueError):
+            return json_response({"error": "items must be (type, id) pairs"}, 400)
+        if not pairs:
+            return json_response({"error": "Missing 'items' parameter"}, 400)
+        if len(pairs) > _BATCH_MAX_ITEMS:
+            return json_response({"error": f"At most {_BATCH_MAX_ITEMS} items per batch"}, 400)
+        unknown = sorted({kg_type for kg_type, _ in pairs} - KG_MODELS.keys())
+        if unknown:
+            return json_response({"error": f"Unknown types: {', '.join(unknown)}"}, 400)
+
+        found = {}
+        for kg_type in dict.fromkeys(kg_type for kg_type, _ in pairs):
+            ids = list(dict.fromkeys(record_id for t, record_id in pairs if t == kg_type))
+            records = request.env[KG_MODELS[kg_type]].sudo().browse(ids).exists()
+            for record, item in zip(records, self._details(kg_type, records)):
+                found[(kg_type, record.id)] = item
+
+        return json_response({
+            "items": [found.get(pair) for pair in pairs],
+            "missing": [{"type": t, "id": i} for t, i in pairs if (t, i) not in found],
+        })
+
+    # ===================
+    # Related items
+    # ===================
+
+    @http.route('/tvbo/api/kg/<string:kg_type>/<int:record_id>/related', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_related_validator)
+    def get_related(self, kg_type, record_id, **kw):
+        """Items of the same type with the most similar structure.
+
+        kg_type: dynamics, coupling or experiment. ``score`` estimates the
+        Jaccard similarity of the items' features (kg_related.FEATURES):
+        parameter names, state variable symbols, equation tokens and system
+        type for dynamics; dynamics, coupling and network for experiments.
+        Neighbours are read from the table the ``tvbo.kg_related`` job
+        fills after each catalogue change, so items changed since its last
+        run still have their previous neighbours.
+        Query params:
+          - limit: number of related items (default 10, at most 20)
+        """
+        if kg_type not in kg_related.RELATED_MODELS:
+            return json_response({"error": f"Unknown type: {kg_type}"}, 404)
+        try:
+            limit = min(_non_negative_int(kw.get('limit', 10), 'limit'), kg_related.TOP_K)
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
+
+        snapshot = self._snapshot()
+        if snapshot.item(kg_type, record_id) is None:
+            return json_response({"error": "Not found"}, 404)
+        related = []
+        for related_id, score in request.env['tvbo.kg_related'].sudo().related(kg_type, record_id, limit):
+            item = snapshot.item(kg_type, related_id)
+            if item is not None:
+                related.append({**item, "score": score})
+        return json_response({"type": kg_type, "id": record_id, "related": related})
+
+    @http.route('/tvbo/api/kg/asset/<string:kind>/<string:category>/<string:digest>/<string:filename>',
+                type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    def get_asset(self, kind, category, digest, filename, **kw):
+        """Serve a thumbnail or report under its content-hashed URL, cached forever."""
+        manifest = kg_assets.get_manifest()
+        name = filename.rpartition('.')[0]
+        current = manifest.url(kind, category, name)
+        if not current:
+            return json_response({"error": "Not found"}, 404)
+        if digest != manifest.digests[(kind, category, name)]:
+            return request.redirect(current, code=302, local=True)
+        return http.Stream.from_path(manifest.path(kind, category, name)).get_response(immutable=True)
 
     # ===================
     # Ontology endpoints
     # ===================
 
     @http.route('/tvbo/api/kg/ontology/search', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_ontology_validator, 'public, max-age=300')
     def ontology_search(self, **kw):
-        """Search ontology concepts."""
+        """Search ontology concepts.
+
+        Optional query params:
+          - limit: max results (default 100, at most 1000)
+          - graph_size: how many top results get graph context (default 10)
+        """
         query = kw.get('q', '')
-        limit = int(kw.get('limit', 100))
+        try:
+            limit = min(_non_negative_int(kw.get('limit', 100), 'limit'), _ONTOLOGY_SEARCH_MAX_LIMIT)
+            graph_size = _non_negative_int(kw.get('graph_size', 10), 'graph_size')
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
 
         if not query:
             return json_response({"error": "Missing 'q' parameter"}, 400)
 
-        api = get_ontology_api()
-        results = api.search(query, limit=limit)
+        results = list(search_ontology(query, limit=limit))
 
-        # Build graph with relationships
+        # Build graph with relationships among the results
         nodes = results
-        links = []
         seen_storids = {n.get('storid') for n in nodes if n.get('storid')}
+        sources = [n['storid'] for n in results[:graph_size] if n.get('storid')]
 
-        for node in results[:10]:
-            storid = node.get('storid')
-            if storid:
-                rels = api.get_relationships(storid)
-                for link in rels.get('links', []):
-                    if link.get('source') in seen_storids and link.get('target') in seen_storids:
-                        links.append(link)
+        links = []
+        seen_links = set()
+        for rels in get_relationships_many(sources).values():
+            for link in rels:
+                key = link_key(link)
+                if key not in seen_links and link.get('source') in seen_storids and link.get('target') in seen_storids:
+                    seen_links.add(key)
+                    links.append(link)
 
         return json_response({
             "results": results,
@@ -541,6 +1056,8 @@ class KnowledgeGraphAPI(http.Controller):
         })
 
     @http.route('/tvbo/api/kg/ontology/node/<int:node_id>', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_ontology_validator, 'public, max-age=300')
     def ontology_node_detail(self, node_id, **kw):
         """Get ontology node by storid."""
         api = get_ontology_api()
@@ -553,21 +1070,79 @@ class KnowledgeGraphAPI(http.Controller):
         return json_response(node_data)
 
     @http.route('/tvbo/api/kg/ontology/node/<int:node_id>/children', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_ontology_validator, 'public, max-age=300')
     def ontology_node_children(self, node_id, **kw):
         """Get children of ontology node."""
         return json_response(get_ontology_api().get_children(node_id))
 
     @http.route('/tvbo/api/kg/ontology/node/<int:node_id>/parents', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_ontology_validator, 'public, max-age=300')
     def ontology_node_parents(self, node_id, **kw):
         """Get parents of ontology node."""
         return json_response(get_ontology_api().get_parents(node_id))
 
+    @http.route('/tvbo/api/kg/ontology/node/<int:node_id>/lineage', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_ontology_validator, 'public, max-age=300')
+    def ontology_node_lineage(self, node_id, **kw):
+        """Ontology node and all its is_a ancestors, with their distance."""
+        closure = get_closure_index()
+        if node_id not in closure:
+            return json_response({"error": "Node not found"}, 404)
+        return json_response(closure.lineage(node_id))
+
+    @http.route('/tvbo/api/kg/ontology/node/<int:node_id>/subtree', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_ontology_validator, 'public, max-age=300')
+    def ontology_node_subtree(self, node_id, **kw):
+        """Ontology node and all its is_a descendants, nearest first.
+
+        Optional query params:
+          - max_nodes: keep at most this many descendants
+        """
+        closure = get_closure_index()
+        if node_id not in closure:
+            return json_response({"error": "Node not found"}, 404)
+        try:
+            max_nodes = _non_negative_int(kw['max_nodes'], 'max_nodes') if kw.get('max_nodes') else None
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
+        return json_response(closure.subtree(node_id, max_nodes))
+
+    @http.route('/tvbo/api/kg/ontology/is-subclass-of', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_ontology_validator, 'public, max-age=300')
+    def ontology_is_subclass_of(self, **kw):
+        """Whether `child` is an is_a descendant of `parent` (both storids)."""
+        if not kw.get('child') or not kw.get('parent'):
+            return json_response({"error": "Missing 'child' or 'parent' parameter"}, 400)
+        try:
+            child, parent = _non_negative_int(kw['child'], 'child'), _non_negative_int(kw['parent'], 'parent')
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
+        closure = get_closure_index()
+        for storid in (child, parent):
+            if storid not in closure:
+                return json_response({"error": f"Node {storid} not found"}, 404)
+        return json_response({
+            "child": child,
+            "parent": parent,
+            "is_subclass_of": closure.is_subclass_of(child, parent),
+            "distance": closure.ancestors[child].get(parent),
+        })
+
     @http.route('/tvbo/api/kg/ontology/graph', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_ontology_validator, 'public, max-age=300')
     def ontology_graph(self, **kw):
         """Get ontology class hierarchy."""
-        return json_response(get_ontology_api().get_class_hierarchy())
+        return json_response(get_class_hierarchy())
 
     @http.route('/tvbo/api/kg/ontology/by-iri', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_ontology_validator, 'public, max-age=300')
     def ontology_by_iri(self, **kw):
         """Get ontology node by IRI."""
         iri = kw.get('iri', '')
@@ -583,6 +1158,8 @@ class KnowledgeGraphAPI(http.Controller):
         return json_response(node_data)
 
     @http.route('/tvbo/api/kg/ontology/schema-link/<string:schema_class>', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_ontology_validator, 'public, max-age=300')
     def ontology_schema_link(self, schema_class, **kw):
         """Get ontology concept linked to schema class."""
         api = get_ontology_api()
@@ -597,8 +1174,18 @@ class KnowledgeGraphAPI(http.Controller):
         return json_response(node_data)
 
     @http.route('/tvbo/api/kg/ontology/sparql', type='http', auth='public', methods=['GET', 'POST'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_ontology_validator, 'public, max-age=300')
     def ontology_sparql(self, **kw):
-        """Execute SPARQL query."""
+        """Execute SPARQL query.
+
+        Query params:
+          - query: SPARQL query (or the POST body)
+          - limit: rows per page, capped by ``tvbo.sparql_max_limit`` (default 1000)
+          - offset: rows to skip
+        Execution is aborted with 504 after ``tvbo.sparql_timeout`` seconds
+        (default 10). Pages are cached for 5 minutes per normalized query.
+        """
         if request.httprequest.method == 'POST':
             query_string = request.httprequest.data.decode('utf-8')
         else:
@@ -607,105 +1194,183 @@ class KnowledgeGraphAPI(http.Controller):
         if not query_string:
             return json_response({"error": "Missing 'query' parameter"}, 400)
 
-        api = get_ontology_api()
-        results = api.sparql(query_string, flatten=False)
-
-        serialized = []
-        for row in results:
-            row_data = []
-            for item in row:
-                if hasattr(item, 'iri'):
-                    label = getattr(item, 'label', [item.name])[0] if hasattr(item, 'label') else item.name
-                    row_data.append({"iri": item.iri, "label": label})
-                else:
-                    row_data.append(str(item) if item is not None else None)
-            serialized.append(row_data)
+        return self._sparql_page(get_ontology_api(), query_string, (), kg_sparql.normalize_query(query_string), kw)
 
-        return json_response({"results": serialized, "count": len(serialized)})
+    def _sparql_page(self, api, query, params, cache_key, kw):
+        """Run (or answer from cache) one page of a SPARQL query as a streamed response."""
+        config = request.env['ir.config_parameter'].sudo()
+        timeout = float(config.get_param('tvbo.sparql_timeout', _SPARQL_TIMEOUT))
+        max_limit = int(config.get_param('tvbo.sparql_max_limit', _SPARQL_MAX_LIMIT))
+        try:
+            limit = min(_non_negative_int(kw.get('limit') or max_limit, 'limit'), max_limit)
+            offset = _non_negative_int(kw.get('offset') or 0, 'offset')
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
+        if limit < 1:
+            return json_response({"error": "'limit' must be positive"}, 400)
+
+        key = (cache_key, offset, limit, _ontology_version)
+        page = _sparql_cache.get(key)
+        if page is None:
+            try:
+                page = kg_sparql.run_query(api.world, query, offset, limit, timeout, params)
+            except kg_sparql.QueryTimeout:
+                _logger.warning(f"SPARQL query aborted after {timeout}s: {str(cache_key)[:200]}")
+                return json_response({"error": f"Query exceeded the time budget of {timeout}s"}, 504)
+            _sparql_cache.put(key, page)
+
+        rows, has_more = page
+        return Response(
+            kg_sparql.page_body(rows, offset, limit, has_more),
+            content_type='application/json',
+            status=200,
+            headers={'Access-Control-Allow-Origin': '*'}
+        )
+
+    @http.route('/tvbo/api/kg/ontology/queries', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_ontology_validator, 'public, max-age=300')
+    def ontology_named_queries(self, **kw):
+        """List the named SPARQL queries and their parameters."""
+        get_ontology_api()
+        return json_response({"queries": [q.describe() for q in _named_queries.values()]})
+
+    @http.route('/tvbo/api/kg/ontology/sparql/<string:name>', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_ontology_validator, 'public, max-age=300')
+    def ontology_named_sparql(self, name, **kw):
+        """Execute a named SPARQL query with its parameters bound from the query string.
+
+        Paging, time budget and caching as for /tvbo/api/kg/ontology/sparql.
+        """
+        api = get_ontology_api()
+        named = _named_queries.get(name)
+        if named is None:
+            return json_response({"error": f"Unknown query: {name}"}, 404)
+        try:
+            params, binding = named.bind(api.world, kw)
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
+        except LookupError as e:
+            return json_response({"error": str(e)}, 404)
+        return self._sparql_page(api, named, params, (name, binding), kw)
 
     # ===================
     # Graph visualization endpoint
     # ===================
 
+    def _graph(self):
+        """KGGraph of the current snapshot."""
+        return self._snapshot().derived(
+            'graph', lambda snapshot, previous: KGGraph(get_class_hierarchy(), snapshot.items))
+
     @http.route('/tvbo/api/kg/graph', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
     def get_knowledge_graph(self, **kw):
         """Get full knowledge graph: ontology + database items with relationships.
 
+        Nodes carry their degree and PageRank, precomputed once per KG snapshot.
+
         Optional query params:
-          - limit: max ontology classes to include (default: all)
+          - limit: keep only the `limit` most central ontology classes (plus all database items)
+          - lod: level of detail, keep only the `lod` most central nodes overall
+          - focus: storid or db_<type>_<id> whose direct neighbourhood is added
           - db_only: if 'true', only include database items, not full ontology
+          - format: 'json' (default), 'columnar' (node table + link index arrays
+            as JSON) or 'msgpack' (columnar, link arrays as int32 LE buffers)
+        Links are restricted to those between returned nodes whenever one of
+        these params is given.
         """
-        api = get_ontology_api()
+        fmt = kw.get('format', 'json')
+        if fmt not in ('json', 'columnar', 'msgpack'):
+            return json_response({"error": f"Unknown format: {fmt}"}, status=400)
+        if fmt == 'msgpack' and msgpack is None:
+            return json_response({"error": "msgpack format not available"}, status=400)
+
         db_only = kw.get('db_only', 'false').lower() == 'true'
-        limit = int(kw.get('limit', 0)) if kw.get('limit') else 0
+        try:
+            limit = _non_negative_int(kw.get('limit') or 0, 'limit')
+            lod = _non_negative_int(kw.get('lod') or 0, 'lod')
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
+        focus = kw.get('focus', '')
 
-        nodes = []
-        links = []
-
-        # Get ontology class hierarchy (unless db_only)
-        if not db_only:
-            hierarchy = api.get_class_hierarchy()
-            nodes = hierarchy.get('nodes', [])
-            links = hierarchy.get('links', [])
-
-            # Apply limit if specified
-            if limit > 0 and len(nodes) > limit:
-                nodes = nodes[:limit]
-                # Filter links to only include nodes in our limited set
-                node_ids = {n.get('storid') for n in nodes}
-                links = [l for l in links if l.get('source') in node_ids and l.get('target') in node_ids]
-
-        # Add database items as nodes linked to their ontology classes
-        db_items = []
-        db_items.extend(self._get_dynamics())
-        db_items.extend(self._get_networks())
-        db_items.extend(self._get_integrators())
-        db_items.extend(self._get_experiments())
-        db_items.extend(self._get_studies())
-        db_items.extend(self._get_couplings())
-
-        # Map database items to nodes and create links to ontology
-        onto_storid_map = {n['storid']: n for n in nodes if n.get('storid')}
-
-        for item in db_items:
-            node_id = f"db_{item['type']}_{item['id']}"
-            node = {
-                'id': node_id,
-                'storid': node_id,
-                'label': item.get('name') or item.get('label') or item.get('title', ''),
-                'type': 'instance',
-                'db_type': item['type'],
-                'title': item.get('title', ''),
-                'iri': item.get('iri', ''),
-            }
-            nodes.append(node)
-
-            # Link to ontology class if enriched (check ontology_class.storid or ontology_instance.storid)
-            onto_class = item.get('ontology_class')
-            onto_instance = item.get('ontology_instance')
-
-            # Try to link to specific instance first, then to class
-            target_storid = None
-            if onto_instance and onto_instance.get('storid'):
-                target_storid = onto_instance['storid']
-            elif onto_class and onto_class.get('storid'):
-                target_storid = onto_class['storid']
-
-            if target_storid and target_storid in onto_storid_map:
-                links.append({
-                    'source': node_id,
-                    'target': target_storid,
-                    'type': 'instance_of',
-                    'label': 'instance of',
-                })
+        graph = self._graph()
 
+        if not (db_only or limit or lod or focus):
+            nodes, links = graph.nodes, graph.links
+        else:
+            instances = range(graph.ontology_count, len(graph.nodes))
+            if db_only:
+                selected = set(instances)
+            elif lod:
+                selected = set(graph.top(lod))
+            elif limit:
+                selected = set(graph.top(limit, ontology_only=True)).union(instances)
+            else:
+                selected = set()
+            if focus:
+                selected |= graph.neighbourhood(_node_key(focus))
+            nodes, links = graph.subgraph(selected)
+
+        instance_count = sum(1 for n in nodes if n.get('type') == 'instance')
+        stats = {
+            "ontology_classes": len(nodes) - instance_count,
+            "database_items": instance_count,
+            "total_nodes": len(nodes),
+            "total_links": len(links),
+        }
+        if fmt == 'json':
+            return json_response({"nodes": nodes, "links": links, "stats": stats})
+
+        payload = encode_columnar(nodes, links, typed_links=fmt == 'msgpack')
+        payload['stats'] = stats
+        if fmt == 'columnar':
+            return json_response(payload)
+        return Response(
+            msgpack.packb(payload, use_bin_type=True),
+            content_type='application/msgpack',
+            status=200,
+            headers={'Access-Control-Allow-Origin': '*'}
+        )
+
+    @http.route('/tvbo/api/kg/subgraph', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_kg_validator)
+    def get_subgraph(self, **kw):
+        """Neighbourhood of one node: breadth-first over ontology and database nodes.
+
+        Query params:
+          - root: storid or db_<type>_<id> (required)
+          - hops: search depth (default 1, at most 5)
+          - max_nodes: stop once this many nodes are collected (default 200, at most 5000)
+        """
+        root = kw.get('root', '')
+        if not root:
+            return json_response({"error": "Missing 'root' parameter"}, 400)
+        try:
+            hops = min(_non_negative_int(kw.get('hops', 1), 'hops'), _SUBGRAPH_MAX_HOPS)
+            max_nodes = min(_non_negative_int(kw.get('max_nodes', 200), 'max_nodes'), _SUBGRAPH_MAX_NODES)
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
+        if max_nodes < 1:
+            return json_response({"error": "'max_nodes' must be positive"}, 400)
+        root = _node_key(root)
+
+        graph = self._graph()
+        selected, truncated = graph.bfs(root, hops, max_nodes)
+        if selected is None:
+            return json_response({"error": f"Node {root} not found"}, 404)
+        nodes, links = graph.subgraph(selected)
         return json_response({
+            "root": root,
             "nodes": nodes,
             "links": links,
             "stats": {
-                "ontology_classes": len([n for n in nodes if n.get('type') != 'instance']),
-                "database_items": len(db_items),
+                "hops": hops,
                 "total_nodes": len(nodes),
                 "total_links": len(links),
+                "truncated": truncated,
             }
         })
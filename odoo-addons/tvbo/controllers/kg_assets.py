@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Manifest of the KG thumbnails and pre-rendered reports.
+
+Built once per worker by scanning ``static/src/img/thumbnails/**`` and
+``static/src/reports/**``, then re-checked at most every
+``_CHECK_INTERVAL`` seconds by comparing file mtimes and sizes; only files
+that changed are re-hashed. Serializers look up (category, name) in memory
+instead of probing the filesystem per item, and get a content-hashed URL
+that can be cached forever.
+"""
+import hashlib
+import os
+import threading
+import time
+
+_ADDON_DIR = os.path.dirname(os.path.dirname(__file__))
+_ADDONS_ROOT = os.path.dirname(_ADDON_DIR)
+
+# kind -> (directory inside the addon, file extension)
+_ROOTS = {
+    'thumbnails': (os.path.join('static', 'src', 'img', 'thumbnails'), '.png'),
+    'reports': (os.path.join('static', 'src', 'reports'), '.md'),
+}
+_CHECK_INTERVAL = 30.0
+
+ASSET_URL = '/tvbo/api/kg/asset'
+
+_manifest = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+class AssetManifest:
+    """(kind, category, name) -> file path and content digest."""
+
+    def __init__(self, files, digests):
+        self.files = files
+        self.digests = digests
+        self.version = hashlib.sha1(repr(sorted(digests.items())).encode()).hexdigest()[:12]
+
+    def url(self, kind, category, name):
+        digest = self.digests.get((kind, category, name))
+        if digest is None:
+            return None
+        return f'{ASSET_URL}/{kind}/{category}/{digest}/{name}{_ROOTS[kind][1]}'
+
+    def path(self, kind, category, name):
+        """Path relative to the addons root, as expected by ``http.Stream.from_path``."""
+        entry = self.files.get((kind, category, name))
+        return os.path.relpath(entry[0], _ADDONS_ROOT) if entry else None
+
+
+def _scan():
+    """Map (kind, category, name) -> (absolute path, mtime_ns, size)."""
+    files = {}
+    for kind, (root, ext) in _ROOTS.items():
+        base = os.path.join(_ADDON_DIR, root)
+        if not os.path.isdir(base):
+            continue
+        for category in os.scandir(base):
+            if not category.is_dir():
+                continue
+            for entry in os.scandir(category.path):
+                if entry.is_file() and entry.name.endswith(ext):
+                    stat = entry.stat()
+                    files[(kind, category.name, entry.name[:-len(ext)])] = (entry.path, stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def _digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def get_manifest():
+    """Current manifest, rescanning the asset directories when due."""
+    global _manifest, _checked_at
+    if _manifest is not None and time.monotonic() - _checked_at < _CHECK_INTERVAL:
+        return _manifest
+    with _lock:
+        if _manifest is not None and time.monotonic() - _checked_at < _CHECK_INTERVAL:
+            return _manifest
+        files = _scan()
+        previous = _manifest or AssetManifest({}, {})
+        if files != previous.files:
+            digests = {
+                key: previous.digests[key] if previous.files.get(key) == entry else _digest(entry[0])
+                for key, entry in files.items()
+            }
+            _manifest = AssetManifest(files, digests)
+        _checked_at = time.monotonic()
+        return _manifest
+
+
+def thumbnail_url(category, name):
+    """Content-hashed URL of a thumbnail, or None if there is none."""
+    return get_manifest().url('thumbnails', category, name)
+
+
+def report_url(category, name):
+    """Content-hashed URL of a pre-rendered report, or None if there is none."""
+    return get_manifest().url('reports', category, name)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""Bounded in-process caches for the knowledge graph API."""
+import threading
+import time
+from collections import OrderedDict
+
+from . import kg_metrics
+
+
+class LRUCache:
+    """Thread-safe LRU cache with hit/miss counters.
+
+    With ``ttl`` (seconds), entries also expire that long after being put.
+    """
+
+    def __init__(self, name, maxsize, ttl=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached value for ``key`` or None, refreshing its recency."""
+        with self._lock:
+            if key in self._data:
+                expires, value = self._data[key]
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    kg_metrics.cache_event(self.name, True)
+                    return value
+                del self._data[key]
+            self.misses += 1
+        kg_metrics.cache_event(self.name, False)
+        return None
+
+    def put(self, key, value):
+        with self._lock:
+            expires = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {'name': self.name, 'size': len(self._data), 'maxsize': self.maxsize,
+                'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Transitive closure of the ontology ``is_a`` hierarchy.
+
+For every class or individual of ``get_class_hierarchy()``, all ancestors
+are stored with their distance (number of ``is_a`` steps), and the
+descendants table is the inverse. ``is_subclass_of`` is then a dict lookup
+and full lineages or subtrees are read off in O(answer).
+"""
+from collections import defaultdict
+
+
+class ClosureIndex:
+    """Closure tables of the is_a DAG. Never mutated after construction."""
+
+    def __init__(self, hierarchy):
+        self.nodes = {n['storid']: n for n in hierarchy.get('nodes', []) if n.get('storid')}
+        # Direct is_a links of each node, by child
+        self.parent_links = defaultdict(list)
+        for link in hierarchy.get('links', []):
+            if link.get('type') == 'is_a' and link['source'] in self.nodes and link['target'] in self.nodes:
+                self.parent_links[link['source']].append(link)
+
+        # Breadth-first upwards from every node; also correct if the graph has cycles
+        self.ancestors = {}
+        self.descendants = defaultdict(dict)
+        for storid in self.nodes:
+            distances = {}
+            frontier = [storid]
+            depth = 0
+            while frontier:
+                depth += 1
+                next_frontier = []
+                for child in frontier:
+                    for link in self.parent_links.get(child, ()):
+                        parent = link['target']
+                        if parent != storid and parent not in distances:
+                            distances[parent] = depth
+                            next_frontier.append(parent)
+                frontier = next_frontier
+            self.ancestors[storid] = distances
+            for ancestor, distance in distances.items():
+                self.descendants[ancestor][storid] = distance
+
+    def __contains__(self, storid):
+        return storid in self.nodes
+
+    def is_subclass_of(self, storid, ancestor):
+        """True if ``ancestor`` is reachable from ``storid`` over is_a links."""
+        return ancestor in self.ancestors.get(storid, ())
+
+    def _view(self, storid, related, max_nodes=None):
+        """``storid`` plus ``related`` nodes (nearest first) and the is_a links among them."""
+        ordered = sorted(related.items(), key=lambda item: item[1])
+        truncated = max_nodes is not None and len(ordered) > max_nodes
+        if truncated:
+            ordered = ordered[:max_nodes]
+        nodes = [{**self.nodes[storid], 'distance': 0}]
+        nodes.extend({**self.nodes[s], 'distance': d} for s, d in ordered)
+        selected = {n['storid'] for n in nodes}
+        links = [link for s in selected for link in self.parent_links.get(s, ()) if link['target'] in selected]
+        return {"nodes": nodes, "links": links, "total": len(related), "truncated": truncated}
+
+    def lineage(self, storid):
+        """``storid`` and all its ancestors."""
+        return self._view(storid, self.ancestors[storid])
+
+    def subtree(self, storid, max_nodes=None):
+        """``storid`` and its descendants, nearest first, at most ``max_nodes`` of them."""
+        return self._view(storid, self.descendants.get(storid, {}), max_nodes)
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Property filters over KG items, compiled to Odoo domains.
+
+A filter is a JSON object whose keys are ANDed:
+
+    {"<property>": value}                    equality (a list: membership)
+    {"<property>": {"<op>": value, ...}}     eq, ne, lt, lte, gt, gte, in, nin, contains
+    {"<relation>": {"count": n}}             number of related records,
+    {"<relation>": {"count": {"gt": n}}}     compared like a number
+    {"and": [filter, ...]}, {"or": [filter, ...]}, {"not": filter}
+
+Properties and their values are validated against the class schemas of
+``get_class_schemas`` (operators by property type, enum values against the
+enum); relations are the one2many and many2many fields of the KG model.
+Enum properties stored as many2one records are matched on their technical
+name, and counts are a grouped subquery on the relation table, so a whole
+filter runs in the database as one query. For example, continuous-time dynamics
+with more than 4 state variables:
+
+    {"system_type": "continuous", "state_variables": {"count": {"gt": 4}}}
+"""
+import operator
+import re
+
+from odoo.tools import SQL
+
+# DSL operator -> Odoo domain operator
+_OPERATORS = {
+    'eq': '=',
+    'ne': '!=',
+    'lt': '<',
+    'lte': '<=',
+    'gt': '>',
+    'gte': '>=',
+    'in': 'in',
+    'nin': 'not in',
+    'contains': 'ilike',
+}
+# Operators of each schema property type
+_TYPE_OPERATORS = {
+    'string': {'eq', 'ne', 'in', 'nin', 'contains'},
+    'number': {'eq', 'ne', 'lt', 'lte', 'gt', 'gte', 'in', 'nin'},
+    'boolean': {'eq', 'ne'},
+    'enum': {'eq', 'ne', 'in', 'nin'},
+}
+# Count operator -> (SQL operator, Python comparison)
+_COUNT_OPERATORS = {
+    'eq': ('=', operator.eq),
+    'ne': ('<>', operator.ne),
+    'lt': ('<', operator.lt),
+    'lte': ('<=', operator.le),
+    'gt': ('>', operator.gt),
+    'gte': ('>=', operator.ge),
+}
+
+# Leaf conditions per filter
+MAX_CONDITIONS = 50
+# Nesting of and/or/not per filter
+MAX_DEPTH = 10
+
+# Fields generated under another name note the datamodel name in their string
+_RENAMED_RE = re.compile(r"renamed from '(\w+)'")
+
+
+def _and(domains):
+    domains = [d for d in domains if d]
+    return ['&'] * (len(domains) - 1) + [leaf for d in domains for leaf in d]
+
+
+def _or(domains):
+    return ['|'] * (len(domains) - 1) + [leaf for d in domains for leaf in d]
+
+
+def _model_fields(model):
+    """Fields of ``model`` by datamodel property name."""
+    fields = dict(model._fields)
+    for field in model._fields.values():
+        renamed = _RENAMED_RE.search(field.string or '')
+        if renamed:
+            fields.setdefault(renamed.group(1), field)
+    return fields
+
+
+def _matches(value, kind):
+    if kind == 'number':
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if kind == 'boolean':
+        return isinstance(value, bool)
+    return isinstance(value, str)
+
+
+class FilterCompiler:
+    """Compiles filters on one KG type to domains of its Odoo model.
+
+    Raises ValueError, with a message fit for the client, on invalid filters.
+    """
+
+    def __init__(self, model, schema):
+        self.model = model
+        self.properties = schema['properties']
+        self.fields = _model_fields(model)
+        self.conditions = 0
+
+    def compile(self, spec):
+        """Odoo domain of the filter ``spec`` (a decoded JSON object)."""
+        self.conditions = 0
+        return self._clause(spec, 0)
+
+    def _clause(self, spec, depth):
+        if not isinstance(spec, dict) or not spec:
+            raise ValueError("A filter must be a non-empty object")
+        if depth > MAX_DEPTH:
+            raise ValueError(f"Filters nest at most {MAX_DEPTH} levels of and/or/not")
+        domains = []
+        for key, value in spec.items():
+            if key in ('and', 'or'):
+                if not isinstance(value, list) or not value:
+                    raise ValueError(f"'{key}' takes a non-empty list of filters")
+                clauses = [self._clause(v, depth + 1) for v in value]
+                domains.append(_and(clauses) if key == 'and' else _or(clauses))
+            elif key == 'not':
+                domains.append(['!'] + self._clause(value, depth + 1))
+            elif isinstance(value, dict) and 'count' in value:
+                if len(value) > 1:
+                    raise ValueError(f"'{key}': 'count' cannot be combined with other operators")
+                domains.append(self._count(key, value['count']))
+            else:
+                domains.append(self._property(key, value))
+        return _and(domains)
+
+    def _condition(self):
+        self.conditions += 1
+        if self.conditions > MAX_CONDITIONS:
+            raise ValueError(f"At most {MAX_CONDITIONS} conditions per filter")
+
+    # ===================
+    # Properties
+    # ===================
+
+    def _column(self, name):
+        """(schema, domain path) of a filterable property."""
+        schema = self.properties.get(name)
+        if schema is None:
+            raise ValueError(f"Unknown property '{name}'; filterable: {', '.join(sorted(self.properties))}")
+        field = self.fields.get(name)
+        if field is None or not field.store or field.type in ('one2many', 'many2many'):
+            raise ValueError(f"Property '{name}' is not stored and cannot be filtered")
+        if field.type == 'many2one':
+            comodel = self.model.env[field.comodel_name]
+            key = 'technical_name' if 'technical_name' in comodel._fields else comodel._rec_name
+            return schema, f'{field.name}.{key}'
+        return schema, field.name
+
+    def _property(self, name, value):
+        schema, path = self._column(name)
+        if isinstance(value, dict):
+            operators = value
+        elif isinstance(value, list):
+            operators = {'in': value}
+        else:
+            operators = {'eq': value}
+        if not operators:
+            raise ValueError(f"'{name}': no operator given")
+        return _and([self._leaf(name, schema, path, op, operand) for op, operand in operators.items()])
+
+    def _leaf(self, name, schema, path, op, value):
+        self._condition()
+        kind = schema['type']
+        if op not in _TYPE_OPERATORS[kind]:
+            raise ValueError(
+                f"'{name}' ({kind}) supports {', '.join(sorted(_TYPE_OPERATORS[kind]))}, not '{op}'")
+        values = value if op in ('in', 'nin') else [value]
+        if op in ('in', 'nin') and not isinstance(value, list):
+            raise ValueError(f"'{name}': '{op}' takes a list")
+        for v in values:
+            if v is None and op in ('eq', 'ne'):
+                continue
+            if not _matches(v, 'string' if kind == 'enum' else kind):
+                raise ValueError(f"'{name}': {v!r} is not a valid {kind} value")
+            if kind == 'enum' and v not in {e['value'] for e in schema['values']}:
+                raise ValueError(f"'{name}': {v!r} is not one of {', '.join(e['value'] for e in schema['values'])}")
+        if op == 'contains' and not value:
+            raise ValueError(f"'{name}': 'contains' takes a non-empty string")
+        return [(path, _OPERATORS[op], False if value is None else value)]
+
+    # ===================
+    # Relation counts
+    # ===================
+
+    def _count(self, name, value):
+        """Domain on the number of records related through ``name``.
+
+        A subquery grouped on the relation table; records without any
+        related record count as 0.
+        """
+        self._condition()
+        field = self.fields.get(name)
+        if field is None or field.type not in ('one2many', 'many2many'):
+            raise ValueError(f"'{name}' is not a relation of {self.model._name}; 'count' needs one")
+        operators = value if isinstance(value, dict) else {'eq': value}
+        if not operators:
+            raise ValueError(f"'{name}': no count operator given")
+        for op, n in operators.items():
+            if op not in _COUNT_OPERATORS:
+                raise ValueError(f"'{name}': count supports {', '.join(_COUNT_OPERATORS)}, not '{op}'")
+            if not isinstance(n, int) or isinstance(n, bool):
+                raise ValueError(f"'{name}': count must be compared with an integer")
+
+        env = self.model.env
+        if field.type == 'many2many':
+            table, column = field.relation, field.column1
+        else:
+            table, column = env[field.comodel_name]._table, field.inverse_name
+        having = SQL(' AND ').join(SQL(f'count(*) {_COUNT_OPERATORS[op][0]} %s', n) for op, n in operators.items())
+        zero_matches = all(_COUNT_OPERATORS[op][1](0, n) for op, n in operators.items())
+        # Select the complement when 0 matches, so unrelated records need no listing
+        key = SQL.identifier(column)
+        subquery = SQL(
+            'SELECT %s FROM %s WHERE %s IS NOT NULL GROUP BY %s HAVING %s(%s)',
+            key, SQL.identifier(table), key, key, SQL('NOT ' if zero_matches else ''), having,
+        )
+        return [('id', 'not in' if zero_matches else 'in', subquery)]
+
+
+def compile_order(model, schema, order):
+    """Odoo order of ``order`` ("<property>" or "<property> desc"), always ending on id."""
+    if not order:
+        return 'id'
+    name, _, direction = order.partition(' ')
+    direction = direction.strip().lower() or 'asc'
+    field = _model_fields(model).get(name)
+    if name not in schema['properties'] or field is None or not field.store \
+            or field.type in ('one2many', 'many2many', 'many2one') or direction not in ('asc', 'desc'):
+        raise ValueError(f"Cannot order by '{order}'")
+    return f'{field.name} {direction}, id'
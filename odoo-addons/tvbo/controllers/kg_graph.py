@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Precomputed knowledge graph for /tvbo/api/kg/graph.
+
+Ontology classes and database instances are merged into one node table
+once per KG snapshot, together with node degree, PageRank and a ranking
+by centrality. Level-of-detail views (top-k central nodes plus their
+induced links) and focus expansions are then selections on that model.
+"""
+import sys
+from array import array
+
+_DAMPING = 0.85
+_MAX_ITERATIONS = 100
+_TOLERANCE = 1e-9
+
+
+def pagerank(n, edges):
+    """PageRank of ``n`` nodes over directed ``edges`` (pairs of node indices)."""
+    if n == 0:
+        return []
+    out_degree = [0] * n
+    for s, _ in edges:
+        out_degree[s] += 1
+    rank = [1.0 / n] * n
+    for _ in range(_MAX_ITERATIONS):
+        dangling = sum(rank[i] for i in range(n) if not out_degree[i])
+        base = (1.0 - _DAMPING) / n + _DAMPING * dangling / n
+        new = [base] * n
+        for s, t in edges:
+            new[t] += _DAMPING * rank[s] / out_degree[s]
+        delta = sum(abs(a - b) for a, b in zip(new, rank))
+        rank = new
+        if delta < _TOLERANCE:
+            break
+    return rank
+
+
+def instance_node(item):
+    """Graph node of a serialized database item."""
+    node_id = f"db_{item['type']}_{item['id']}"
+    return {
+        'id': node_id,
+        'storid': node_id,
+        'label': item.get('name') or item.get('label') or item.get('title', ''),
+        'type': 'instance',
+        'db_type': item['type'],
+        'title': item.get('title', ''),
+        'iri': item.get('iri', ''),
+    }
+
+
+def instance_target(item):
+    """Storid of the ontology instance or class a database item belongs to."""
+    onto_instance = item.get('ontology_instance')
+    onto_class = item.get('ontology_class')
+    # Try to link to specific instance first, then to class
+    if onto_instance and onto_instance.get('storid'):
+        return onto_instance['storid']
+    if onto_class and onto_class.get('storid'):
+        return onto_class['storid']
+    return None
+
+
+class KGGraph:
+    """Node/link tables with centrality, built once per snapshot."""
+
+    def __init__(self, hierarchy, items):
+        ontology_nodes = [dict(n) for n in hierarchy.get('nodes', [])]
+        links = list(hierarchy.get('links', []))
+        ontology_ids = {n['storid'] for n in ontology_nodes if n.get('storid')}
+
+        instance_nodes = []
+        for item in items:
+            node = instance_node(item)
+            instance_nodes.append(node)
+            target = instance_target(item)
+            if target and target in ontology_ids:
+                links.append({
+                    'source': node['id'],
+                    'target': target,
+                    'type': 'instance_of',
+                    'label': 'instance of',
+                })
+
+        self.nodes = ontology_nodes + instance_nodes
+        self.links = links
+        self.ontology_count = len(ontology_nodes)
+        self.index = {n.get('storid'): i for i, n in enumerate(self.nodes)}
+
+        # Node indices of each link's ends, None for dangling links
+        self.link_ends = []
+        for link in links:
+            s, t = self.index.get(link.get('source')), self.index.get(link.get('target'))
+            self.link_ends.append((s, t) if s is not None and t is not None else None)
+        edges = [e for e in self.link_ends if e]
+
+        self.neighbours = [set() for _ in self.nodes]
+        for s, t in edges:
+            self.neighbours[s].add(t)
+            self.neighbours[t].add(s)
+
+        ranks = pagerank(len(self.nodes), edges)
+        for i, node in enumerate(self.nodes):
+            node['degree'] = len(self.neighbours[i])
+            node['pagerank'] = round(ranks[i], 8)
+        self.ranking = sorted(range(len(self.nodes)), key=ranks.__getitem__, reverse=True)
+        self.ontology_ranking = [i for i in self.ranking if i < self.ontology_count]
+
+    def top(self, k, ontology_only=False):
+        """Indices of the ``k`` most central nodes."""
+        return (self.ontology_ranking if ontology_only else self.ranking)[:k]
+
+    def neighbourhood(self, storid):
+        """Indices of ``storid`` and its direct neighbours (empty if unknown)."""
+        i = self.index.get(storid)
+        return set() if i is None else {i} | self.neighbours[i]
+
+    def bfs(self, storid, hops, max_nodes):
+        """Indices within ``hops`` of ``storid``, at most ``max_nodes`` of them.
+
+        Neighbours are visited in order of decreasing PageRank, so when the
+        search stops early the most central nodes are the ones kept.
+        Returns (selected indices, truncated), or (None, False) if ``storid``
+        is unknown.
+        """
+        root = self.index.get(storid)
+        if root is None:
+            return None, False
+        selected = {root}
+        frontier = [root]
+        for _ in range(hops):
+            next_frontier = []
+            for i in frontier:
+                for j in sorted(self.neighbours[i] - selected, key=lambda j: -self.nodes[j]['pagerank']):
+                    if len(selected) >= max_nodes:
+                        return selected, True
+                    selected.add(j)
+                    next_frontier.append(j)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return selected, False
+
+    def subgraph(self, selected):
+        """Nodes in ``selected`` (in table order) and the links among them."""
+        nodes = [self.nodes[i] for i in sorted(selected)]
+        links = [l for l, ends in zip(self.links, self.link_ends)
+                 if ends and ends[0] in selected and ends[1] in selected]
+        return nodes, links
+
+
+def encode_columnar(nodes, links, typed_links=False):
+    """Columnar form of a node/link list.
+
+    Nodes become one array per property. Links reference nodes by their
+    index in the node table, and their ``type``/``label`` strings are
+    dictionary-encoded; links to nodes outside the table are dropped. With
+    ``typed_links`` the index and code arrays are little-endian int32
+    buffers (for msgpack + JS typed arrays) instead of lists.
+    """
+    columns = {}
+    for node in nodes:
+        for key in node:
+            columns.setdefault(key, None)
+    node_table = {key: [node.get(key) for node in nodes] for key in columns}
+    position = {node.get('storid'): i for i, node in enumerate(nodes)}
+
+    dictionaries = {'type': [], 'label': []}
+    codes = {'type': {}, 'label': {}}
+    link_table = {'source': array('i'), 'target': array('i'), 'type': array('i'), 'label': array('i')}
+    for link in links:
+        s, t = position.get(link.get('source')), position.get(link.get('target'))
+        if s is None or t is None:
+            continue
+        link_table['source'].append(s)
+        link_table['target'].append(t)
+        for key in ('type', 'label'):
+            value = link.get(key)
+            if value not in codes[key]:
+                codes[key][value] = len(dictionaries[key])
+                dictionaries[key].append(value)
+            link_table[key].append(codes[key][value])
+
+    if typed_links:
+        if sys.byteorder != 'little':
+            for column in link_table.values():
+                column.byteswap()
+        link_table = {key: column.tobytes() for key, column in link_table.items()}
+    else:
+        link_table = {key: column.tolist() for key, column in link_table.items()}
+
+    return {
+        'format': 'columnar',
+        'node_count': len(nodes),
+        'nodes': node_table,
+        'links': link_table,
+        'link_dictionaries': dictionaries,
+    }
+
+
+def decode_columnar(payload):
+    """Inverse of ``encode_columnar`` (row dicts), used by clients and benchmarks."""
+    node_table = payload['nodes']
+    nodes = [
+        {key: values[i] for key, values in node_table.items() if values[i] is not None}
+        for i in range(payload['node_count'])
+    ]
+    link_table = payload['links']
+    if isinstance(link_table['source'], bytes):
+        link_table = {key: array('i', column).tolist() for key, column in link_table.items()}
+    dictionaries = payload['link_dictionaries']
+    links = [
+        {
+            'source': nodes[s].get('storid'),
+            'target': nodes[t].get('storid'),
+            'type': dictionaries['type'][ty],
+            'label': dictionaries['label'][la],
+        }
+        for s, t, ty, la in zip(link_table['source'], link_table['target'], link_table['type'], link_table['label'])
+    ]
+    return nodes, links
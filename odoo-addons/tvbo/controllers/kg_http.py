@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Conditional GET for the read-only tvbo JSON routes.
+
+A route declares a validator: a cheap function of the request that returns
+(etag, last_modified) from the version of the data the response is built
+from: the catalogue version and the time it last moved, or the ontology
+version. The ``conditional`` decorator evaluates it before the route runs,
+answers ``If-None-Match`` / ``If-Modified-Since`` with 304 without
+serializing anything, and otherwise adds ETag, Last-Modified and the
+route's Cache-Control to the 200 response.
+"""
+import functools
+import glob
+import hashlib
+import os
+
+import tvbo
+from odoo.http import Response, request
+from werkzeug.http import http_date
+
+from . import kg_metrics
+
+
+def _code_version():
+    """Hash of the tvbo package version and this addon's controllers.
+
+    Part of every ETag, so a deploy that changes a serializer also changes
+    the validators of unchanged data.
+    """
+    digest = hashlib.sha1(tvbo.__version__.encode())
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), '*.py'))):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+CODE_VERSION = _code_version()
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def validator(*parts, last_modified=None):
+    """(etag, last_modified) for a response determined by ``parts``."""
+    etag = hashlib.sha1(repr((CODE_VERSION,) + parts).encode()).hexdigest()[:20]
+    return etag, last_modified
+
+
+def catalogue_validator(env, *parts):
+    """Validator of a response built from tvbo.* records.
+
+    The ETag follows the catalogue version, which moves on every create,
+    write and unlink of any tvbo.* record, so nested relations and display
+    names of related records are covered. Last-Modified is the time of the
+    last such change, deletions included; it is left out when the response
+    also depends on ``parts`` (e.g. the ontology), which it does not track.
+    """
+    version, changed_at = env['tvbo.kg_catalogue'].sudo().get_last_change()
+    return validator('catalogue', version, *parts, last_modified=None if parts else changed_at)
+
+
+def versioned_cache_control(kw, version, fallback='no-cache'):
+    """Immutable if the request names the current ``version`` as ``?v=``, else ``fallback``."""
+    return IMMUTABLE if kw.get('v') == version else fallback
+
+
+def _not_modified(etag, last_modified):
+    httprequest = request.httprequest
+    if httprequest.if_none_match:
+        return httprequest.if_none_match.contains(etag)
+    since = httprequest.if_modified_since
+    return bool(since and last_modified and last_modified.replace(microsecond=0) <= since.replace(tzinfo=None))
+
+
+def conditional(get_validator, cache_control='no-cache'):
+    """Route decorator for conditional GET.
+
+    ``get_validator(env, **route_kwargs)`` returns (etag, last_modified);
+    last_modified (naive UTC datetime) may be None. ``cache_control`` is a
+    header value or a function of the route kwargs. Only 200 responses
+    carry the validators, so errors are never cached.
+    """
+    def decorate(route):
+        @functools.wraps(route)
+        def wrapper(self, *args, **kw):
+            if request.httprequest.method not in ('GET', 'HEAD'):
+                return route(self, *args, **kw)
+            etag, last_modified = get_validator(request.env, *args, **kw)
+            headers = {
+                'ETag': f'"{etag}"',
+                'Cache-Control': cache_control(kw) if callable(cache_control) else cache_control,
+            }
+            if last_modified:
+                headers['Last-Modified'] = http_date(last_modified)
+            if _not_modified(etag, last_modified):
+                kg_metrics.cache_event('http', True)
+                headers['Access-Control-Allow-Origin'] = '*'
+                return Response(status=304, headers=headers)
+            kg_metrics.cache_event('http', False)
+            response = route(self, *args, **kw)
+            if response.status_code == 200:
+                for name, value in headers.items():
+                    response.headers[name] = value
+            return response
+        return wrapper
+    return decorate
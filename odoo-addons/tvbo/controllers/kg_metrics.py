@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Per-route instrumentation of the tvbo HTTP API.
+
+The ``instrument`` route decorator records, for every request, the wall
+time, the number and duration of SQL queries (Odoo counts them on the
+request thread), the response size and the cache hits and misses reported
+with ``cache_event`` while the route ran. Values are aggregated into
+counters and fixed-bucket histograms per route.
+
+Each process flushes its metrics to
+``<data_dir>/tvbo/metrics/<host>-<pid>.json`` at most every few seconds;
+``collect`` merges the files of all workers (those of exited workers are
+folded into ``archive.json``) and ``render`` formats them in the Prometheus
+text exposition format.
+"""
+import fcntl
+import functools
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+
+_logger = logging.getLogger(__name__)
+
+# Histogram name -> (help, upper bounds of the buckets)
+HISTOGRAMS = {
+    'tvbo_http_request_duration_seconds': (
+        'Wall time of tvbo API requests',
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    'tvbo_http_sql_queries': (
+        'SQL queries per tvbo API request',
+        (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+    ),
+    'tvbo_http_sql_duration_seconds': (
+        'Time spent in SQL per tvbo API request',
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    ),
+    'tvbo_http_response_bytes': (
+        'Size of non-streamed tvbo API responses',
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+    ),
+}
+COUNTERS = {
+    'tvbo_http_requests_total': 'tvbo API requests by route and status',
+    'tvbo_cache_requests_total': 'Cache lookups during tvbo API requests, by route, cache and result',
+}
+
+# Seconds between two flushes of a process's metrics to its file
+_FLUSH_INTERVAL = 5.0
+
+_HOST = socket.gethostname()
+
+_lock = threading.Lock()
+# (metric, labels) -> count, or [count per bucket + overflow..., sum] for histograms
+_samples = {}
+_last_flush = 0.0
+_local = threading.local()
+
+
+def _observe(name, labels, value):
+    bounds = HISTOGRAMS[name][1]
+    key = (name, labels)
+    sample = _samples.get(key)
+    if sample is None:
+        sample = _samples[key] = [0] * (len(bounds) + 1) + [0.0]
+    index = next((i for i, bound in enumerate(bounds) if value <= bound), len(bounds))
+    sample[index] += 1
+    sample[-1] += value
+
+
+def _count(name, labels, value=1):
+    key = (name, labels)
+    _samples[key] = _samples.get(key, 0) + value
+
+
+def cache_event(cache, hit):
+    """Record a cache lookup for the request being instrumented on this thread."""
+    events = getattr(_local, 'events', None)
+    if events is not None:
+        events.append((cache, hit))
+
+
+def record(handler, status, seconds, queries, query_seconds, size, events):
+    """Aggregate one request."""
+    labels = (('handler', handler),)
+    with _lock:
+        _count('tvbo_http_requests_total', labels + (('status', str(status)),))
+        _observe('tvbo_http_request_duration_seconds', labels, seconds)
+        _observe('tvbo_http_sql_queries', labels, queries)
+        _observe('tvbo_http_sql_duration_seconds', labels, query_seconds)
+        if size is not None:
+            _observe('tvbo_http_response_bytes', labels, size)
+        for cache, hit in events:
+            _count('tvbo_cache_requests_total', labels + (('cache', cache), ('result', 'hit' if hit else 'miss')))
+
+
+def instrument(route):
+    """Route decorator recording the request's metrics under the route's name."""
+    handler = route.__name__
+
+    @functools.wraps(route)
+    def wrapper(self, *args, **kw):
+        thread = threading.current_thread()
+        queries = getattr(thread, 'query_count', 0)
+        query_time = getattr(thread, 'query_time', 0.0)
+        _local.events = events = []
+        start = time.perf_counter()
+        status, size = 500, None
+        try:
+            response = route(self, *args, **kw)
+            status = getattr(response, 'status_code', 200)
+            if hasattr(response, 'calculate_content_length'):
+                size = response.calculate_content_length()
+            return response
+        except Exception as e:
+            status = getattr(e, 'code', 500)
+            raise
+        finally:
+            _local.events = None
+            record(
+                handler, status, time.perf_counter() - start,
+                getattr(thread, 'query_count', 0) - queries,
+                getattr(thread, 'query_time', 0.0) - query_time,
+                size, events,
+            )
+            flush()
+    return wrapper
+
+
+# ===================
+# Cross-process aggregation
+# ===================
+
+def _directory():
+    from odoo.tools import config
+    return os.path.join(config['data_dir'], 'tvbo', 'metrics')
+
+
+def _dump(samples):
+    return [[name, [list(label) for label in labels], value] for (name, labels), value in samples.items()]
+
+
+def _load(rows):
+    return {(name, tuple(tuple(label) for label in labels)): value for name, labels, value in rows}
+
+
+def _merge(into, samples):
+    for key, value in samples.items():
+        if isinstance(value, list):
+            current = into.get(key)
+            into[key] = [a + b for a, b in zip(current, value)] if current else list(value)
+        else:
+            into[key] = into.get(key, 0) + value
+
+
+def _write(path, samples):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(_dump(samples), f)
+    os.replace(tmp, path)
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return _load(json.load(f))
+    except (OSError, ValueError):
+        return {}
+
+
+def flush(force=False):
+    """Write this process's metrics to its file, at most every _FLUSH_INTERVAL seconds."""
+    global _last_flush
+    now = time.monotonic()
+    if not force and now - _last_flush < _FLUSH_INTERVAL:
+        return
+    _last_flush = now
+    with _lock:
+        samples = {key: list(value) if isinstance(value, list) else value for key, value in _samples.items()}
+    try:
+        directory = _directory()
+        os.makedirs(directory, exist_ok=True)
+        _write(os.path.join(directory, f'{_HOST}-{os.getpid()}.json'), samples)
+    except OSError as e:
+        _logger.warning(f"Could not flush metrics: {e}")
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """Metrics of all processes sharing the data dir, merged.
+
+    Only files of this host are checked for exited processes.
+    """
+    flush(force=True)
+    directory = _directory()
+    archive_path = os.path.join(directory, 'archive.json')
+    with open(os.path.join(directory, 'metrics.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive = _read(archive_path)
+        merged = dict(archive)
+        exited = []
+        for path in glob.glob(os.path.join(directory, '*-*.json')):
+            samples = _read(path)
+            _merge(merged, samples)
+            host, _, pid = os.path.basename(path)[:-len('.json')].rpartition('-')
+            if host == _HOST and not _alive(int(pid)):
+                _merge(archive, samples)
+                exited.append(path)
+        if exited:
+            _write(archive_path, archive)
+            for path in exited:
+                os.remove(path)
+    return merged
+
+
+def _format_labels(labels, extra=()):
+    labels = labels + extra
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+
+def render(samples):
+    """Prometheus text exposition of ``samples``."""
+    by_name = defaultdict(list)
+    for (name, labels), value in sorted(samples.items()):
+        by_name[name].append((labels, value))
+
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        lines += [f'{name}{_format_labels(labels)} {value}' for labels, value in by_name[name]]
+    for name, (help_text, bounds) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for labels, value in by_name[name]:
+            cumulative = 0
+            for bound, count in zip(bounds + ('+Inf',), value[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, (("le", str(bound)),))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {value[-1]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Shared, read-only ontology quadstore.
+
+The generated ontology (tvbo.owl) is parsed once into an SQLite quadstore
+file under the Odoo data dir, keyed by the owl file's mtime and size. Every
+worker then opens that file read-only; owlready2 maps it into memory
+(``PRAGMA mmap_size``), so N workers share one copy of the pages through the
+OS page cache instead of each parsing the ontology into a private in-memory
+store.
+"""
+import fcntl
+import glob
+import hashlib
+import logging
+import os
+
+import owlready2 as owl
+
+from tvbo.api.direct_ontology_api import DirectOntologyAPI
+from tvbo.ontology.owl import ONTO_DIR
+
+_logger = logging.getLogger(__name__)
+
+ONTOLOGY_PATH = os.path.join(ONTO_DIR, "tvbo.owl")
+
+
+class SharedOntologyAPI(DirectOntologyAPI):
+    """DirectOntologyAPI over a read-only quadstore file."""
+
+    def __init__(self, path):
+        with open(path + '.iri') as f:
+            base_iri = f.read()
+        self.path = path
+        self.world = owl.World(filename=path, read_only=True, exclusive=False)
+        self.onto = self.world.ontologies[base_iri]
+
+
+def _build(owl_path, path):
+    tmp = path + '.tmp'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    world = owl.World(filename=tmp)
+    onto = world.get_ontology('file://' + owl_path).load()
+    world.save()
+    world.close()
+    with open(path + '.iri', 'w') as f:
+        f.write(onto.base_iri)
+    os.replace(tmp, path)
+
+
+def ensure_quadstore(directory, owl_path=ONTOLOGY_PATH):
+    """Path of the quadstore for the current ``owl_path``, building it if needed.
+
+    Concurrent workers serialize on a file lock, so the ontology is parsed
+    once per ontology file; quadstores of previous files are removed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    stat = os.stat(owl_path)
+    key = hashlib.sha1(f'{owl_path}:{stat.st_mtime_ns}:{stat.st_size}:{owl.VERSION}'.encode()).hexdigest()[:12]
+    path = os.path.join(directory, f'ontology-{key}.sqlite3')
+    if os.path.exists(path):
+        return path
+    with open(os.path.join(directory, 'ontology.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not os.path.exists(path):
+            _logger.info(f"Building ontology quadstore {path} from {owl_path}")
+            _build(owl_path, path)
+            # Unlinking is safe for workers that still have an old store open
+            for old in glob.glob(os.path.join(directory, 'ontology-*.sqlite3*')):
+                if not old.startswith(path):
+                    os.remove(old)
+    return path
+
+
+def open_ontology_api(directory):
+    """SharedOntologyAPI over the quadstore in ``directory``."""
+    return SharedOntologyAPI(ensure_quadstore(directory))
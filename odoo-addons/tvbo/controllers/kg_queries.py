@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Named SPARQL queries served at /tvbo/api/kg/ontology/sparql/<name>.
+
+Each query declares its parameters in order as (name, type); the query
+text refers to them positionally as ``??1``, ``??2``, ... Types:
+
+  - iri: IRI of an ontology entity
+  - str, int, float: literals
+"""
+
+NAMED_QUERIES = {
+    "subclasses": {
+        "description": "Direct subclasses of a class",
+        "params": [("class", "iri")],
+        "query": "SELECT ?class WHERE { ?class rdfs:subClassOf ??1 . }",
+    },
+    "superclasses": {
+        "description": "Direct superclasses of a class",
+        "params": [("class", "iri")],
+        "query": "SELECT ?class WHERE { ??1 rdfs:subClassOf ?class . }",
+    },
+    "lineage": {
+        "description": "A class and all its ancestors",
+        "params": [("class", "iri")],
+        "query": "SELECT ?class WHERE { ??1 rdfs:subClassOf* ?class . }",
+    },
+    "instances": {
+        "description": "Individuals asserted to be of a class",
+        "params": [("class", "iri")],
+        "query": "SELECT ?individual WHERE { ?individual a ??1 . }",
+    },
+    "types": {
+        "description": "Classes an individual is asserted to be of",
+        "params": [("entity", "iri")],
+        "query": "SELECT ?class WHERE { ??1 a ?class . }",
+    },
+    "relations": {
+        "description": "Outgoing (predicate, object) pairs of an entity",
+        "params": [("entity", "iri")],
+        "query": "SELECT ?predicate ?object WHERE { ??1 ?predicate ?object . }",
+    },
+    "referrers": {
+        "description": "Incoming (subject, predicate) pairs of an entity",
+        "params": [("entity", "iri")],
+        "query": "SELECT ?subject ?predicate WHERE { ?subject ?predicate ??1 . }",
+    },
+    "by_label": {
+        "description": "Entities whose label contains a string (case-insensitive)",
+        "params": [("text", "str")],
+        "query": "SELECT ?entity ?label WHERE { ?entity rdfs:label ?label . "
+                 "FILTER(CONTAINS(LCASE(STR(?label)), LCASE(??1))) }",
+    },
+}
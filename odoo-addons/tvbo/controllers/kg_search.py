@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Server-side search over the KG snapshot.
+
+Tokenized inverted index over the searchable fields with BM25 ranking,
+prefix expansion of query terms and facet counts over the matches. The
+index is derived from the snapshot and updated incrementally: only items
+added, changed or removed since the previous snapshot are re-tokenized.
+"""
+import bisect
+import math
+import re
+from collections import Counter, defaultdict
+
+SEARCHABLE_FIELDS = ["name", "label", "title", "description", "abstract", "doi", "method", "definition", "symbol"]
+
+_TOKEN_RE = re.compile(r'\w+')
+_K1 = 1.2
+_B = 0.75
+_MAX_PREFIX_EXPANSION = 50
+_FACET_SIZE = 20
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _document_terms(item):
+    terms = Counter()
+    for field in SEARCHABLE_FIELDS:
+        value = item.get(field)
+        if value is None:
+            continue
+        if isinstance(value, list):
+            value = ' '.join(str(v) for v in value)
+        terms.update(tokenize(str(value)))
+    return terms
+
+
+def facet_value(value):
+    """String form of a facetable scalar, None for empty or nested values."""
+    if value is None or value == '' or isinstance(value, (dict, list)):
+        return None
+    return str(value)
+
+
+class KGSearchIndex:
+    """Inverted index over one snapshot. Never mutated after construction."""
+
+    def __init__(self, snapshot, previous=None):
+        self.docs = dict(snapshot.documents())
+        self.order = list(self.docs)
+        # Snapshot position of each key: breaks score ties the same way
+        # whether the index was built in full or updated
+        self.position = {key: i for i, key in enumerate(self.order)}
+        # Tokens whose posting dict belongs to this index (safe to mutate)
+        self._owned = set()
+        if previous is None:
+            self.terms = {}
+            self.postings = {}
+            changed = self.docs
+        else:
+            # Copy-on-write: the previous index may still serve requests.
+            self.terms = dict(previous.terms)
+            self.postings = dict(previous.postings)
+            for key in previous.docs.keys() - self.docs.keys():
+                self._remove(key)
+            changed = {k: v for k, v in self.docs.items() if previous.docs.get(k) != v}
+            for key in changed.keys() & previous.docs.keys():
+                self._remove(key)
+
+        for key, item in changed.items():
+            terms = _document_terms(item)
+            self.terms[key] = terms
+            for token, tf in terms.items():
+                self._posting(token)[key] = tf
+
+        del self._owned
+        self.lengths = {k: sum(t.values()) for k, t in self.terms.items()}
+        self.avg_length = (sum(self.lengths.values()) / len(self.lengths)) if self.lengths else 1.0
+        self.vocabulary = sorted(self.postings)
+
+    def _posting(self, token):
+        if token not in self._owned:
+            self._owned.add(token)
+            self.postings[token] = dict(self.postings.get(token, ()))
+        return self.postings[token]
+
+    def _remove(self, key):
+        for token in self.terms.pop(key):
+            posting = self._posting(token)
+            posting.pop(key, None)
+            if not posting:
+                del self.postings[token]
+                self._owned.discard(token)
+
+    def _expand(self, term):
+        """Index tokens matching ``term`` exactly or as a prefix."""
+        start = bisect.bisect_left(self.vocabulary, term)
+        tokens = []
+        for token in self.vocabulary[start:start + _MAX_PREFIX_EXPANSION]:
+            if not token.startswith(term):
+                break
+            tokens.append(token)
+        return tokens
+
+    def _score_term(self, term):
+        n = len(self.docs)
+        scores = defaultdict(float)
+        for token in self._expand(term):
+            posting = self.postings[token]
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for key, tf in posting.items():
+                norm = _K1 * (1 - _B + _B * self.lengths[key] / self.avg_length)
+                scores[key] += idf * tf * (_K1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query='', filters=None, facet_fields=None, limit=50, offset=0):
+        """Ranked, filtered and faceted search.
+
+        All query terms must match (as a word or word prefix). ``filters``
+        maps a field to accepted values (OR within a field, AND across
+        fields). ``facet_fields`` maps a KG type to the properties counted
+        as facets for items of that type.
+        """
+        scores = {}
+        terms = tokenize(query)
+        if terms:
+            for i, term in enumerate(terms):
+                term_scores = self._score_term(term)
+                if i == 0:
+                    scores = dict(term_scores)
+                else:
+                    scores = {k: v + term_scores[k] for k, v in scores.items() if k in term_scores}
+            keys = sorted(scores, key=lambda k: (-scores[k], self.position[k]))
+        else:
+            keys = self.order
+
+        if filters:
+            keys = [k for k in keys
+                    if all(facet_value(self.docs[k].get(f)) in values for f, values in filters.items())]
+
+        results = []
+        for key in keys[offset:offset + limit]:
+            item = dict(self.docs[key])
+            if terms:
+                item['score'] = round(scores[key], 4)
+            results.append(item)
+
+        return {
+            "results": results,
+            "total": len(keys),
+            "facets": self._facets(keys, facet_fields or {}),
+        }
+
+    def _facets(self, keys, facet_fields):
+        counts = defaultdict(Counter)
+        for key in keys:
+            item = self.docs[key]
+            for field in ('type', *facet_fields.get(item.get('type'), ())):
+                value = facet_value(item.get(field))
+                if value is not None:
+                    counts[field][value] += 1
+        return {
+            field: [{"value": v, "count": c} for v, c in counter.most_common(_FACET_SIZE)]
+            for field, counter in counts.items()
+        }
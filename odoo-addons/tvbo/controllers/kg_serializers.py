@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk serializers for the knowledge graph API.
+
+Each serializer takes a whole recordset and reads it in a fixed number of
+queries: one ``read`` for the columns plus one ``read`` per relation,
+independent of the number of records. Rows are turned into plain dicts;
+Pydantic is only used once per class to capture its default values, so the
+output matches ``Model(...).model_dump(exclude_none=True)``.
+
+Detail functions add what the detail routes show on top of that
+(parameters, state variables, equations, linked records), again with a
+fixed number of queries per recordset.
+"""
+import functools
+import logging
+
+from tvbo.datamodel.tvbopydantic import Coupling as PydanticCoupling
+from tvbo.datamodel.tvbopydantic import Dynamics as PydanticDynamics
+from tvbo.datamodel.tvbopydantic import Integrator as PydanticIntegrator
+from tvbo.datamodel.tvbopydantic import Network as PydanticNetwork
+from tvbo.datamodel.tvbopydantic import SimulationExperiment as PydanticSimulationExperiment
+from tvbo.datamodel.tvbopydantic import SimulationStudy as PydanticSimulationStudy
+
+from .kg_assets import report_url, thumbnail_url
+
+_logger = logging.getLogger(__name__)
+
+# KG type -> Odoo model
+KG_MODELS = {
+    'dynamics': 'tvbo.dynamics',
+    'network': 'tvbo.network',
+    'integrator': 'tvbo.integrator',
+    'experiment': 'tvbo.simulation_experiment',
+    'study': 'tvbo.simulation_study',
+    'coupling': 'tvbo.coupling',
+}
+
+# KG type -> many2one fields whose records are embedded in the serialized
+# item, so that a change to them changes the item
+EMBEDDED_FIELDS = {
+    'dynamics': ('system_type',),
+    'coupling': ('pre_expression', 'post_expression', 'coupling_function'),
+}
+
+_templates = {}
+
+
+def _template(cls, **required):
+    """Defaults of a Pydantic class as a dumped dict, computed once per class."""
+    if cls not in _templates:
+        _templates[cls] = cls(**required).model_dump(exclude_none=True)
+    return _templates[cls]
+
+
+def _row(template, **values):
+    """Copy ``template`` and set ``values``, dropping None like exclude_none."""
+    result = dict(template)
+    result.update((k, v) for k, v in values.items() if v is not None)
+    return result
+
+
+def _read_related(env, model, ids, fields):
+    """Read related rows in one query, keyed by id."""
+    ids = {i for i in ids if i}
+    if not ids:
+        return {}
+    return {r['id']: r for r in env[model].browse(ids).read(fields, load=None)}
+
+
+def _counted(kg_type):
+    """Log the number of SQL queries each bulk serializer call issued."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(records):
+            cr = records.env.cr
+            before = cr.sql_log_count
+            result = func(records)
+            _logger.debug(f"Serialized {len(result)} {kg_type} in {cr.sql_log_count - before} queries")
+            return result
+        return wrapper
+    return decorator
+
+
+@_counted('dynamics')
+def serialize_dynamics(records):
+    template = _template(PydanticDynamics, name='Unknown')
+    rows = records.read(['name', 'label', 'description', 'source', 'iri', 'system_type'], load=None)
+    system_types = _read_related(records.env, 'tvbo.system_type', [r['system_type'] for r in rows], ['technical_name'])
+
+    result = []
+    for r in rows:
+        name = r['name'] or ''
+        item = _row(
+            template,
+            name=r['name'] or 'Unknown',
+            label=r['label'] or None,
+            description=r['description'] or None,
+            source=r['source'] or None,
+            iri=r['iri'] or None,
+        )
+        item.update({
+            'id': r['id'],
+            'type': 'dynamics',
+            'title': r['name'] or r['label'] or '',
+            'system_type': system_types[r['system_type']]['technical_name'] if r['system_type'] else '',
+        })
+        thumb = thumbnail_url('models', name)
+        if thumb:
+            item['thumbnail'] = thumb
+        report = report_url('models', name)
+        if report:
+            item['report_url'] = report
+        result.append(item)
+    return result
+
+
+@_counted('network')
+def serialize_networks(records):
+    template = _template(PydanticNetwork)
+    rows = records.read(['label', 'description', 'number_of_nodes', 'number_of_regions'], load=None)
+
+    result = []
+    for r in rows:
+        item = _row(
+            template,
+            label=r['label'] or None,
+            description=r['description'] or None,
+            number_of_nodes=r['number_of_nodes'] or r['number_of_regions'] or 1,
+        )
+        item.update({
+            'id': r['id'],
+            'type': 'network',
+            'name': r['label'] or f"Network {r['id']}",
+            'title': r['label'] or f"Network {r['id']}",
+        })
+        thumb = thumbnail_url('networks', r['label'] or '')
+        if thumb:
+            item['thumbnail'] = thumb
+        result.append(item)
+    return result
+
+
+@_counted('integrator')
+def serialize_integrators(records):
+    template = _template(PydanticIntegrator)
+    rows = records.read(['method', 'step_size', 'duration', 'time_scale'], load=None)
+
+    result = []
+    for r in rows:
+        item = _row(
+            template,
+            method=r['method'] or None,
+            step_size=r['step_size'] or 0.01220703125,
+            duration=r['duration'] or 1000.0,
+            time_scale=r['time_scale'] or 'ms',
+        )
+        item.update({
+            'id': r['id'],
+            'type': 'integrator',
+            'name': r['method'] or f"Integrator {r['id']}",
+            'title': r['method'] or f"Integrator {r['id']}",
+            'description': f"Method: {r['method']}, Step: {r['step_size']}, Duration: {r['duration']}",
+        })
+        report = report_url('integrators', r['method'] or '')
+        if report:
+            item['report_url'] = report
+        result.append(item)
+    return result
+
+
+@_counted('experiment')
+def serialize_experiments(records):
+    template = _template(PydanticSimulationExperiment, id='0')
+    rows = records.read(['label', 'description'], load=None)
+
+    result = []
+    for r in rows:
+        item = _row(template, label=r['label'] or None, description=r['description'] or None)
+        item.update({
+            'id': r['id'],
+            'type': 'experiment',
+            'name': r['label'] or f"Experiment {r['id']}",
+            'title': r['label'] or f"Experiment {r['id']}",
+            'abstract': r['description'] or '',
+        })
+        result.append(item)
+    return result
+
+
+@_counted('study')
+def serialize_studies(records):
+    template = _template(PydanticSimulationStudy)
+    rows = records.read(['label', 'description', 'doi', 'title', 'year'], load=None)
+
+    result = []
+    for r in rows:
+        item = _row(
+            template,
+            label=r['label'] or None,
+            description=r['description'] or None,
+            doi=r['doi'] or None,
+            title=r['title'] or None,
+        )
+        item.update({
+            'id': r['id'],
+            'type': 'study',
+            'name': r['title'] or r['label'] or f"Study {r['id']}",
+            'title': r['title'] or r['label'] or f"Study {r['id']}",
+            'abstract': r['description'] or '',
+            'year': str(r['year']) if r['year'] else '',
+            'doi': r['doi'] or '',
+        })
+        result.append(item)
+    return result
+
+
+@_counted('coupling')
+def serialize_couplings(records):
+    template = _template(PydanticCoupling, name='Linear')
+    rows = records.read(
+        ['name', 'label', 'delayed', 'sparse', 'pre_expression', 'post_expression', 'coupling_function'],
+        load=None,
+    )
+    equation_ids = [r[f] for r in rows for f in ('pre_expression', 'post_expression', 'coupling_function')]
+    equations = _read_related(records.env, 'tvbo.equation', equation_ids, ['righthandside', 'definition'])
+
+    result = []
+    for r in rows:
+        item = _row(
+            template,
+            name=r['name'] or 'Linear',
+            label=r['label'] or None,
+            delayed=r['delayed'],
+            sparse=r['sparse'],
+        )
+
+        # Build equation display from pre/post expressions
+        eq_parts = []
+        pre = equations.get(r['pre_expression'])
+        if pre and pre['righthandside']:
+            eq_parts.append(f"pre(x_j) = {pre['righthandside']}")
+        post = equations.get(r['post_expression'])
+        if post and post['righthandside']:
+            eq_parts.append(f"post(gx) = {post['righthandside']}")
+        function = equations.get(r['coupling_function'])
+
+        item.update({
+            'id': r['id'],
+            'type': 'coupling',
+            'title': r['name'] or r['label'] or f"Coupling {r['id']}",
+            'description': function['definition'] if function else '',
+            'equation': ' ;  '.join(eq_parts) if eq_parts else '',
+        })
+        thumb = thumbnail_url('coupling_functions', r['name'] or '')
+        if thumb:
+            item['thumbnail'] = thumb
+        report = report_url('coupling_functions', r['name'] or '')
+        if report:
+            item['report_url'] = report
+        result.append(item)
+    return result
+
+
+# KG type -> bulk serializer
+SERIALIZERS = {
+    'dynamics': serialize_dynamics,
+    'network': serialize_networks,
+    'integrator': serialize_integrators,
+    'experiment': serialize_experiments,
+    'study': serialize_studies,
+    'coupling': serialize_couplings,
+}
+
+
+# ===================
+# Details
+# ===================
+
+_PARAMETER_FIELDS = ['name', 'label', 'symbol', 'value', 'description']
+
+
+def _parameter(p):
+    return {
+        "name": p['name'], "label": p['label'], "symbol": p['symbol'] or '',
+        "value": p['value'], "description": p['description'] or ''
+    }
+
+
+def details_dynamics(records, items):
+    rows = records.read(['parameters', 'state_variables'], load=None)
+    env = records.env
+    parameters = _read_related(env, 'tvbo.parameter', [i for r in rows for i in r['parameters']], _PARAMETER_FIELDS)
+    state_variables = _read_related(
+        env, 'tvbo.state_variable', [i for r in rows for i in r['state_variables']],
+        ['name', 'label', 'symbol', 'description', 'equation'],
+    )
+    equations = _read_related(env, 'tvbo.equation', [sv['equation'] for sv in state_variables.values()],
+                              ['label', 'definition'])
+
+    for item, r in zip(items, rows):
+        item['parameters'] = [_parameter(parameters[i]) for i in r['parameters']]
+        item['state_variables'] = []
+        for i in r['state_variables']:
+            sv = state_variables[i]
+            equation = equations.get(sv['equation'])
+            item['state_variables'].append({
+                "name": sv['name'], "label": sv['label'], "symbol": sv['symbol'] or '',
+                "description": sv['description'] or '',
+                "equation": {"label": equation['label'], "definition": equation['definition']} if equation else None
+            })
+
+
+def details_networks(records, items):
+    rows = records.read(['parcellation'], load=None)
+    parcellations = _read_related(records.env, 'tvbo.parcellation', [r['parcellation'] for r in rows],
+                                  ['label', 'data_source'])
+    for item, r in zip(items, rows):
+        parcellation = parcellations.get(r['parcellation'])
+        if parcellation:
+            item['parcellation'] = {"label": parcellation['label'], "data_source": parcellation['data_source']}
+
+
+def details_integrators(records, items):
+    rows = records.read(['parameters'], load=None)
+    parameters = _read_related(records.env, 'tvbo.parameter', [i for r in rows for i in r['parameters']],
+                               _PARAMETER_FIELDS)
+    for item, r in zip(items, rows):
+        item['parameters'] = [_parameter(parameters[i]) for i in r['parameters']]
+
+
+def details_couplings(records, items):
+    rows = records.read(['parameters', 'coupling_function'], load=None)
+    env = records.env
+    parameters = _read_related(env, 'tvbo.parameter', [i for r in rows for i in r['parameters']], _PARAMETER_FIELDS)
+    functions = _read_related(env, 'tvbo.equation', [r['coupling_function'] for r in rows], ['label', 'definition'])
+    for item, r in zip(items, rows):
+        function = functions.get(r['coupling_function'])
+        if function:
+            item['coupling_function'] = {"label": function['label'], "definition": function['definition']}
+        item['parameters'] = [_parameter(parameters[i]) for i in r['parameters']]
+
+
+def details_experiments(records, items):
+    rows = records.read(['dynamics', 'integration', 'connectivity'], load=None)
+    env = records.env
+    dynamics = _read_related(env, 'tvbo.dynamics', [r['dynamics'][0] for r in rows if r['dynamics']], ['name'])
+    integrators = _read_related(env, 'tvbo.integrator', [r['integration'] for r in rows], ['method'])
+    networks = _read_related(env, 'tvbo.network', [r['connectivity'] for r in rows], ['label'])
+    for item, r in zip(items, rows):
+        if r['dynamics']:
+            item['dynamics'] = {"id": r['dynamics'][0], "name": dynamics[r['dynamics'][0]]['name']}
+        if r['integration']:
+            item['integration'] = {"id": r['integration'], "method": integrators[r['integration']]['method']}
+        if r['connectivity']:
+            item['connectivity'] = {"id": r['connectivity'], "label": networks[r['connectivity']]['label']}
+
+
+def details_studies(records, items):
+    pass
+
+
+# KG type -> bulk detail function, adding detail fields to serialized items in place
+DETAILS = {
+    'dynamics': details_dynamics,
+    'network': details_networks,
+    'integrator': details_integrators,
+    'experiment': details_experiments,
+    'study': details_studies,
+    'coupling': details_couplings,
+}
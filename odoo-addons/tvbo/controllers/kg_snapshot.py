@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Materialized snapshot of the /tvbo/api/kg/data catalogue.
+
+One snapshot per database, kept in worker memory and rebuilt only when the
+catalogue version (see models/kg_catalogue.py) moves. The JSON body is
+encoded once at build time so a hit costs one version query and no
+serialization at all.
+"""
+import json
+import logging
+import threading
+import time
+
+from . import kg_assets, kg_metrics
+
+_logger = logging.getLogger(__name__)
+
+_snapshots = {}
+# Reentrant: derived builders may read other derived structures
+_lock = threading.RLock()
+
+
+class KGSnapshot:
+    """Serialized catalogue for one database at one catalogue version."""
+
+    def __init__(self, version, assets_version, items, concepts, stale=None):
+        self.version = version
+        self.assets_version = assets_version
+        self.items = items
+        self.concepts = concepts
+        self._derived = {}
+        # Derived structures of the previous snapshot, for incremental rebuilds
+        self._stale = stale or {}
+        self.concept_storids = {c['storid'] for c in concepts}
+        # Encoded once and shared by both body variants (see ``body``)
+        self._items_json = ','.join(json.dumps(i) for i in items).encode()
+        self._concepts_json = ','.join(json.dumps(c) for c in concepts).encode()
+
+    def body(self, include_ontology):
+        """The /kg/data JSON array as a list of byte chunks, joined by the WSGI server.
+
+        Items and concepts are each kept encoded once, so serving the body
+        with or without concepts copies nothing per request.
+        """
+        chunks = [b'[']
+        for part in (self._items_json, include_ontology and self._concepts_json):
+            if part:
+                if len(chunks) > 1:
+                    chunks.append(b',')
+                chunks.append(part)
+        chunks.append(b']')
+        return chunks
+
+    def documents(self):
+        """Yield (key, item) for every item; keys are stable across versions.
+
+        Database items are keyed like graph nodes (``db_<type>_<id>``),
+        ontology concepts by storid.
+        """
+        for item in self.items:
+            yield f"db_{item['type']}_{item['id']}", item
+        for concept in self.concepts:
+            yield concept['storid'], concept
+
+    def item(self, kg_type, record_id):
+        """Database item ``record_id`` of ``kg_type``, or None."""
+        items = self.derived('items', lambda snapshot, previous: dict(snapshot.documents()))
+        return items.get(f"db_{kg_type}_{record_id}")
+
+    def derived(self, name, build):
+        """Structure derived from this snapshot, built once on first use.
+
+        ``build(snapshot, previous)`` receives the same structure from the
+        previous snapshot (or None) so it can update it incrementally.
+        """
+        if name not in self._derived:
+            with _lock:
+                if name not in self._derived:
+                    kg_metrics.cache_event(name, False)
+                    self._derived[name] = build(self, self._stale.pop(name, None))
+                    return self._derived[name]
+        kg_metrics.cache_event(name, True)
+        return self._derived[name]
+
+
+def _is_current(snapshot, version, assets_version, concepts):
+    return (snapshot is not None and snapshot.version == version
+            and snapshot.assets_version == assets_version and snapshot.concepts is concepts)
+
+
+def get_snapshot(env, build_items, concepts):
+    """Return the current snapshot for ``env``'s database, rebuilding if stale.
+
+    ``build_items`` is called without arguments and returns the database
+    items; ``concepts`` is the frozen ontology concept catalogue, a new
+    catalogue (ontology reload) also invalidates the snapshot.
+    """
+    dbname = env.cr.dbname
+    version = env['tvbo.kg_catalogue'].sudo().get_version()
+    # Items embed content-hashed asset URLs, so asset changes also invalidate.
+    assets_version = kg_assets.get_manifest().version
+    snapshot = _snapshots.get(dbname)
+    if _is_current(snapshot, version, assets_version, concepts):
+        kg_metrics.cache_event('snapshot', True)
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshots.get(dbname)
+        if _is_current(snapshot, version, assets_version, concepts):
+            kg_metrics.cache_event('snapshot', True)
+            return snapshot
+        kg_metrics.cache_event('snapshot', False)
+        start = time.perf_counter()
+        stale = snapshot and {**snapshot._stale, **snapshot._derived}
+        snapshot = KGSnapshot(version, assets_version, build_items(), concepts, stale=stale)
+        _snapshots[dbname] = snapshot
+        _logger.info(
+            f"Built KG snapshot v{version} for {dbname}: {len(snapshot.items)} items, "
+            f"{len(concepts)} concepts in {time.perf_counter() - start:.2f}s"
+        )
+        return snapshot
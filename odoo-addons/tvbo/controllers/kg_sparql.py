@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded SPARQL execution against the ontology world.
+
+owlready2 translates SPARQL to SQL and yields rows lazily from an SQLite
+cursor. Queries here run under a time budget: an SQLite progress handler
+aborts the statement once the calling thread's deadline has passed, and the
+deadline is also checked between rows. Only the requested page
+(``offset``, ``limit``) is pulled from the cursor, and each row is encoded
+to JSON as it is fetched.
+
+Named queries (see kg_queries) are parsed once per ontology load into
+owlready2 prepared queries and executed with typed parameter bindings.
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+
+# SQLite VM instructions between two deadline checks
+_PROGRESS_STEPS = 10000
+
+_local = threading.local()
+_installed = set()
+_install_lock = threading.Lock()
+
+_LITERAL_OR_SPACE_RE = re.compile(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|<[^<>\s]*>)|#[^\n]*|\s+')
+
+
+class QueryTimeout(Exception):
+    """The query exceeded its time budget."""
+
+
+def normalize_query(query):
+    """Cache key of a query: its text without comments, whitespace collapsed.
+
+    Comments and whitespace inside literals and IRIs are kept. The key is
+    not meant to be executed; run the original text.
+    """
+    return _LITERAL_OR_SPACE_RE.sub(lambda m: m.group(1) or ' ', query).strip()
+
+
+def _progress_handler():
+    deadline = getattr(_local, 'deadline', None)
+    return 1 if deadline is not None and time.monotonic() > deadline else 0
+
+
+def _install(world):
+    """Install the deadline check on the world's SQLite connection (once)."""
+    db = world.graph.db
+    if id(db) in _installed:
+        return
+    with _install_lock:
+        if id(db) not in _installed:
+            db.set_progress_handler(_progress_handler, _PROGRESS_STEPS)
+            _installed.add(id(db))
+
+
+def encode_value(value):
+    """JSON-ready form of one result cell: entities as {iri, label}, the rest as strings."""
+    if hasattr(value, 'iri'):
+        return {"iri": value.iri, "label": (getattr(value, 'label', None) or [value.name])[0]}
+    return str(value) if value is not None else None
+
+
+def fetch_page(rows, offset, limit, timeout):
+    """Encode rows ``offset`` to ``offset + limit`` of the ``rows`` generator.
+
+    ``rows`` is created lazily by the caller, e.g.
+    ``lambda: world.sparql(query)``, so that parsing and execution both run
+    under the deadline. Returns (list of JSON-encoded rows, has_more).
+    Raises QueryTimeout when ``timeout`` seconds are exceeded.
+    """
+    deadline = time.monotonic() + timeout
+    _local.deadline = deadline
+    try:
+        encoded = []
+        iterator = rows()
+        for i, row in enumerate(iterator):
+            if time.monotonic() > deadline:
+                raise QueryTimeout()
+            if i < offset:
+                continue
+            if len(encoded) == limit:
+                return encoded, True
+            encoded.append(json.dumps([encode_value(v) for v in row]))
+        return encoded, False
+    except sqlite3.OperationalError as e:
+        if 'interrupted' in str(e):
+            raise QueryTimeout() from e
+        raise
+    finally:
+        _local.deadline = None
+
+
+def run_query(world, query, offset, limit, timeout, params=()):
+    """Page of ``query`` results on ``world``; see ``fetch_page``.
+
+    ``query`` is SPARQL text or a NamedQuery.
+    """
+    _install(world)
+    if isinstance(query, NamedQuery):
+        return fetch_page(lambda: query.prepared.execute(params), offset, limit, timeout)
+    return fetch_page(
+        lambda: world.sparql(query, params, error_on_undefined_entities=False),
+        offset, limit, timeout,
+    )
+
+
+_CASTS = {'str': str, 'int': int, 'float': float}
+
+
+class NamedQuery:
+    """A registry query, parsed once against one ontology world."""
+
+    def __init__(self, world, name, spec):
+        self.name = name
+        self.description = spec.get('description', '')
+        self.params = list(spec['params'])
+        self.query = spec['query']
+        self.prepared = world.prepare_sparql(self.query, error_on_undefined_entities=False)
+
+    def bind(self, world, kw):
+        """Typed parameter values from request params.
+
+        Returns (params, key) where ``key`` is the hashable binding set.
+        Raises ValueError for missing or malformed values and LookupError
+        for IRIs not in the ontology.
+        """
+        values, key = [], []
+        for name, kind in self.params:
+            raw = kw.get(name)
+            if raw is None or raw == '':
+                raise ValueError(f"Missing parameter '{name}'")
+            if kind == 'iri':
+                value = world[raw]
+                if value is None:
+                    raise LookupError(f"Unknown entity: {raw}")
+            else:
+                try:
+                    value = _CASTS[kind](raw)
+                except ValueError:
+                    raise ValueError(f"Parameter '{name}' must be {kind}") from None
+            values.append(value)
+            key.append(raw if kind == 'iri' else value)
+        return tuple(values), tuple(key)
+
+    def describe(self):
+        return {
+            "name": self.name,
+            "description": self.description,
+            "params": [{"name": n, "type": t} for n, t in self.params],
+            "query": self.query,
+        }
+
+
+def prepare_queries(world, specs):
+    """Parse all ``specs`` (name -> declaration) against ``world``."""
+    return {name: NamedQuery(world, name, spec) for name, spec in specs.items()}
+
+
+def page_body(rows, offset, limit, has_more):
+    """Stream the response body from pre-encoded rows."""
+    yield '{"results": ['
+    for i, row in enumerate(rows):
+        yield row if i == 0 else ', ' + row
+    yield '], ' + json.dumps({"count": len(rows), "offset": offset, "limit": limit, "has_more": has_more})[1:]
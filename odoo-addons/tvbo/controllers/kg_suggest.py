@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Typeahead over KG names, labels, symbols and methods.
+
+Every word-start suffix of each value is a path in a character trie, so
+"rit" finds "Jansen Rit". Each trie node keeps its best ``TOP_K`` entries
+(shortest text first), making a lookup one walk down the query's
+characters. The trie is persistent: an incremental update copies only the
+paths it touches, so the previous index can keep serving requests while
+the next one is derived from it.
+"""
+import heapq
+import re
+
+SUGGEST_FIELDS = ("name", "label", "symbol", "method")
+TOP_K = 20
+
+# Longest indexed (and looked up) prefix
+_MAX_DEPTH = 16
+_WORD_START_RE = re.compile(r'\b\w')
+
+
+class _Node:
+    __slots__ = ('children', 'entries', 'top')
+
+    def __init__(self, children=None, entries=frozenset(), top=()):
+        self.children = children if children is not None else {}
+        self.entries = entries
+        self.top = top
+
+    def copy(self):
+        return _Node(self.children, self.entries, self.top)
+
+
+def _compute_top(node):
+    candidates = set(node.entries)
+    for child in node.children.values():
+        candidates.update(child.top)
+    if len(candidates) <= TOP_K:
+        return tuple(sorted(candidates))
+    return tuple(heapq.nsmallest(TOP_K, candidates))
+
+
+def _fill_top(node):
+    """Compute ``top`` bottom-up for a freshly built trie."""
+    for child in node.children.values():
+        _fill_top(child)
+    node.top = _compute_top(node)
+
+
+def _document_terms(key, item):
+    """(path, entry) pairs of one document; entries sort shortest text first.
+
+    ``str(key)`` breaks ties without comparing storids to string keys.
+    """
+    terms = set()
+    for field in SUGGEST_FIELDS:
+        value = item.get(field)
+        if not value or not isinstance(value, str):
+            continue
+        entry = (len(value), value, str(key), key)
+        lowered = value.lower()
+        for match in _WORD_START_RE.finditer(lowered):
+            terms.add((lowered[match.start():match.start() + _MAX_DEPTH], entry))
+    return terms
+
+
+def _insert(node, path, entry):
+    """Trie with ``entry`` added at ``path``, copying only the nodes along it."""
+    node = node.copy() if node is not None else _Node()
+    if path:
+        node.children = dict(node.children)
+        node.children[path[0]] = _insert(node.children.get(path[0]), path[1:], entry)
+    else:
+        node.entries = node.entries | {entry}
+    node.top = _compute_top(node)
+    return node
+
+
+def _remove(node, path, entry):
+    """Trie without ``entry`` at ``path`` (None if the node becomes empty)."""
+    if node is None:
+        return None
+    node = node.copy()
+    if path:
+        node.children = dict(node.children)
+        child = _remove(node.children.get(path[0]), path[1:], entry)
+        if child is None:
+            node.children.pop(path[0], None)
+        else:
+            node.children[path[0]] = child
+    else:
+        node.entries = node.entries - {entry}
+    if not node.children and not node.entries:
+        return None
+    node.top = _compute_top(node)
+    return node
+
+
+class SuggestIndex:
+    """Prefix trie over (key, item) documents. Never mutated after construction."""
+
+    def __init__(self, documents, previous=None):
+        self.docs = dict(documents)
+        self.terms = {}
+        if previous is None:
+            self.root = _Node()
+            for key, item in self.docs.items():
+                self.terms[key] = _document_terms(key, item)
+                for path, entry in self.terms[key]:
+                    node = self.root
+                    for char in path:
+                        child = node.children.get(char)
+                        if child is None:
+                            child = node.children[char] = _Node()
+                        node = child
+                    if not node.entries:
+                        node.entries = set()
+                    node.entries.add(entry)
+            _fill_top(self.root)
+            return
+
+        self.root = previous.root
+        self.terms = dict(previous.terms)
+        for key in previous.docs.keys() - self.docs.keys():
+            for path, entry in self.terms.pop(key):
+                self.root = _remove(self.root, path, entry) or _Node()
+        for key, item in self.docs.items():
+            if previous.docs.get(key) == item:
+                continue
+            terms = _document_terms(key, item)
+            old = self.terms.get(key, set())
+            for path, entry in old - terms:
+                self.root = _remove(self.root, path, entry) or _Node()
+            for path, entry in terms - old:
+                self.root = _insert(self.root, path, entry)
+            self.terms[key] = terms
+
+    def suggest(self, query, limit=10):
+        """Up to ``limit`` (<= TOP_K) suggestions for a prefix, as (text, key, item)."""
+        node = self.root
+        for char in query.lower()[:_MAX_DEPTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [(text, key, self.docs[key]) for _, text, _, key in node.top[:limit]]
@@ -1,28 +1,36 @@
 # -*- coding: utf-8 -*-
 from odoo import http
 from odoo.http import request
+from . import kg_http, kg_metrics
+from .kg_api import tvbo_version
 import json
 import logging
 
 _logger = logging.getLogger(__name__)
 
 
+def _catalogue_validator(env, *args, **kw):
+    """Validator of the configurator routes: any tvbo.* change invalidates them."""
+    return kg_http.catalogue_validator(env)
+
+
 class ModelConfiguratorController(http.Controller):
 
     @http.route('/tvbo/configurator', type='http', auth='public', website=True)
     def model_configurator(self, **kwargs):
         """Main configurator page - data is loaded via API endpoints"""
-        return request.render('tvbo.model_configurator_template', {})
+        return request.render('tvbo.model_configurator_template', {'tvbo_version': tvbo_version()})
 
     # =========================================================================
     # Generic API Endpoints for Configurator Data
     # =========================================================================
 
-    def _json_response(self, data):
-        """Helper to create JSON response"""
+    def _json_response(self, data, status=200):
+        """Helper to create JSON response; failures carry an error status, so they are never cached"""
         return request.make_response(
             json.dumps(data, default=str),
-            headers=[('Content-Type', 'application/json')]
+            headers=[('Content-Type', 'application/json')],
+            status=status,
         )
 
     def _serialize_records(self, records, fields=None):
@@ -35,6 +43,8 @@ class ModelConfiguratorController(http.Controller):
         return records.read()
 
     @http.route('/tvbo/api/configurator/experiments', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_catalogue_validator)
     def api_experiments(self, **kwargs):
         """Get all simulation experiments"""
         try:
@@ -43,9 +53,11 @@ class ModelConfiguratorController(http.Controller):
             return self._json_response({'success': True, 'data': data})
         except Exception as e:
             _logger.error(f"Error in api_experiments: {e}", exc_info=True)
-            return self._json_response({'success': False, 'error': str(e)})
+            return self._json_response({'success': False, 'error': str(e)}, 500)
 
     @http.route('/tvbo/api/configurator/dynamics', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_catalogue_validator)
     def api_dynamics(self, **kwargs):
         """Get all dynamics models"""
         try:
@@ -54,9 +66,11 @@ class ModelConfiguratorController(http.Controller):
             return self._json_response({'success': True, 'data': data})
         except Exception as e:
             _logger.error(f"Error in api_dynamics: {e}", exc_info=True)
-            return self._json_response({'success': False, 'error': str(e)})
+            return self._json_response({'success': False, 'error': str(e)}, 500)
 
     @http.route('/tvbo/api/configurator/dynamics/<int:dynamics_id>', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_catalogue_validator)
     def api_dynamics_detail(self, dynamics_id, **kwargs):
         """
         Get full details of a dynamics model with all nested relations resolved.
@@ -67,7 +81,7 @@ class ModelConfiguratorController(http.Controller):
         try:
             dyn = request.env['tvbo.dynamics'].sudo().browse(dynamics_id)
             if not dyn.exists():
-                return self._json_response({'success': False, 'error': 'Not found'})
+                return self._json_response({'success': False, 'error': 'Not found'}, 404)
             
             # Schema-driven deep resolution - no manual unpacking
             data = self._resolve_record_deep(dyn, depth=3)
@@ -75,9 +89,11 @@ class ModelConfiguratorController(http.Controller):
             return self._json_response({'success': True, 'data': data})
         except Exception as e:
             _logger.error(f"Error in api_dynamics_detail: {e}", exc_info=True)
-            return self._json_response({'success': False, 'error': str(e)})
+            return self._json_response({'success': False, 'error': str(e)}, 500)
 
     @http.route('/tvbo/api/configurator/integrators', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_catalogue_validator)
     def api_integrators(self, **kwargs):
         """Get all integrators"""
         try:
@@ -86,9 +102,11 @@ class ModelConfiguratorController(http.Controller):
             return self._json_response({'success': True, 'data': data})
         except Exception as e:
             _logger.error(f"Error in api_integrators: {e}", exc_info=True)
-            return self._json_response({'success': False, 'error': str(e)})
+            return self._json_response({'success': False, 'error': str(e)}, 500)
 
     @http.route('/tvbo/api/configurator/couplings', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_catalogue_validator)
     def api_couplings(self, **kwargs):
         """Get all coupling functions"""
         try:
@@ -97,9 +115,11 @@ class ModelConfiguratorController(http.Controller):
             return self._json_response({'success': True, 'data': data})
         except Exception as e:
             _logger.error(f"Error in api_couplings: {e}", exc_info=True)
-            return self._json_response({'success': False, 'error': str(e)})
+            return self._json_response({'success': False, 'error': str(e)}, 500)
 
     @http.route('/tvbo/api/configurator/networks', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_catalogue_validator)
     def api_networks(self, **kwargs):
         """Get all networks"""
         try:
@@ -108,9 +128,11 @@ class ModelConfiguratorController(http.Controller):
             return self._json_response({'success': True, 'data': data})
         except Exception as e:
             _logger.error(f"Error in api_networks: {e}", exc_info=True)
-            return self._json_response({'success': False, 'error': str(e)})
+            return self._json_response({'success': False, 'error': str(e)}, 500)
 
     @http.route('/tvbo/api/configurator/monitors', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_catalogue_validator)
     def api_monitors(self, **kwargs):
         """Get all monitors"""
         try:
@@ -119,9 +141,11 @@ class ModelConfiguratorController(http.Controller):
             return self._json_response({'success': True, 'data': data})
         except Exception as e:
             _logger.error(f"Error in api_monitors: {e}", exc_info=True)
-            return self._json_response({'success': False, 'error': str(e)})
+            return self._json_response({'success': False, 'error': str(e)}, 500)
 
     @http.route('/tvbo/api/configurator/experiment/<int:experiment_id>', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_catalogue_validator)
     def api_experiment_detail(self, experiment_id, **kwargs):
         """
         Get full experiment details with all nested relations resolved.
@@ -132,7 +156,7 @@ class ModelConfiguratorController(http.Controller):
         try:
             exp = request.env['tvbo.simulation_experiment'].sudo().browse(experiment_id)
             if not exp.exists():
-                return self._json_response({'success': False, 'error': 'Experiment not found'})
+                return self._json_response({'success': False, 'error': 'Experiment not found'}, 404)
 
             # Schema-driven deep resolution - no manual unpacking
             data = self._resolve_record_deep(exp, depth=4)
@@ -140,7 +164,7 @@ class ModelConfiguratorController(http.Controller):
             return self._json_response({'success': True, 'data': data})
         except Exception as e:
             _logger.error(f"Error in api_experiment_detail: {e}", exc_info=True)
-            return self._json_response({'success': False, 'error': str(e)})
+            return self._json_response({'success': False, 'error': str(e)}, 500)
 
     def _resolve_record_deep(self, record, depth=3):
         """
@@ -188,6 +212,8 @@ class ModelConfiguratorController(http.Controller):
         return data
 
     @http.route('/tvbo/api/configurator/experiment/<int:experiment_id>/yaml', type='http', auth='public', methods=['GET'], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(_catalogue_validator)
     def api_experiment_yaml(self, experiment_id, **kwargs):
         """Export experiment as YAML using Pydantic SimulationExperiment model"""
         try:
@@ -196,7 +222,7 @@ class ModelConfiguratorController(http.Controller):
 
             exp = request.env['tvbo.simulation_experiment'].sudo().browse(experiment_id)
             if not exp.exists():
-                return self._json_response({'success': False, 'error': 'Experiment not found'})
+                return self._json_response({'success': False, 'error': 'Experiment not found'}, 404)
 
             # Convert Odoo record to Pydantic model
             pydantic_exp = self._odoo_to_pydantic(exp)
@@ -214,10 +240,10 @@ class ModelConfiguratorController(http.Controller):
             )
         except ImportError as e:
             _logger.error(f"tvbo package not available: {e}")
-            return self._json_response({'success': False, 'error': 'tvbo package not installed'})
+            return self._json_response({'success': False, 'error': 'tvbo package not installed'}, 503)
         except Exception as e:
             _logger.error(f"Error in api_experiment_yaml: {e}", exc_info=True)
-            return self._json_response({'success': False, 'error': str(e)})
+            return self._json_response({'success': False, 'error': str(e)}, 500)
 
     def _odoo_to_pydantic(self, odoo_record, pydantic_class=None):
         """
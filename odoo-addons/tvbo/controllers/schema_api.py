@@ -1,10 +1,33 @@
 # -*- coding: utf-8 -*-
-from odoo import http
+"""
+Pydantic datamodel schemas for the experiment builder.
+
+The schemas and enums only change when the tvbo package is upgraded, so
+they are introspected once per tvbo version and served from memory;
+``/tvbo/api/schema/all`` returns all of them, plus the KG class schemas, in
+one response that is cached forever under a versioned URL. All schema
+routes are public, like the configurator page that uses them.
+"""
+import json
+import threading
 from typing import get_origin, get_args, Union
 
+from odoo import http
+from odoo.http import Response
+
+from . import kg_http, kg_metrics
+from .kg_api import get_class_schemas, tvbo_version
+
 # Lazy import flag - imports are deferred to avoid circular import with tvbo package
 _pydantic_classes = None
 
+# Models served by /tvbo/api/schema/model/<model_name>
+SCHEMA_MODELS = ('Monitor', 'ObservationModel', 'ProcessingStep', 'DataInjection', 'ArgumentMapping')
+
+# Model schemas and enums as (tvbo version, schemas, encoded /all body)
+_schemas = None
+_schemas_lock = threading.Lock()
+
 
 def _get_pydantic_classes():
     """Lazily import Pydantic classes to avoid circular import."""
@@ -33,142 +56,182 @@ def _get_pydantic_classes():
     return _pydantic_classes
 
 
+def _extract_field_schema(model_class):
+    """Extract field information from a Pydantic model"""
+    schema = {
+        "name": model_class.__name__,
+        "doc": model_class.__doc__,
+        "fields": [],
+    }
+
+    # Get model fields
+    for field_name, field_info in model_class.model_fields.items():
+        field_schema = _process_field(field_name, field_info)
+        schema["fields"].append(field_schema)
+
+    return schema
+
+
+def _process_field(field_name, field_info):
+    """Process a single Pydantic field"""
+    field_type = field_info.annotation
+
+    # Extract base type and check if optional
+    is_optional = False
+    is_list = False
+    base_type = field_type
+
+    # Handle Union types (Optional is Union[T, None])
+    origin = get_origin(field_type)
+    if origin is Union:
+        args = get_args(field_type)
+        # Check if it's Optional (Union with None)
+        if type(None) in args:
+            is_optional = True
+            # Get the non-None type
+            base_type = next((arg for arg in args if arg is not type(None)), str)
+            origin = get_origin(base_type)
+
+    # Handle list types
+    if origin is list:
+        is_list = True
+        list_args = get_args(base_type)
+        if list_args:
+            base_type = list_args[0]
+
+    # Determine field type category
+    type_name = _get_type_name(base_type)
+
+    # Get enum values if applicable
+    enum_values = None
+    if hasattr(base_type, "__members__"):  # It's an enum
+        enum_values = [{"value": v.value, "label": v.name} for v in base_type]
+
+    # Get description
+    description = field_info.description or ""
+
+    # Get default value
+    default = None
+    if field_info.default is not None and field_info.default != ...:
+        default = str(field_info.default)
+
+    return {
+        "name": field_name,
+        "type": type_name,
+        "is_optional": is_optional,
+        "is_list": is_list,
+        "required": field_info.is_required(),
+        "description": description,
+        "default": default,
+        "enum_values": enum_values,
+    }
+
+
+def _get_type_name(python_type):
+    """Convert Python type to a simple string representation"""
+    if python_type is str:
+        return "string"
+    elif python_type is int:
+        return "integer"
+    elif python_type is float:
+        return "float"
+    elif python_type is bool:
+        return "boolean"
+    elif hasattr(python_type, "__name__"):
+        # Check if it's an enum
+        if hasattr(python_type, "__members__"):
+            return "enum"
+        # Check if it's a Pydantic model
+        if hasattr(python_type, "model_fields"):
+            return "object"
+        return python_type.__name__
+    else:
+        return "unknown"
+
+
+def _compute_schemas():
+    pydantic_classes = _get_pydantic_classes()
+    if not pydantic_classes:
+        return None
+    ImagingModality = pydantic_classes.get('ImagingModality')
+    OperationType = pydantic_classes.get('OperationType')
+
+    enums = {}
+    if ImagingModality:
+        enums["ImagingModality"] = [
+            {"value": v.value, "label": v.name, "doc": getattr(v, '__doc__', '')}
+            for v in ImagingModality
+        ]
+    if OperationType:
+        enums["OperationType"] = [
+            {"value": v.value, "label": v.name} for v in OperationType
+        ]
+    return {
+        "version": tvbo_version(),
+        "models": {
+            name: _extract_field_schema(pydantic_classes[name]) for name in SCHEMA_MODELS if name in pydantic_classes
+        },
+        "enums": enums,
+        "classes": get_class_schemas(),
+    }
+
+
+def get_schemas():
+    """(schemas, encoded JSON body), introspected once per tvbo version.
+
+    ``schemas`` is None when the Pydantic models are not available.
+    """
+    global _schemas
+    version = tvbo_version()
+    if _schemas is None or _schemas[0] != version:
+        with _schemas_lock:
+            if _schemas is None or _schemas[0] != version:
+                schemas = _compute_schemas()
+                _schemas = (version, schemas, json.dumps(schemas, default=str).encode())
+    return _schemas[1], _schemas[2]
+
+
 class SchemaAPIController(http.Controller):
 
     @http.route(
         "/tvbo/api/schema/model/<string:model_name>",
         type="jsonrpc",
-        auth="user",
+        auth="public",
         methods=["GET"],
     )
+    @kg_metrics.instrument
     def get_model_schema(self, model_name, **kwargs):
         """Get Pydantic schema for a given model class"""
-        pydantic_classes = _get_pydantic_classes()
-        if not pydantic_classes:
+        schemas = get_schemas()[0]
+        if schemas is None:
             return {"error": "Pydantic models not available"}
-
-        model_map = {
-            "Monitor": pydantic_classes.get('Monitor'),
-            "ObservationModel": pydantic_classes.get('ObservationModel'),
-            "ProcessingStep": pydantic_classes.get('ProcessingStep'),
-            "DataInjection": pydantic_classes.get('DataInjection'),
-            "ArgumentMapping": pydantic_classes.get('ArgumentMapping'),
-        }
-
-        model_class = model_map.get(model_name)
-        if not model_class:
+        if model_name not in schemas["models"]:
             return {"error": f"Model {model_name} not found"}
+        return schemas["models"][model_name]
 
-        return self._extract_field_schema(model_class)
-
-    def _extract_field_schema(self, model_class):
-        """Extract field information from a Pydantic model"""
-        schema = {
-            "name": model_class.__name__,
-            "doc": model_class.__doc__,
-            "fields": [],
-        }
-
-        # Get model fields
-        for field_name, field_info in model_class.model_fields.items():
-            field_schema = self._process_field(field_name, field_info)
-            schema["fields"].append(field_schema)
-
-        return schema
-
-    def _process_field(self, field_name, field_info):
-        """Process a single Pydantic field"""
-        field_type = field_info.annotation
-
-        # Extract base type and check if optional
-        is_optional = False
-        is_list = False
-        base_type = field_type
-
-        # Handle Union types (Optional is Union[T, None])
-        origin = get_origin(field_type)
-        if origin is Union:
-            args = get_args(field_type)
-            # Check if it's Optional (Union with None)
-            if type(None) in args:
-                is_optional = True
-                # Get the non-None type
-                base_type = next((arg for arg in args if arg is not type(None)), str)
-                origin = get_origin(base_type)
-
-        # Handle list types
-        if origin is list:
-            is_list = True
-            list_args = get_args(base_type)
-            if list_args:
-                base_type = list_args[0]
-
-        # Determine field type category
-        type_name = self._get_type_name(base_type)
-
-        # Get enum values if applicable
-        enum_values = None
-        if hasattr(base_type, "__members__"):  # It's an enum
-            enum_values = [{"value": v.value, "label": v.name} for v in base_type]
-
-        # Get description
-        description = field_info.description or ""
-
-        # Get default value
-        default = None
-        if field_info.default is not None and field_info.default != ...:
-            default = str(field_info.default)
-
-        return {
-            "name": field_name,
-            "type": type_name,
-            "is_optional": is_optional,
-            "is_list": is_list,
-            "required": field_info.is_required(),
-            "description": description,
-            "default": default,
-            "enum_values": enum_values,
-        }
-
-    def _get_type_name(self, python_type):
-        """Convert Python type to a simple string representation"""
-        if python_type is str:
-            return "string"
-        elif python_type is int:
-            return "integer"
-        elif python_type is float:
-            return "float"
-        elif python_type is bool:
-            return "boolean"
-        elif hasattr(python_type, "__name__"):
-            # Check if it's an enum
-            if hasattr(python_type, "__members__"):
-                return "enum"
-            # Check if it's a Pydantic model
-            if hasattr(python_type, "model_fields"):
-                return "object"
-            return python_type.__name__
-        else:
-            return "unknown"
-
-    @http.route("/tvbo/api/schema/enums", type="jsonrpc", auth="user", methods=["GET"])
+    @http.route("/tvbo/api/schema/enums", type="jsonrpc", auth="public", methods=["GET"])
+    @kg_metrics.instrument
     def get_enums(self, **kwargs):
         """Get all available enum types"""
-        pydantic_classes = _get_pydantic_classes()
-        if not pydantic_classes:
+        schemas = get_schemas()[0]
+        if schemas is None:
             return {"error": "Pydantic models not available"}
+        return schemas["enums"]
 
-        ImagingModality = pydantic_classes.get('ImagingModality')
-        OperationType = pydantic_classes.get('OperationType')
-
-        result = {}
-        if ImagingModality:
-            result["ImagingModality"] = [
-                {"value": v.value, "label": v.name, "doc": getattr(v, '__doc__', '')}
-                for v in ImagingModality
-            ]
-        if OperationType:
-            result["OperationType"] = [
-                {"value": v.value, "label": v.name} for v in OperationType
-            ]
-        return result
+    @http.route("/tvbo/api/schema/all", type="http", auth="public", methods=["GET"], csrf=False)
+    @kg_metrics.instrument
+    @kg_http.conditional(
+        lambda env, **kw: kg_http.validator("static"),
+        lambda kw: kg_http.versioned_cache_control(kw, tvbo_version(), 'public, max-age=3600'),
+    )
+    def get_all_schemas(self, **kwargs):
+        """All model schemas, enums and KG class schemas in one response.
+
+        Immutable when requested as ``?v=<version>`` with the current tvbo
+        version (the ``version`` field of the response).
+        """
+        schemas, body = get_schemas()
+        if schemas is None:
+            return Response(json.dumps({"error": "Pydantic models not available"}),
+                            content_type="application/json", status=503)
+        return Response(body, content_type="application/json", headers={"Access-Control-Allow-Origin": "*"})
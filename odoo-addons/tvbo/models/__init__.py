@@ -1,2 +1,5 @@
 from . import schema_models
 from . import literature
+from . import kg_catalogue
+from . import kg_fulltext
+from . import kg_related
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""Catalogue version for the knowledge graph API.
+
+Every create/write/unlink on a ``tvbo.*`` model bumps the catalogue version
+once the transaction commits: a new version is drawn from a PostgreSQL
+sequence and logged in a table. Controllers compare the version with the
+one of their in-memory snapshot and rebuild only when it moved, which also
+works across prefork workers.
+
+The version is read from the log, not the sequence. Sequences ignore
+transaction snapshots, while Odoo requests run in REPEATABLE READ: a
+request whose snapshot predates a commit could see the new sequence value
+but not the new data, and cache old data under the new version. A log row
+is only visible to snapshots taken after the bump, hence after the data.
+
+Each bump is logged with a watermark: the start of the oldest transaction
+still running at that moment. Every change committed after the bump was
+made by a transaction that started at or after the watermark, so its
+``write_date`` (the transaction start) is >= watermark. The records changed
+since version V are therefore the ones with ``write_date`` >= watermark(V),
+plus the tombstones recorded by ``unlink`` since then.
+"""
+
+from odoo import SUPERUSER_ID, api, models
+
+_VERSION_SEQUENCE = "tvbo_kg_version_seq"
+_VERSION_LOG = "tvbo_kg_version_log"
+_TOMBSTONES = "tvbo_kg_tombstone"
+# Version log and tombstones are pruned after this; older versions need a full resync
+_CHANGES_RETENTION = "30 days"
+
+
+class KGCatalogue(models.AbstractModel):
+    _name = "tvbo.kg_catalogue"
+    _description = "Knowledge graph catalogue version"
+
+    def init(self):
+        cr = self.env.cr
+        cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {_VERSION_SEQUENCE}")
+        cr.execute(
+            f"CREATE TABLE IF NOT EXISTS {_VERSION_LOG} "
+            f"(version bigint PRIMARY KEY, watermark timestamp NOT NULL)"
+        )
+        cr.execute(
+            f"ALTER TABLE {_VERSION_LOG} ADD COLUMN IF NOT EXISTS "
+            f"bumped_at timestamp DEFAULT (now() AT TIME ZONE 'UTC')"
+        )
+        cr.execute(
+            f"CREATE TABLE IF NOT EXISTS {_TOMBSTONES} ("
+            f"res_model varchar NOT NULL, res_id integer NOT NULL, "
+            f"deleted_at timestamp NOT NULL DEFAULT (now() AT TIME ZONE 'UTC'))"
+        )
+        cr.execute(f"CREATE INDEX IF NOT EXISTS {_TOMBSTONES}_deleted_at_idx ON {_TOMBSTONES} (deleted_at)")
+
+    @api.model
+    def get_version(self):
+        """Latest catalogue version visible to this transaction; 0 before the first bump.
+
+        Data read in the same transaction is at least as recent as the version.
+        """
+        self.env.cr.execute(f"SELECT coalesce(max(version), 0) FROM {_VERSION_LOG}")
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def get_last_change(self):
+        """(version, time of its bump) of the latest catalogue version; (0, None) before the first bump.
+
+        Unlike the ``write_date`` of the records, the bump time also moves
+        when records are deleted.
+        """
+        self.env.cr.execute(f"SELECT version, bumped_at FROM {_VERSION_LOG} ORDER BY version DESC LIMIT 1")
+        return self.env.cr.fetchone() or (0, None)
+
+    @api.model
+    def get_changes(self, since, model_names, embedded=None):
+        """Records of ``model_names`` changed after catalogue version ``since``.
+
+        ``embedded`` maps model names to many2one fields whose records are
+        part of the model's payload: a record also counts as updated when
+        the record it points to was written. Returns (version, updated,
+        deleted) where ``updated`` and ``deleted`` map model names to ids;
+        ``version`` is read first, so the changes cover at least everything
+        up to it (a change may be reported again by the next call).
+        ``updated`` and ``deleted`` are None when ``since`` is unknown or
+        already pruned, or when an embedded record was deleted (the
+        referencing records are not known any more): the caller must resync.
+        """
+        cr = self.env.cr
+        embedded = embedded or {}
+        version = self.get_version()
+        if since == version:
+            return version, {}, {}
+        cr.execute(f"SELECT watermark FROM {_VERSION_LOG} WHERE version = %s AND version < %s", (since, version))
+        row = cr.fetchone()
+        if row is None:
+            return version, None, None
+        watermark = row[0]
+
+        comodels = sorted({
+            self.env[name]._fields[field].comodel_name for name, fields in embedded.items() for field in fields
+        })
+        if comodels:
+            cr.execute(
+                f"SELECT 1 FROM {_TOMBSTONES} WHERE deleted_at >= %s AND res_model = ANY(%s) LIMIT 1",
+                (watermark, comodels),
+            )
+            if cr.fetchone():
+                return version, None, None
+
+        updated = {}
+        for name in model_names:
+            table = self.env[name]._table
+            conditions = ["t.write_date >= %(watermark)s"]
+            joins = []
+            for i, field in enumerate(embedded.get(name, ())):
+                comodel = self.env[self.env[name]._fields[field].comodel_name]
+                joins.append(f'LEFT JOIN "{comodel._table}" e{i} ON e{i}.id = t."{field}"')
+                conditions.append(f"e{i}.write_date >= %(watermark)s")
+            cr.execute(
+                f'SELECT t.id FROM "{table}" t {" ".join(joins)} WHERE {" OR ".join(conditions)} ORDER BY t.id',
+                {"watermark": watermark},
+            )
+            updated[name] = [r[0] for r in cr.fetchall()]
+        cr.execute(
+            f"SELECT res_model, array_agg(DISTINCT res_id) FROM {_TOMBSTONES} "
+            f"WHERE deleted_at >= %s AND res_model = ANY(%s) GROUP BY res_model",
+            (watermark, list(model_names)),
+        )
+        deleted = dict(cr.fetchall())
+        return version, updated, deleted
+
+    @api.model
+    def add_tombstones(self, model_name, ids):
+        """Record the deletion of ``ids`` for the change feed."""
+        self.env.cr.execute(
+            f"INSERT INTO {_TOMBSTONES} (res_model, res_id) SELECT %s, unnest(%s)",
+            (model_name, list(ids)),
+        )
+
+    @api.model
+    def mark_dirty(self):
+        """Bump the catalogue version after the current transaction commits.
+
+        The version and its log row are committed after the data, so a
+        transaction that reads the new version from the log also sees the
+        new data (see ``get_version``). The bump also triggers the job that
+        refreshes the related items (``tvbo.kg_related``).
+        """
+        cr = self.env.cr
+        if cr.postcommit.data.get("tvbo.kg_dirty"):
+            return
+        cr.postcommit.data["tvbo.kg_dirty"] = True
+        registry = self.env.registry
+
+        def bump():
+            with registry.cursor() as new_cr:
+                new_cr.execute(
+                    f"""
+                    INSERT INTO {_VERSION_LOG} (version, watermark)
+                    SELECT nextval('{_VERSION_SEQUENCE}'), min(xact_start) AT TIME ZONE 'UTC'
+                      FROM pg_stat_activity
+                     WHERE datname = current_database()
+                    """
+                )
+                new_cr.execute(
+                    f"DELETE FROM {_VERSION_LOG} "
+                    f"WHERE watermark < (now() AT TIME ZONE 'UTC') - interval '{_CHANGES_RETENTION}' "
+                    f"AND version < (SELECT max(version) FROM {_VERSION_LOG})"
+                )
+                new_cr.execute(
+                    f"DELETE FROM {_TOMBSTONES} "
+                    f"WHERE deleted_at < (now() AT TIME ZONE 'UTC') - interval '{_CHANGES_RETENTION}'"
+                )
+                # In the bump's transaction, so the job sees the new version
+                cron = api.Environment(new_cr, SUPERUSER_ID, {}).ref("tvbo.ir_cron_kg_related", raise_if_not_found=False)
+                if cron:
+                    cron._trigger()
+
+        cr.postcommit.add(bump)
+
+
+class Base(models.AbstractModel):
+    _inherit = "base"
+
+    def _tvbo_kg_tracked(self):
+        return self._name.startswith("tvbo.") and not self._abstract
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if self._tvbo_kg_tracked():
+            self.env["tvbo.kg_catalogue"].mark_dirty()
+        return records
+
+    def write(self, vals):
+        if self and self._tvbo_kg_tracked():
+            self.env["tvbo.kg_catalogue"].mark_dirty()
+        return super().write(vals)
+
+    def unlink(self):
+        if self and self._tvbo_kg_tracked():
+            catalogue = self.env["tvbo.kg_catalogue"]
+            catalogue.mark_dirty()
+            catalogue.add_tombstones(self._name, self.ids)
+        return super().unlink()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Database-side catalogue search.
+
+Searchable models get a stored, generated ``tsvector`` column (maintained by
+PostgreSQL on every write) with a GIN index, plus ``pg_trgm`` GIN indexes
+on their name, label and title columns. ``tvbo.kg_fulltext.search_ranked``
+runs ranked, paginated full-text or fuzzy queries against them, so
+matching and ranking happen in the database instead of the worker.
+"""
+
+import logging
+
+from odoo import api, models
+
+_logger = logging.getLogger(__name__)
+
+_VECTOR_COLUMN = "tvbo_search_vector"
+_TS_CONFIG = "english"
+
+# model -> ({column: tsvector weight}, trigram-indexed columns)
+FULLTEXT_MODELS = {
+    "tvbo.dynamics": ({"name": "A", "label": "A", "description": "B"}, ("name", "label")),
+    "tvbo.simulation_study": ({"title": "A", "label": "A", "description": "B"}, ("title", "label")),
+    "tvbo.literature_reference": ({"title": "A", "abstract": "B"}, ("title",)),
+}
+
+
+class KGFulltext(models.AbstractModel):
+    _name = "tvbo.kg_fulltext"
+    _description = "Knowledge graph full-text search"
+
+    def _has_trigram(self):
+        self.env.cr.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return bool(self.env.cr.fetchone())
+
+    @api.model
+    def _setup_model(self, model_name):
+        """Create the search vector column and the search indexes of one model."""
+        cr = self.env.cr
+        table = self.env[model_name]._table
+        weights, trigram_columns = FULLTEXT_MODELS[model_name]
+        vector = " || ".join(
+            f"setweight(to_tsvector('{_TS_CONFIG}', coalesce({column}, '')), '{weight}')"
+            for column, weight in weights.items()
+        )
+        cr.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {_VECTOR_COLUMN} tsvector "
+            f"GENERATED ALWAYS AS ({vector}) STORED"
+        )
+        cr.execute(f"CREATE INDEX IF NOT EXISTS {table}_search_vector_idx ON {table} USING gin ({_VECTOR_COLUMN})")
+
+        if not self._has_trigram():
+            try:
+                with cr.savepoint():
+                    cr.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            except Exception as e:
+                _logger.warning(f"pg_trgm unavailable, fuzzy search disabled: {e}")
+                return
+        for column in trigram_columns:
+            cr.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_{column}_trgm_idx ON {table} USING gin ({column} gin_trgm_ops)"
+            )
+
+    @api.model
+    def search_ranked(self, model_name, query, mode="fulltext", limit=20, offset=0):
+        """Ranked ids of ``model_name`` records matching ``query``.
+
+        ``mode`` is "fulltext" (web-search syntax over the weighted vector,
+        ranked by ts_rank_cd) or "fuzzy" (trigram similarity against the
+        name/label/title columns). Returns (total, [(id, rank), ...]);
+        ``total`` counts all matches, also for a page past the last one.
+        """
+        cr = self.env.cr
+        table = self.env[model_name]._table
+        weights, trigram_columns = FULLTEXT_MODELS[model_name]
+        params = {"q": query, "limit": limit, "offset": offset}
+        if mode == "fulltext":
+            rank = f"ts_rank_cd({_VECTOR_COLUMN}, query)"
+            matches = (
+                f"FROM {table}, websearch_to_tsquery('{_TS_CONFIG}', %(q)s) AS query "
+                f"WHERE {_VECTOR_COLUMN} @@ query"
+            )
+        elif mode == "fuzzy":
+            if not self._has_trigram():
+                raise ValueError("Fuzzy search requires the pg_trgm extension")
+            rank = "GREATEST({})".format(
+                ", ".join(f"similarity(coalesce({c}, ''), %(q)s)" for c in trigram_columns)
+            )
+            matches = f"FROM {table} WHERE " + " OR ".join(f"{c} %% %(q)s" for c in trigram_columns)
+        else:
+            raise ValueError(f"Unknown search mode: {mode}")
+        cr.execute(
+            f"""
+            SELECT id, {rank} AS rank, count(*) OVER ()
+              {matches}
+          ORDER BY rank DESC, id
+             LIMIT %(limit)s OFFSET %(offset)s
+            """,
+            params,
+        )
+        rows = cr.fetchall()
+        if rows:
+            total = rows[0][2]
+        elif offset:
+            # Past the last match, no row carries the window count
+            cr.execute(f"SELECT count(*) {matches}", params)
+            total = cr.fetchone()[0]
+        else:
+            total = 0
+        return total, [(row[0], row[1]) for row in rows]
+
+
+class Dynamics(models.Model):
+    _inherit = "tvbo.dynamics"
+
+    def init(self):
+        super().init()
+        self.env["tvbo.kg_fulltext"]._setup_model(self._name)
+
+
+class SimulationStudy(models.Model):
+    _inherit = "tvbo.simulation_study"
+
+    def init(self):
+        super().init()
+        self.env["tvbo.kg_fulltext"]._setup_model(self._name)
+
+
+class LiteratureReference(models.Model):
+    _inherit = "tvbo.literature_reference"
+
+    def init(self):
+        super().init()
+        self.env["tvbo.kg_fulltext"]._setup_model(self._name)
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""
+Related items: structural similarity between KG items of one type.
+
+Each item is reduced to a set of features read from the database (see
+``FEATURES``): for dynamics their parameter names, state variable symbols,
+equation tokens and system type; for couplings their parameters and
+expressions; for experiments the dynamics, coupling and network they use.
+Items are compared by the Jaccard similarity of these sets, estimated from
+MinHash signatures. Locality-sensitive hashing (signatures cut into bands,
+items sharing a band become candidates) restricts the comparisons to likely
+matches, and the ``TOP_K`` most similar items of every item are computed
+when the index is built.
+
+An index built from the previous one reuses the signatures of items whose
+features did not change and recomputes neighbours only for the items the
+changes can affect; the result is the same as a full build.
+
+Building runs in a cron job (``tvbo.kg_related``), triggered by every bump
+of the catalogue version, which stores the neighbours in a table: a lookup
+is one indexed query and never waits for a build. The job keeps the last
+index of each type in memory to update it incrementally.
+"""
+import hashlib
+import logging
+import re
+from collections import defaultdict
+
+import numpy as np
+
+from odoo import api, models
+
+_logger = logging.getLogger(__name__)
+
+# KG type -> [(feature kind, field path from the KG model to the value, split into tokens)]
+FEATURES = {
+    'dynamics': [
+        ('param', ('parameters', 'name'), False),
+        ('state', ('state_variables', 'symbol'), False),
+        ('eq', ('state_variables', 'equation', 'righthandside'), True),
+        ('system_type', ('system_type', 'technical_name'), False),
+    ],
+    'coupling': [
+        ('param', ('parameters', 'name'), False),
+        ('eq', ('coupling_function', 'righthandside'), True),
+        ('pre', ('pre_expression', 'righthandside'), True),
+        ('post', ('post_expression', 'righthandside'), True),
+        ('delayed', ('delayed',), False),
+    ],
+    'experiment': [
+        ('dynamics', ('dynamics',), False),
+        ('dynamics', ('model',), False),
+        ('coupling', ('coupling',), False),
+        ('network', ('network',), False),
+    ],
+}
+
+# KG type -> Odoo model
+RELATED_MODELS = {
+    'dynamics': 'tvbo.dynamics',
+    'coupling': 'tvbo.coupling',
+    'experiment': 'tvbo.simulation_experiment',
+}
+
+NUM_PERM = 64
+# Bands of NUM_PERM // BANDS rows: pairs above ~0.2 similarity very likely share a band
+BANDS = 32
+TOP_K = 20
+MIN_SIMILARITY = 0.1
+
+# Most candidates taken from one band; members of larger buckets are
+# compared with the members next to them in the bucket
+_MAX_BUCKET = 32
+# Beyond this share of changed items, an update recomputes all neighbours
+_MAX_INCREMENTAL = 0.1
+# Rows whose candidate pairs are scored together
+_CHUNK = 256
+
+_TOKEN_RE = re.compile(r'[A-Za-z_]\w*')
+_PRIME = (1 << 61) - 1
+_MASK = np.uint64(0xFFFFFFFF)
+# Fixed seed: signatures must agree between builds and workers
+_rng = np.random.default_rng(0)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+
+# ===================
+# Features
+# ===================
+
+def _feature_query(env, model_name, path):
+    """SQL selecting (record id, value) at the end of a field path, in one query."""
+    model = env[model_name]
+    joins = []
+    alias = 't0'
+    for depth, name in enumerate(path):
+        field = model._fields[name]
+        if field.type == 'many2many':
+            relation = f'r{depth}'
+            joins.append(f'JOIN "{field.relation}" {relation} ON {relation}."{field.column1}" = {alias}.id')
+            column = f'{relation}."{field.column2}"'
+        else:
+            column = f'{alias}."{name}"'
+        if depth == len(path) - 1:
+            break
+        model = env[field.comodel_name]
+        alias = f't{depth + 1}'
+        joins.append(f'JOIN "{model._table}" {alias} ON {alias}.id = {column}')
+    return f'SELECT t0.id, {column} FROM "{env[model_name]._table}" t0 {" ".join(joins)} WHERE {column} IS NOT NULL'
+
+
+def read_features(env, kg_type, model_name):
+    """{record id: set of "kind:value" features} of the records of ``model_name``.
+
+    One query per feature; records without any feature are absent.
+    """
+    features = defaultdict(set)
+    for kind, path, tokenize in FEATURES[kg_type]:
+        env.cr.execute(_feature_query(env, model_name, path))
+        for record_id, value in env.cr.fetchall():
+            if tokenize:
+                features[record_id].update(f'{kind}:{token}' for token in _TOKEN_RE.findall(value))
+            else:
+                features[record_id].add(f'{kind}:{value}')
+    return features
+
+
+# ===================
+# MinHash / LSH
+# ===================
+
+def _hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=4).digest(), 'little')
+
+
+def _digest(features):
+    """64-bit fingerprint of a feature set, to detect unchanged items."""
+    return int.from_bytes(hashlib.blake2b('\0'.join(sorted(features)).encode(), digest_size=8).digest(), 'little')
+
+
+def _signature(features, hashes):
+    """MinHash signature of a non-empty feature set; ``hashes`` memoizes feature hashes."""
+    values = np.array([hashes[f] if f in hashes else hashes.setdefault(f, _hash(f)) for f in features],
+                      dtype=np.uint64)
+    return (((values[:, None] * _A + _B) % _PRIME) & _MASK).min(axis=0)
+
+
+def _band_hashes(signatures):
+    """One uint64 per band and row, combining the band's signature values."""
+    bands = signatures.reshape(len(signatures), BANDS, NUM_PERM // BANDS).astype(np.uint64)
+    combined = np.zeros(bands.shape[:2], dtype=np.uint64)
+    for i in range(bands.shape[2]):
+        combined = (combined * np.uint64(1000003)) ^ bands[:, :, i]
+    return combined
+
+
+class SimilarityIndex:
+    """Precomputed most similar items of one KG type. Never mutated after construction."""
+
+    def __init__(self, features, previous=None):
+        """``features`` maps record ids to feature sets; empty sets are left out."""
+        features = {record_id: f for record_id, f in features.items() if f}
+        self.ids = np.array(sorted(features), dtype=np.int64)
+        self.rows = {record_id: row for row, record_id in enumerate(self.ids.tolist())}
+        n = len(self.ids)
+        self.digests = np.array([_digest(features[i]) for i in self.rows], dtype=np.uint64)
+
+        self.signatures = np.empty((n, NUM_PERM), dtype=np.uint32)
+        # Row of each unchanged item in ``previous`` (-1 for new and changed items)
+        reused = np.full(n, -1, dtype=np.int64)
+        hashes = {}
+        for record_id, row in self.rows.items():
+            old = previous.rows.get(record_id) if previous is not None else None
+            if old is not None and previous.digests[old] == self.digests[row]:
+                self.signatures[row] = previous.signatures[old]
+                reused[row] = old
+            else:
+                self.signatures[row] = _signature(features[record_id], hashes)
+
+        self.bands = _band_hashes(self.signatures)
+        self._order = np.argsort(self.bands, axis=0, kind='stable').astype(np.int32)
+        self._sorted = np.take_along_axis(self.bands, self._order, axis=0)
+        self._rank = np.empty_like(self._order)
+        for band in range(BANDS):
+            self._rank[self._order[:, band], band] = np.arange(n, dtype=np.int32)
+
+        self.neighbours = np.full((n, TOP_K), -1, dtype=np.int32)
+        self.scores = np.zeros((n, TOP_K), dtype=np.float32)
+        self._fill(self._affected(previous, reused) if previous is not None else np.arange(n))
+
+    def _affected(self, previous, reused):
+        """Rows needing new neighbours; carries over those of all other rows."""
+        changed = np.flatnonzero(reused < 0)
+        dropped = len(previous.ids) - (len(reused) - len(changed))
+        if len(changed) + dropped > _MAX_INCREMENTAL * max(len(reused), 1):
+            return np.arange(len(reused))
+
+        kept = np.flatnonzero(reused >= 0)
+        remap = np.full(len(previous.ids), -1, dtype=np.int32)
+        remap[reused[kept]] = kept
+        old = previous.neighbours[reused[kept]]
+        carried = np.where(old >= 0, remap[np.maximum(old, 0)], -1)
+        self.neighbours[kept] = carried
+        self.scores[kept] = previous.scores[reused[kept]]
+
+        # Lost a neighbour that changed or was deleted, or may gain a changed item
+        affected = set(changed.tolist())
+        affected.update(kept[((old >= 0) & (carried < 0)).any(axis=1)].tolist())
+        for _, candidates in self._pairs(changed):
+            affected.update(candidates.tolist())
+        # Windows over large buckets move when their members change: the
+        # members of such buckets, before and after, get new candidates
+        affected.update(self._windowed(changed))
+        gone = np.setdiff1d(np.arange(len(previous.ids)), reused[kept])
+        moved = remap[sorted(previous._windowed(gone))]
+        affected.update(moved[moved >= 0].tolist())
+        return np.array(sorted(affected), dtype=np.int64)
+
+    def _windowed(self, rows):
+        """Rows sharing a bucket of more than _MAX_BUCKET rows with any of ``rows``."""
+        members = set()
+        for band in range(BANDS):
+            values = self._sorted[:, band]
+            keys = np.unique(self.bands[rows, band])
+            lo = np.searchsorted(values, keys, 'left')
+            hi = np.searchsorted(values, keys, 'right')
+            for start, end in zip(lo[hi - lo > _MAX_BUCKET], hi[hi - lo > _MAX_BUCKET]):
+                members.update(self._order[start:end, band].tolist())
+        return members
+
+    def _pairs(self, rows):
+        """Yield (rows, candidates) arrays per chunk of ``rows``.
+
+        Each row is paired once with every row sharing a band bucket with
+        it, sorted by row.
+        """
+        n = len(self.ids)
+        for start in range(0, len(rows), _CHUNK):
+            chunk = rows[start:start + _CHUNK]
+            owners, candidates = [], []
+            for band in range(BANDS):
+                values = self._sorted[:, band]
+                keys = self.bands[chunk, band]
+                lo = np.searchsorted(values, keys, 'left')
+                hi = np.searchsorted(values, keys, 'right')
+                large = hi - lo > _MAX_BUCKET
+                lo = np.where(large, np.clip(self._rank[chunk, band] - _MAX_BUCKET // 2, lo, hi - _MAX_BUCKET), lo)
+                counts = np.where(large, _MAX_BUCKET, hi - lo)
+                # A bucket of one only holds the row itself
+                counts[counts < 2] = 0
+                offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                owners.append(np.repeat(chunk, counts))
+                candidates.append(self._order[np.repeat(lo, counts) + offsets, band])
+            pairs = np.sort(np.concatenate(owners).astype(np.int64) * n + np.concatenate(candidates))
+            pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]] if len(pairs) else pairs
+            owners, candidates = pairs // n, pairs % n
+            distinct = owners != candidates
+            yield owners[distinct], candidates[distinct]
+
+    def _fill(self, rows):
+        """Compute the neighbours of ``rows`` from their candidates."""
+        self.neighbours[rows] = -1
+        self.scores[rows] = 0
+        for owners, candidates in self._pairs(rows):
+            scores = (self.signatures[owners] == self.signatures[candidates]).mean(axis=1)
+            keep = scores >= MIN_SIMILARITY
+            owners, candidates, scores = owners[keep], candidates[keep], scores[keep]
+            # Most similar first (ties by record id) within each row's pairs
+            order = np.lexsort((self.ids[candidates], -scores, owners))
+            owners, candidates, scores = owners[order], candidates[order], scores[order]
+            starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]]) if len(owners) else owners
+            position = np.arange(len(owners)) - np.repeat(starts, np.diff(np.r_[starts, len(owners)]))
+            top = position < TOP_K
+            self.neighbours[owners[top], position[top]] = candidates[top]
+            self.scores[owners[top], position[top]] = scores[top]
+
+    def changed_since(self, previous):
+        """(ids whose related items differ from ``previous``, ids no longer indexed)."""
+        rows = np.minimum(np.searchsorted(previous.ids, self.ids), max(len(previous.ids) - 1, 0))
+        found = previous.ids[rows] == self.ids if len(previous.ids) else np.zeros(len(self.ids), dtype=bool)
+        mine = np.where(self.neighbours >= 0, self.ids[np.maximum(self.neighbours, 0)], -1)[found]
+        old = previous.neighbours[rows[found]]
+        theirs = np.where(old >= 0, previous.ids[np.maximum(old, 0)], -1)
+        same = np.zeros(len(self.ids), dtype=bool)
+        same[found] = (mine == theirs).all(axis=1) & (self.scores[found] == previous.scores[rows[found]]).all(axis=1)
+        return self.ids[~same].tolist(), np.setdiff1d(previous.ids, self.ids).tolist()
+
+    def __contains__(self, record_id):
+        return record_id in self.rows
+
+    def __len__(self):
+        return len(self.ids)
+
+    def related(self, record_id, limit=TOP_K):
+        """Up to ``limit`` (record id, estimated similarity) pairs, most similar first."""
+        row = self.rows.get(record_id)
+        if row is None:
+            return []
+        return [
+            (int(self.ids[other]), round(float(score), 3))
+            for other, score in zip(self.neighbours[row, :limit], self.scores[row, :limit])
+            if other >= 0
+        ]
+
+
+# ===================
+# Persisted neighbours
+# ===================
+
+_RELATED_TABLE = "tvbo_kg_related"
+_STATE_TABLE = "tvbo_kg_related_state"
+# Rows per insert when storing neighbours
+_INSERT_BATCH = 50000
+
+# (dbname, kg_type) -> (catalogue version, SimilarityIndex) of the last build in this process
+_indexes = {}
+
+
+class KGRelated(models.AbstractModel):
+    _name = "tvbo.kg_related"
+    _description = "Knowledge graph related items"
+
+    def init(self):
+        cr = self.env.cr
+        cr.execute(
+            f"CREATE TABLE IF NOT EXISTS {_RELATED_TABLE} ("
+            f"kg_type varchar NOT NULL, res_id integer NOT NULL, rank smallint NOT NULL, "
+            f"related_id integer NOT NULL, score real NOT NULL, PRIMARY KEY (kg_type, res_id, rank))"
+        )
+        cr.execute(f"CREATE TABLE IF NOT EXISTS {_STATE_TABLE} (kg_type varchar PRIMARY KEY, version bigint NOT NULL)")
+
+    @api.model
+    def get_version(self, kg_type):
+        """Catalogue version the stored neighbours of ``kg_type`` were built from; None before the first build."""
+        self.env.cr.execute(f"SELECT version FROM {_STATE_TABLE} WHERE kg_type = %s", (kg_type,))
+        row = self.env.cr.fetchone()
+        return row and row[0]
+
+    @api.model
+    def related(self, kg_type, record_id, limit=TOP_K):
+        """Up to ``limit`` stored (record id, estimated similarity) pairs, most similar first."""
+        self.env.cr.execute(
+            f"SELECT related_id, score FROM {_RELATED_TABLE} WHERE kg_type = %s AND res_id = %s ORDER BY rank LIMIT %s",
+            (kg_type, record_id, limit),
+        )
+        return [(related_id, round(score, 3)) for related_id, score in self.env.cr.fetchall()]
+
+    @api.model
+    def _cron_refresh(self):
+        """Rebuild the indexes behind the catalogue version and store the neighbours that changed."""
+        version = self.env["tvbo.kg_catalogue"].get_version()
+        for kg_type, model_name in RELATED_MODELS.items():
+            stored = self.get_version(kg_type)
+            if stored == version:
+                continue
+            key = (self.env.cr.dbname, kg_type)
+            cached = _indexes.get(key)
+            # Only an index matching the stored rows can be diffed against them
+            previous = cached[1] if cached and stored is not None and cached[0] == stored else None
+            index = SimilarityIndex(read_features(self.env, kg_type, model_name), previous)
+            self._store(kg_type, index, previous)
+            self.env.cr.execute(
+                f"INSERT INTO {_STATE_TABLE} (kg_type, version) VALUES (%s, %s) "
+                f"ON CONFLICT (kg_type) DO UPDATE SET version = EXCLUDED.version",
+                (kg_type, version),
+            )
+            self.env.cr.postcommit.add(lambda key=key, index=index: _indexes.__setitem__(key, (version, index)))
+            _logger.info(f"Related {kg_type}: {len(index)} items indexed at catalogue version {version}")
+
+    def _store(self, kg_type, index, previous):
+        """Replace the stored neighbours of the items whose neighbours changed since ``previous``."""
+        cr = self.env.cr
+        if previous is None:
+            cr.execute(f"DELETE FROM {_RELATED_TABLE} WHERE kg_type = %s", (kg_type,))
+            rows = np.arange(len(index))
+        else:
+            changed, dropped = index.changed_since(previous)
+            cr.execute(
+                f"DELETE FROM {_RELATED_TABLE} WHERE kg_type = %s AND res_id = ANY(%s)",
+                (kg_type, changed + dropped),
+            )
+            rows = np.array([index.rows[record_id] for record_id in changed], dtype=np.int64)
+
+        owners, ranks = np.nonzero(index.neighbours[rows] >= 0)
+        res_ids = index.ids[rows[owners]]
+        related_ids = index.ids[index.neighbours[rows[owners], ranks]]
+        scores = index.scores[rows[owners], ranks]
+        for start in range(0, len(owners), _INSERT_BATCH):
+            batch = slice(start, start + _INSERT_BATCH)
+            cr.execute(
+                f"INSERT INTO {_RELATED_TABLE} (kg_type, res_id, rank, related_id, score) "
+                f"SELECT %s, unnest(%s::integer[]), unnest(%s::smallint[]), unnest(%s::integer[]), unnest(%s::real[])",
+                (kg_type, res_ids[batch].tolist(), ranks[batch].tolist(), related_ids[batch].tolist(),
+                 scores[batch].tolist()),
+            )
@@ -1716,26 +1716,34 @@
     }
   }
 
-  // Dynamic form builder using Pydantic schema
-  async function fetchModelSchema(modelName) {
-    try {
-      const response = await fetch('/tvbo/api/schema/model/' + modelName, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          jsonrpc: '2.0',
-          method: 'call',
-          params: {}
+  // Dynamic form builder using Pydantic schema.
+  // All schemas and enums are fetched once, in one request; the page passes
+  // the tvbo version so the response can be cached as immutable.
+  const SCHEMA_VERSION = (document.currentScript && document.currentScript.dataset.tvboVersion) || '';
+  let allSchemasPromise = null;
+
+  function fetchAllSchemas() {
+    if (!allSchemasPromise) {
+      const query = SCHEMA_VERSION ? '?v=' + encodeURIComponent(SCHEMA_VERSION) : '';
+      allSchemasPromise = fetch('/tvbo/api/schema/all' + query)
+        .then(response => {
+          if (!response.ok) {
+            throw new Error('HTTP ' + response.status);
+          }
+          return response.json();
         })
-      });
-      const data = await response.json();
-      return data.result;
-    } catch (error) {
-      console.error('Error fetching schema:', error);
-      return null;
+        .catch(error => {
+          console.error('Error fetching schemas:', error);
+          allSchemasPromise = null;  // retry on next use
+          return null;
+        });
     }
+    return allSchemasPromise;
+  }
+
+  async function fetchModelSchema(modelName) {
+    const schemas = await fetchAllSchemas();
+    return (schemas && schemas.models[modelName]) || null;
   }
 
   function createFormField(fieldDef, idPrefix) {
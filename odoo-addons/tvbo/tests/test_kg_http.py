@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""Conditional GET (controllers/kg_http.py) on the configurator routes."""
+from odoo.tests import HttpCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestConditionalGet(HttpCase):
+
+    def test_list_revalidates(self):
+        response = self.url_open('/tvbo/api/configurator/integrators')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        again = self.url_open('/tvbo/api/configurator/integrators', headers={'If-None-Match': etag})
+        self.assertEqual(again.status_code, 304)
+
+    def test_not_found_is_not_cacheable(self):
+        missing = (self.env['tvbo.dynamics'].search([], order='id desc', limit=1).id or 0) + 1
+        response = self.url_open(f'/tvbo/api/configurator/dynamics/{missing}')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.json()['success'])
+        self.assertNotIn('ETag', response.headers)
+        self.assertNotIn('Last-Modified', response.headers)
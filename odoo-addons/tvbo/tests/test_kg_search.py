@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Result order of the snapshot search index (controllers/kg_search.py)."""
+from odoo.tests import BaseCase, tagged
+
+from ..controllers.kg_search import KGSearchIndex
+
+
+class _Snapshot:
+    def __init__(self, items):
+        self.items = items
+
+    def documents(self):
+        for item in self.items:
+            yield f"db_{item['type']}_{item['id']}", item
+
+
+def _dynamics(record_id, name):
+    return {'type': 'dynamics', 'id': record_id, 'name': name}
+
+
+@tagged('post_install', '-at_install')
+class TestSearchOrder(BaseCase):
+
+    def test_incremental_order_matches_full_build(self):
+        # Equal scores everywhere: only the tie-break orders the hits
+        items = [_dynamics(i, f'jansen rit {i}') for i in range(1, 121)]
+        previous = KGSearchIndex(_Snapshot(items))
+        # Changed outside the searchable fields: re-indexed, same scores
+        changed = [{**item, 'system_type': 'discrete'} if i % 7 == 0 else item for i, item in enumerate(items, 1)]
+        changed.append(_dynamics(121, 'jansen rit 121'))
+        snapshot = _Snapshot(changed)
+
+        incremental = KGSearchIndex(snapshot, previous)
+        full = KGSearchIndex(snapshot)
+        for offset in (0, 20, 100):
+            self.assertEqual(
+                [r['id'] for r in incremental.search('jansen', limit=20, offset=offset)['results']],
+                [r['id'] for r in full.search('jansen', limit=20, offset=offset)['results']],
+            )
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Load test of the TVBO knowledge graph and configurator API.
+
+Concurrent clients request a weighted mix of routes against a running
+instance (normally the docker-compose stack with a catalogue seeded by
+benchmark_seed.py) for a fixed duration. The result is written as a JSON
+artifact, to be compared across commits:
+
+    per route and overall: requests, errors, status codes, throughput,
+    latency p50/p95/p99/max, response bytes, and SQL queries and SQL time
+    per request (from /tvbo/api/metrics, sampled before and after the run)
+
+Record ids for the detail routes are taken from /tvbo/api/kg/data, which
+is requested once before the run (this also warms the catalogue snapshot).
+
+Standard library only; no network access beyond the target instance.
+
+Usage:
+    python scripts/benchmark_api.py --url http://localhost:8169 \\
+        --clients 16 --duration 60 --output benchmark-results/$(git rev-parse --short HEAD).json
+
+    # Only some routes, with their weights
+    python scripts/benchmark_api.py --routes data=1,graph=1,dynamics=10
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+# Route name -> (weight, path template, KG type of the {id} placeholder or None)
+ROUTES = {
+    "data": (1, "/tvbo/api/kg/data", None),
+    "graph": (1, "/tvbo/api/kg/graph", None),
+    "dynamics": (10, "/tvbo/api/kg/dynamics/{id}", "dynamics"),
+    "network": (2, "/tvbo/api/kg/network/{id}", "network"),
+    "integrator": (2, "/tvbo/api/kg/integrator/{id}", "integrator"),
+    "coupling": (2, "/tvbo/api/kg/coupling/{id}", "coupling"),
+    "experiment": (5, "/tvbo/api/kg/experiment/{id}", "experiment"),
+    "study": (3, "/tvbo/api/kg/study/{id}", "study"),
+    "configurator_experiment": (5, "/tvbo/api/configurator/experiment/{id}", "experiment"),
+}
+# Route handler (method name, as labelled in /tvbo/api/metrics) of each route
+HANDLERS = {
+    "data": "get_all_data",
+    "graph": "get_knowledge_graph",
+    "dynamics": "get_dynamics_detail",
+    "network": "get_network_detail",
+    "integrator": "get_integrator_detail",
+    "coupling": "get_coupling_detail",
+    "experiment": "get_experiment_detail",
+    "study": "get_study_detail",
+    "configurator_experiment": "api_experiment_detail",
+}
+
+_SAMPLE_RE = re.compile(r'^(tvbo_http_sql_(?:queries|duration_seconds))_(sum|count)\{handler="([^"]+)"\} (\S+)$')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8169", help="Base URL of the instance")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=10.0, help="Seconds of unmeasured load first")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--routes", default="", help="name=weight,... (default: all routes, default weights)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the request mix")
+    parser.add_argument("--metrics-token", default=os.environ.get("TVBO_METRICS_TOKEN", ""),
+                        help="Bearer token of /tvbo/api/metrics, if one is configured")
+    parser.add_argument("--output", default="benchmark-results/latest.json", help="JSON artifact path")
+    return parser.parse_args()
+
+
+def route_weights(spec):
+    if not spec:
+        return {name: weight for name, (weight, _, _) in ROUTES.items()}
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ROUTES:
+            raise SystemExit(f"Unknown route {name!r}; choose from {', '.join(ROUTES)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def fetch(url, timeout, headers=None):
+    """(status, body bytes) of a GET request."""
+    request = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def catalogue_ids(base_url, timeout):
+    """Record ids of each KG type, from /tvbo/api/kg/data."""
+    status, body = fetch(base_url + "/tvbo/api/kg/data?include_ontology=false", timeout)
+    if status != 200:
+        raise SystemExit(f"/tvbo/api/kg/data returned {status}")
+    ids = defaultdict(list)
+    for item in json.loads(body):
+        ids[item["type"]].append(item["id"])
+    return ids
+
+
+def sql_metrics(base_url, token, timeout):
+    """{handler: {"queries": sum, "sql_seconds": sum, "count": n}} from /tvbo/api/metrics."""
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    status, body = fetch(base_url + "/tvbo/api/metrics", timeout, headers)
+    if status != 200:
+        print(f"⚠ /tvbo/api/metrics returned {status}; query counts not reported")
+        return None
+    metrics = defaultdict(dict)
+    for line in body.decode().splitlines():
+        match = _SAMPLE_RE.match(line)
+        if match:
+            name, kind, handler, value = match.groups()
+            key = "count" if kind == "count" else ("queries" if name.endswith("queries") else "sql_seconds")
+            metrics[handler][key] = float(value)
+    return metrics
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, seconds):
+    latencies = sorted(latency for latency, _, _ in samples)
+    statuses = defaultdict(int)
+    for _, status, _ in samples:
+        statuses[str(status)] += 1
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "statuses": dict(statuses),
+        "throughput_rps": round(len(samples) / seconds, 2),
+        "latency_ms": {
+            "p50": _ms(percentile(latencies, 50)),
+            "p95": _ms(percentile(latencies, 95)),
+            "p99": _ms(percentile(latencies, 99)),
+            "max": _ms(latencies[-1] if latencies else None),
+            "mean": _ms(sum(latencies) / len(latencies) if latencies else None),
+        },
+        "bytes_mean": round(sum(size for _, _, size in samples) / len(samples)) if samples else None,
+    }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+class LoadRun:
+    """Clients picking routes at random (by weight) until the deadline."""
+
+    def __init__(self, base_url, weights, ids, timeout, seed):
+        self.base_url = base_url
+        self.names = list(weights)
+        self.weights = [weights[n] for n in self.names]
+        self.ids = ids
+        self.timeout = timeout
+        self.seed = seed
+        self.samples = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def url(self, rng, name):
+        _, path, kg_type = ROUTES[name]
+        if kg_type is None:
+            return self.base_url + path
+        return self.base_url + path.format(id=rng.choice(self.ids[kg_type]))
+
+    def client(self, index, deadline, record):
+        rng = random.Random(f"{self.seed}-{index}")
+        while time.monotonic() < deadline:
+            name = rng.choices(self.names, self.weights)[0]
+            url = self.url(rng, name)
+            start = time.perf_counter()
+            try:
+                status, body = fetch(url, self.timeout)
+                size = len(body)
+            except OSError:
+                status, size = "error", 0
+            latency = time.perf_counter() - start
+            if record:
+                with self.lock:
+                    self.samples[name].append((latency, status, size))
+
+    def run(self, clients, seconds, record=True):
+        deadline = time.monotonic() + seconds
+        threads = [
+            threading.Thread(target=self.client, args=(i, deadline, record), daemon=True)
+            for i in range(clients)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            text=True, stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    base_url = args.url.rstrip("/")
+    weights = route_weights(args.routes)
+
+    print(f"Collecting record ids from {base_url} ...")
+    ids = catalogue_ids(base_url, args.timeout)
+    missing = sorted({ROUTES[n][2] for n in weights if ROUTES[n][2] and not ids.get(ROUTES[n][2])})
+    if missing:
+        raise SystemExit(f"No records of type(s) {', '.join(missing)}; seed the catalogue first")
+
+    run = LoadRun(base_url, weights, ids, args.timeout, args.seed)
+    if args.warmup > 0:
+        print(f"Warming up for {args.warmup:.0f}s with {args.clients} clients ...")
+        run.run(args.clients, args.warmup, record=False)
+
+    before = sql_metrics(base_url, args.metrics_token, args.timeout)
+    print(f"Measuring for {args.duration:.0f}s with {args.clients} clients ...")
+    elapsed = run.run(args.clients, args.duration)
+    after = sql_metrics(base_url, args.metrics_token, args.timeout)
+
+    routes = {}
+    for name in weights:
+        routes[name] = summarize(run.samples[name], elapsed)
+        handler = HANDLERS[name]
+        if before is not None and after is not None:
+            delta = {k: after.get(handler, {}).get(k, 0) - before.get(handler, {}).get(k, 0)
+                     for k in ("queries", "sql_seconds", "count")}
+            if delta["count"]:
+                routes[name]["sql_queries_per_request"] = round(delta["queries"] / delta["count"], 2)
+                routes[name]["sql_ms_per_request"] = round(delta["sql_seconds"] / delta["count"] * 1000, 2)
+    overall = summarize([s for samples in run.samples.values() for s in samples], elapsed)
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "url": base_url,
+        "config": {
+            "clients": args.clients,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "weights": weights,
+            "seed": args.seed,
+        },
+        "catalogue": {kg_type: len(values) for kg_type, values in sorted(ids.items())},
+        "elapsed_s": round(elapsed, 2),
+        "overall": overall,
+        "routes": routes,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print()
+    print(f"{'route':<26}{'req':>8}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'sql/req':>9}")
+    for name, r in [*routes.items(), ("overall", overall)]:
+        latency = r["latency_ms"]
+        print(f"{name:<26}{r['requests']:>8}{r['errors']:>6}{r['throughput_rps']:>9}"
+              f"{latency['p50'] or '-':>10}{latency['p95'] or '-':>10}{latency['p99'] or '-':>10}"
+              f"{r.get('sql_queries_per_request', '-'):>9}")
+    print()
+    print(f"✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
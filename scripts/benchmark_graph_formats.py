@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Compare wire formats of /tvbo/api/kg/graph: size and parse time.
+
+Formats:
+    json      current row-oriented {"nodes": [...], "links": [...]}
+    columnar  node table + integer-indexed link arrays, as JSON
+    msgpack   columnar, link arrays as int32 buffers (needs `pip install msgpack`)
+
+The graph is either fetched from a running instance or generated
+synthetically. Parse time is the time to decode the payload; for the
+columnar formats it is also reported including the conversion back to
+row dicts (what a client expecting the old shape would pay).
+
+Usage:
+    # Synthetic graph (2000 ontology classes, 20000 database items)
+    python scripts/benchmark_graph_formats.py
+
+    # Bigger synthetic graph
+    python scripts/benchmark_graph_formats.py --classes 5000 --items 100000
+
+    # Graph of a running instance
+    python scripts/benchmark_graph_formats.py --url http://localhost:8069
+"""
+
+import argparse
+import gzip
+import importlib.util
+import json
+import os
+import random
+import sys
+import time
+import urllib.request
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# --------------------------------------------------------------------- paths
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PLATFORM_ROOT = os.path.dirname(SCRIPT_DIR)
+ADDON_DIR = os.path.join(PLATFORM_ROOT, "odoo-addons", "tvbo")
+
+# kg_graph has no Odoo imports; load it by path so no Odoo install is needed
+_spec = importlib.util.spec_from_file_location(
+    "kg_graph", os.path.join(ADDON_DIR, "controllers", "kg_graph.py")
+)
+kg_graph = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(kg_graph)
+
+DB_TYPES = ["dynamics", "network", "integrator", "experiment", "study", "coupling"]
+
+
+def synthetic_graph(classes, items, seed=0):
+    """Class hierarchy plus instance nodes shaped like KGGraph output."""
+    rng = random.Random(seed)
+    hierarchy = {"nodes": [], "links": []}
+    for storid in range(1, classes + 1):
+        hierarchy["nodes"].append({
+            "id": storid,
+            "storid": storid,
+            "label": f"OntologyClass{storid}",
+            "type": "class",
+            "iri": f"http://www.thevirtualbrain.org/tvb-o/OntologyClass{storid}",
+        })
+        if storid > 1:
+            hierarchy["links"].append({
+                "source": storid,
+                "target": rng.randint(1, storid - 1),
+                "type": "subclass_of",
+                "label": "subclass of",
+            })
+    db_items = []
+    for i in range(items):
+        db_type = rng.choice(DB_TYPES)
+        db_items.append({
+            "id": i,
+            "type": db_type,
+            "name": f"{db_type}_{i}",
+            "title": f"Synthetic {db_type} {i}",
+            "ontology_class": {"storid": rng.randint(1, classes)},
+        })
+    graph = kg_graph.KGGraph(hierarchy, db_items)
+    return graph.nodes, graph.links
+
+
+def fetch_graph(url):
+    with urllib.request.urlopen(f"{url.rstrip('/')}/tvbo/api/kg/graph") as response:
+        data = json.loads(response.read())
+    return data["nodes"], data["links"]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark KG graph wire formats"
+    )
+    parser.add_argument("--url", help="Base URL of a running instance (default: synthetic graph)")
+    parser.add_argument("--classes", type=int, default=2000, help="Synthetic ontology classes")
+    parser.add_argument("--items", type=int, default=20000, help="Synthetic database items")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions (best is reported)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.url:
+        nodes, links = fetch_graph(args.url)
+    else:
+        nodes, links = synthetic_graph(args.classes, args.items)
+
+    payloads = {
+        "json": (json.dumps({"nodes": nodes, "links": links}).encode(), json.loads, None),
+        "columnar": (json.dumps(kg_graph.encode_columnar(nodes, links)).encode(), json.loads,
+                     kg_graph.decode_columnar),
+    }
+    if msgpack is not None:
+        payloads["msgpack"] = (
+            msgpack.packb(kg_graph.encode_columnar(nodes, links, typed_links=True), use_bin_type=True),
+            lambda body: msgpack.unpackb(body, raw=False),
+            kg_graph.decode_columnar,
+        )
+    else:
+        print("msgpack not installed, skipping msgpack format", file=sys.stderr)
+
+    results = {"nodes": len(nodes), "links": len(links), "formats": {}}
+    print(f"{len(nodes)} nodes, {len(links)} links")
+    print(f"{'format':<10} {'bytes':>12} {'gzip':>12} {'parse ms':>10} {'+rows ms':>10}")
+    for name, (body, parse, to_rows) in payloads.items():
+        parse_s = timed(lambda: parse(body), args.repeat)
+        rows_s = timed(lambda: to_rows(parse(body)), args.repeat) if to_rows else parse_s
+        entry = {
+            "bytes": len(body),
+            "gzip_bytes": len(gzip.compress(body)),
+            "parse_ms": round(parse_s * 1000, 2),
+            "parse_to_rows_ms": round(rows_s * 1000, 2),
+        }
+        results["formats"][name] = entry
+        print(f"{name:<10} {entry['bytes']:>12} {entry['gzip_bytes']:>12} "
+              f"{entry['parse_ms']:>10} {entry['parse_to_rows_ms']:>10}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Seed a database with a synthetic TVBO catalogue for API benchmarks.
+
+Runs inside ``odoo shell`` (it needs ``env``) and creates, reproducibly from
+a fixed random seed:
+
+    dynamics      with parameters and state variables (each with an equation)
+    integrators, couplings
+    networks      a few of them large (many nodes and edges)
+    experiments   linking dynamics, integrator, coupling and network
+    studies       grouping experiments
+    literature    references linked to studies
+
+Records are created through the ORM in batches, one commit per batch.
+Sizes come from environment variables (defaults in SIZES). TVBO_METRICS_TOKEN,
+if set, becomes the bearer token of /tvbo/api/metrics.
+
+Usage (docker-compose stack, see `make bench-seed`):
+    docker compose exec -T -e BENCH_DYNAMICS=100000 odoo \\
+        odoo shell -d tvbo_bench --db_host=postgres --db_user=odoo --db_password=odoo \\
+        < scripts/benchmark_seed.py
+"""
+
+import os
+import random
+import time
+
+SIZES = {
+    "dynamics": 100000,
+    "parameters_per_dynamics": 8,
+    "state_variables_per_dynamics": 3,
+    "integrators": 200,
+    "couplings": 100,
+    "networks": 50,
+    "large_networks": 5,
+    "large_network_nodes": 1000,
+    "large_network_edges": 20000,
+    "experiments": 10000,
+    "studies": 2000,
+    "literature": 50000,
+}
+BATCH_SIZE = 1000
+SEED = 0
+
+WORDS = (
+    "oscillator neural mass field cortical thalamic excitatory inhibitory population "
+    "bifurcation synchrony rhythm gamma alpha theta delay noise coupling connectome "
+    "resting state epileptor seizure wave propagation network region dynamics"
+).split()
+METHODS = ("euler", "heun", "rk4", "euler_maruyama", "stochastic_heun")
+NAME_PREFIX = "bench"
+
+
+def sizes_from_environ():
+    """SIZES overridden by BENCH_<KEY> environment variables."""
+    return {key: int(os.environ.get(f"BENCH_{key.upper()}", default)) for key, default in SIZES.items()}
+
+
+def _words(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _batches(total):
+    for start in range(0, total, BATCH_SIZE):
+        yield start, min(start + BATCH_SIZE, total)
+
+
+def _commit(env, what, done, total, start):
+    env.cr.commit()
+    print(f"  {what}: {done}/{total} ({time.perf_counter() - start:.0f}s)", flush=True)
+
+
+def seed_parameters(env, rng, prefixes, n):
+    """``n`` parameters for each of ``prefixes`` in one create; their ids per prefix."""
+    ids = env["tvbo.parameter"].create([
+        {
+            "name": f"{prefix}_p{i}",
+            "symbol": f"{rng.choice('abcdgkw')}_{i}",
+            "value": round(rng.uniform(-10, 10), 3),
+            "unit": rng.choice(("ms", "mV", "Hz", "")),
+            "description": _words(rng, 8),
+        }
+        for prefix in prefixes for i in range(n)
+    ]).ids
+    return [ids[k * n:(k + 1) * n] for k in range(len(prefixes))]
+
+
+def seed_dynamics(env, rng, sizes):
+    """Dynamics with their parameters, equations and state variables, one create per model and batch."""
+    system_types = env["tvbo.system_type"].search([]).ids or [False]
+    total = sizes["dynamics"]
+    n_params = sizes["parameters_per_dynamics"]
+    n_svs = sizes["state_variables_per_dynamics"]
+    ids = []
+    start = time.perf_counter()
+    for first, last in _batches(total):
+        names = [f"{NAME_PREFIX}_dynamics_{i}" for i in range(first, last)]
+        parameters = seed_parameters(env, rng, names, n_params)
+        equations = env["tvbo.equation"].create([
+            {
+                "label": f"d{name}_sv{j}/dt",
+                "lefthandside": f"dx{j}/dt",
+                "righthandside": f"-x{j} + {rng.choice(WORDS)}_{j} * tanh(x{(j + 1) % n_svs})",
+                "definition": f"dx{j}/dt = -x{j} + a * tanh(x{(j + 1) % n_svs})",
+            }
+            for name in names for j in range(n_svs)
+        ]).ids
+        state_variables = env["tvbo.state_variable"].create([
+            {
+                "name": f"{name}_sv{j}",
+                "symbol": f"x{j}",
+                "description": _words(rng, 6),
+                "initial_value": rng.random(),
+                "equation": equations[k * n_svs + j],
+            }
+            for k, name in enumerate(names) for j in range(n_svs)
+        ]).ids
+        ids += env["tvbo.dynamics"].create([
+            {
+                "name": name,
+                "label": f"{_words(rng, 2).title()} {first + k}",
+                "description": _words(rng, 30),
+                "system_type": rng.choice(system_types),
+                "parameters": [(6, 0, parameters[k])],
+                "state_variables": [(6, 0, state_variables[k * n_svs:(k + 1) * n_svs])],
+                "number_of_modes": rng.choice((1, 1, 1, 2, 3)),
+            }
+            for k, name in enumerate(names)
+        ]).ids
+        _commit(env, "dynamics", last, total, start)
+    return ids
+
+
+def seed_integrators(env, rng, sizes):
+    names = [f"{NAME_PREFIX}_integrator_{i}" for i in range(sizes["integrators"])]
+    parameters = seed_parameters(env, rng, names, 2)
+    records = env["tvbo.integrator"].create([
+        {
+            "method": rng.choice(METHODS),
+            "step_size": rng.choice((0.01, 0.05, 0.1, 0.01220703125)),
+            "duration": rng.choice((1000.0, 10000.0, 60000.0)),
+            "description": _words(rng, 10),
+            "parameters": [(6, 0, parameters[i])],
+        }
+        for i in range(len(names))
+    ])
+    env.cr.commit()
+    return records.ids
+
+
+def seed_couplings(env, rng, sizes):
+    names = [f"{NAME_PREFIX}_coupling_{i}" for i in range(sizes["couplings"])]
+    parameters = seed_parameters(env, rng, names, 3)
+    records = env["tvbo.coupling"].create([
+        {
+            "name": name,
+            "label": f"{_words(rng, 1).title()} coupling {i}",
+            "description": _words(rng, 10),
+            "delayed": rng.random() < 0.5,
+            "parameters": [(6, 0, parameters[i])],
+        }
+        for i, name in enumerate(names)
+    ])
+    env.cr.commit()
+    return records.ids
+
+
+def seed_networks(env, rng, sizes, dynamics_ids, coupling_ids):
+    ids = []
+    start = time.perf_counter()
+    for i in range(sizes["networks"]):
+        large = i < sizes["large_networks"]
+        n_nodes = sizes["large_network_nodes"] if large else rng.randint(10, 100)
+        n_edges = sizes["large_network_edges"] if large else n_nodes * 4
+        nodes = env["tvbo.node"].create([
+            {
+                "record_id": k,
+                "label": f"region_{k}",
+                "region": f"R{k}",
+                "dynamics": rng.choice(dynamics_ids) if rng.random() < 0.1 else False,
+            }
+            for k in range(n_nodes)
+        ])
+        edges = env["tvbo.edge"].browse()
+        for first, last in _batches(n_edges):
+            edges |= env["tvbo.edge"].create([
+                {
+                    "source": rng.randrange(n_nodes),
+                    "target": rng.randrange(n_nodes),
+                    "coupling": rng.choice(coupling_ids),
+                    "directed": True,
+                }
+                for _ in range(first, last)
+            ])
+        ids.append(env["tvbo.network"].create({
+            "label": f"{NAME_PREFIX} network {i}" + (" (large)" if large else ""),
+            "description": _words(rng, 12),
+            "number_of_regions": n_nodes,
+            "number_of_nodes": n_nodes,
+            "nodes": [(6, 0, nodes.ids)],
+            "edges": [(6, 0, edges.ids)],
+            "coupling": [(6, 0, rng.sample(coupling_ids, min(3, len(coupling_ids))))],
+        }).id)
+        _commit(env, "networks", i + 1, sizes["networks"], start)
+    return ids
+
+
+def seed_experiments(env, rng, sizes, dynamics_ids, integrator_ids, coupling_ids, network_ids):
+    total = sizes["experiments"]
+    ids = []
+    start = time.perf_counter()
+    for first, last in _batches(total):
+        ids += env["tvbo.simulation_experiment"].create([
+            {
+                "label": f"{NAME_PREFIX} experiment {i}",
+                "description": _words(rng, 20),
+                "dynamics": [(6, 0, rng.sample(dynamics_ids, rng.choice((1, 1, 2))))],
+                "integration": rng.choice(integrator_ids),
+                "coupling": rng.choice(coupling_ids),
+                "network": rng.choice(network_ids),
+            }
+            for i in range(first, last)
+        ]).ids
+        _commit(env, "experiments", last, total, start)
+    return ids
+
+
+def seed_studies(env, rng, sizes, dynamics_ids, experiment_ids):
+    per_study = max(1, len(experiment_ids) // max(1, sizes["studies"]))
+    records = env["tvbo.simulation_study"].create([
+        {
+            "label": f"{NAME_PREFIX} study {i}",
+            "title": _words(rng, 8).capitalize(),
+            "description": _words(rng, 40),
+            "year": rng.randint(1990, 2025),
+            "doi": f"10.9999/bench.study.{i}",
+            "model": rng.choice(dynamics_ids),
+            "simulation_experiments": [(6, 0, experiment_ids[i * per_study:(i + 1) * per_study])],
+        }
+        for i in range(sizes["studies"])
+    ])
+    env.cr.commit()
+    return records.ids
+
+
+def seed_literature(env, rng, sizes, study_ids):
+    total = sizes["literature"]
+    start = time.perf_counter()
+    for first, last in _batches(total):
+        env["tvbo.literature_reference"].create([
+            {
+                "title": _words(rng, 10).capitalize(),
+                "key": f"{NAME_PREFIX}{i}",
+                "pubmed_id": str(90000000 + i),
+                "doi": f"10.9999/bench.ref.{i}",
+                "year": rng.randint(1970, 2025),
+                "journal": f"Journal of {_words(rng, 2).title()}",
+                "abstract": _words(rng, 150),
+                "authors": ", ".join(f"Author {rng.randrange(10000)}" for _ in range(rng.randint(1, 8))),
+                "simulation_study_ids": [(6, 0, rng.sample(study_ids, rng.choice((0, 1, 1, 2))))],
+            }
+            for i in range(first, last)
+        ])
+        _commit(env, "literature", last, total, start)
+
+
+def seed(env, sizes):
+    if env["tvbo.dynamics"].search_count([("name", "=like", f"{NAME_PREFIX}_dynamics_%")], limit=1):
+        raise SystemExit(f"Database {env.cr.dbname} already has a benchmark catalogue; seed a fresh one")
+    rng = random.Random(SEED)
+    env = env(context=dict(env.context, tracking_disable=True))
+    start = time.perf_counter()
+    print(f"Seeding {env.cr.dbname}: {sizes}", flush=True)
+    dynamics_ids = seed_dynamics(env, rng, sizes)
+    integrator_ids = seed_integrators(env, rng, sizes)
+    coupling_ids = seed_couplings(env, rng, sizes)
+    network_ids = seed_networks(env, rng, sizes, dynamics_ids, coupling_ids)
+    experiment_ids = seed_experiments(env, rng, sizes, dynamics_ids, integrator_ids, coupling_ids, network_ids)
+    study_ids = seed_studies(env, rng, sizes, dynamics_ids, experiment_ids)
+    seed_literature(env, rng, sizes, study_ids)
+    print(f"✓ Seeded in {time.perf_counter() - start:.0f}s", flush=True)
+
+
+def set_metrics_token(env):
+    """Let the load test read /tvbo/api/metrics (only internal users can without a token)."""
+    token = os.environ.get("TVBO_METRICS_TOKEN")
+    if token:
+        env["ir.config_parameter"].sudo().set_param("tvbo.metrics_token", token)
+        env.cr.commit()
+
+
+# `odoo shell` executes this file with `env` in its namespace
+if "env" in globals():
+    set_metrics_token(env)  # noqa: F821
+    seed(env, sizes_from_environ())  # noqa: F821
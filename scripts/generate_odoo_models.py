@@ -791,6 +791,7 @@ def main():
         "data": [
             "security/ir.model.access.csv",
         ],
+        "post_load": "post_load",
         "installable": True,
         "application": True,
         "auto_install": False,
@@ -799,10 +800,13 @@ def main():
     manifest_content = "# -*- coding: utf-8 -*-\n" + str(manifest)
     (module_dir / "__manifest__.py").write_text(manifest_content)
 
-    # Generate __init__.py files
-    (module_dir / "__init__.py").write_text(
-        "from . import models\nfrom . import controllers\n"
-    )
+    # Generate __init__.py files (the root one is kept once it exists: it
+    # holds the post_load hook named in the manifest)
+    if not (module_dir / "__init__.py").exists():
+        (module_dir / "__init__.py").write_text(
+            "from . import models\nfrom . import controllers\n\n\n"
+            "def post_load():\n    pass\n"
+        )
     (module_dir / "models" / "__init__.py").write_text("from . import models\n")
 
     # Collect all classes from all schemas
@@ -887,7 +891,8 @@ def main():
 
     # Update models/__init__.py to import schema models only
     (module_dir / "models" / "__init__.py").write_text(
-        "from . import schema_models\nfrom . import literature\n"
+        "from . import schema_models\nfrom . import literature\nfrom . import kg_catalogue\nfrom . import kg_fulltext\n"
+        "from . import kg_related\n"
     )
 
     # Generate data XML files for enum values
@@ -925,6 +930,9 @@ def main():
     website_files = []
     if (module_dir / "data" / "website_config.xml").exists():
         website_files.append("data/website_config.xml")
+    # Manually created cron jobs (related items refresh) - preserve these
+    if (module_dir / "data" / "ir_cron.xml").exists():
+        website_files.append("data/ir_cron.xml")
     if (module_dir / "views" / "website_templates.xml").exists():
         website_files.append("views/website_templates.xml")
     # Manually created template files - preserve these